@@ -1,6 +1,57 @@
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from rest_framework import serializers
+from artpieces.models import Artpiece
+from images.variants import get_thumbnail_url
 from .models import ArtCollection
 
+COVER_IMAGE_COUNT = 4
+
+
+def load_cover_images(collection_ids):
+    """
+    Returns the thumbnail urls of the latest artpieces of each collection,
+    for any number of collections, with a single windowed query.
+
+    Args:
+        collection_ids: The ids of the collections.
+
+    Returns:
+        dict: The list of up to COVER_IMAGE_COUNT urls of each collection,
+        newest first, keyed by collection id.
+    """
+    rows = Artpiece.objects.filter(
+        art_collection__in=collection_ids
+    ).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('art_collection')],
+            order_by=[F('created_on').desc(), F('id').desc()])
+    ).filter(
+        position__lte=COVER_IMAGE_COUNT
+    ).order_by(
+        'art_collection', 'position'
+    ).values_list('art_collection', 'image', 'image_public_id')
+
+    covers = {collection_id: [] for collection_id in collection_ids}
+    for collection_id, image, public_id in rows:
+        covers[collection_id].append(get_thumbnail_url(image, public_id))
+    return covers
+
+
+class ArtCollectionListSerializer(serializers.ListSerializer):
+    """
+    List serializer loading the cover images of a whole page of collections
+    with a single query, see `load_cover_images`.
+    """
+    def to_representation(self, data):
+        collections = list(data.all() if hasattr(data, 'all') else data)
+        covers = load_cover_images([
+            collection.pk for collection in collections])
+        for collection in collections:
+            collection.cover_images = covers[collection.pk]
+        return super().to_representation(collections)
+
 
 class ArtCollectionSerializer(serializers.ModelSerializer):
     """
@@ -15,22 +66,25 @@ class ArtCollectionSerializer(serializers.ModelSerializer):
         collection's owner.
         - profile_image: Read-only field displaying the URL of the profile
         image of the collection's owner.
-        - artpieces: Read-only field displaying the primary keys of the
-        artpieces associated to the collection.
+        - artpiece_count: Read-only field displaying the number of artpieces
+        in the collection. The artpieces are listed by the
+        `/collections/<pk>/artpieces/` endpoint.
+        - cover_images: Read-only field displaying the thumbnail URLs of the
+        latest artpieces of the collection, see `load_cover_images`.
 
     Meta:
         - model: Specifies the model class to serialize (ArtCollection).
         - fields: Lists the fields to be included in the serialized output.
+        - list_serializer_class: Loads the cover images of a page of
+        collections at once.
     """
     owner = serializers.ReadOnlyField(source='owner.id')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
     profile_name = serializers.ReadOnlyField(source='owner.profile.name')
     profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
-    artpieces = serializers.PrimaryKeyRelatedField(
-        many=True,
-        read_only=True,
-        source='collection_artpieces')
+    artpiece_count = serializers.SerializerMethodField()
+    cover_images = serializers.SerializerMethodField()
 
     def get_is_owner(self, obj):
         """
@@ -40,6 +94,25 @@ class ArtCollectionSerializer(serializers.ModelSerializer):
         request = self.context['request']
         return request.user == obj.owner
 
+    def get_artpiece_count(self, obj):
+        """
+        Returns the number of artpieces in the collection. Uses the
+        `artpiece_count` annotation when the view has provided one.
+        """
+        if hasattr(obj, 'artpiece_count'):
+            return obj.artpiece_count
+        return obj.collection_artpieces.count()
+
+    def get_cover_images(self, obj):
+        """
+        Returns the thumbnail URLs of the latest artpieces of the collection.
+        Uses the cover images loaded by `ArtCollectionListSerializer` when
+        serializing a list.
+        """
+        if hasattr(obj, 'cover_images'):
+            return obj.cover_images
+        return load_cover_images([obj.pk])[obj.pk]
+
     def validate_title(self, value):
         """ Validates that the title is 70 characters or less. """
         if len(value) > 70:
@@ -61,5 +134,16 @@ class ArtCollectionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'owner', 'is_owner', 'profile_id', 'profile_name',
             'profile_image', 'created_on', 'updated_on', 'title',
-            'description', 'artpieces',
+            'description', 'artpiece_count', 'cover_images',
         ]
+        list_serializer_class = ArtCollectionListSerializer
+
+
+class ArtCollectionArtpieceIdsSerializer(serializers.Serializer):
+    """
+    Validates the artpiece ids sent to update the artpieces of a collection,
+    as a JSON list or as repeated form fields. Numeric strings are converted
+    to integers, and other values (including booleans) rejected.
+    """
+    artpiece_ids = serializers.ListField(
+        child=serializers.IntegerField(), default=list)
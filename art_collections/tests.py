@@ -1,5 +1,7 @@
 from rest_framework import status
 from rest_framework.test import APITestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from users.models import CustomUser
 from .models import ArtCollection
@@ -172,3 +174,176 @@ class ArtCollectionTests(APITestCase):
         self.assertEqual(
             sorted(updated_artpiece_ids),
             [self.artpiece1.id, self.artpiece2.id])
+
+    def test_update_costs_fixed_number_of_queries(self):
+        """
+        Tests that moving 50 artpieces into the collection costs the same
+        number of queries as moving one, with two UPDATE statements, and that
+        the search documents of the moved artpieces are refreshed.
+        """
+        url = reverse(
+            'collection-update-artpieces',
+            args=[self.art_collection.id]
+            )
+        artpieces = Artpiece.objects.bulk_create([
+            Artpiece(owner=self.user, title=f'Bulk {i}') for i in range(50)])
+
+        with CaptureQueriesContext(connection) as one:
+            self.client.post(
+                url, {'artpiece_ids': [self.artpiece2.id]}, format='json')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(
+                url, {'artpiece_ids': [a.id for a in artpieces]},
+                format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(many), len(one))
+        updates = [
+            query for query in many.captured_queries
+            if query['sql'].startswith('UPDATE "artpieces_artpiece" SET '
+                                       '"art_collection_id"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            self.art_collection.collection_artpieces.count(), 50)
+        self.assertIn(
+            'Test Collection',
+            Artpiece.objects.get(pk=artpieces[0].pk).search_document)
+        self.assertNotIn(
+            'Test Collection',
+            Artpiece.objects.get(pk=self.artpiece1.pk).search_document)
+
+    def test_artpiece_ids_are_validated_as_integers(self):
+        """
+        Tests that artpiece ids sent as form fields or numeric strings are
+        accepted, and that booleans and other values are rejected.
+        """
+        url = reverse(
+            'collection-update-artpieces',
+            args=[self.art_collection.id]
+            )
+        response = self.client.post(
+            url, {'artpiece_ids': [self.artpiece1.id, self.artpiece2.id]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(
+            url, {'artpiece_ids': [str(self.artpiece2.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(self.art_collection.collection_artpieces.all()),
+            [self.artpiece2])
+
+        for artpiece_ids in [[True], ['one'], self.artpiece1.id]:
+            response = self.client.post(
+                url, {'artpiece_ids': artpiece_ids}, format='json')
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('artpiece_ids', response.data)
+        self.assertEqual(
+            list(self.art_collection.collection_artpieces.all()),
+            [self.artpiece2])
+
+    def test_invalid_update_changes_nothing(self):
+        """
+        Tests that a request including another user's artpiece or a missing
+        artpiece is rejected without any change to the collection.
+        """
+        other_user = CustomUser.objects.create_user(
+            email='other@test.com',
+            password='testpass'
+        )
+        other_artpiece = Artpiece.objects.create(
+            owner=other_user,
+            title='Other artpiece'
+            )
+        url = reverse(
+            'collection-update-artpieces',
+            args=[self.art_collection.id]
+            )
+
+        response = self.client.post(
+            url, {'artpiece_ids': [self.artpiece2.id, other_artpiece.id]},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(
+            url, {'artpiece_ids': [self.artpiece2.id, 0]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(
+            list(self.art_collection.collection_artpieces.all()),
+            [self.artpiece1])
+
+
+class ArtCollectionArtpiecesTests(APITestCase):
+    """
+    Test suite for the artpiece count and cover images of collections, and
+    the paginated '/collections/id/artpieces/' endpoint.
+    """
+    def setUp(self):
+        """
+        Creates a test user with two collections of 10 and 2 artpieces.
+        """
+        self.user = CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass'
+        )
+        self.large = ArtCollection.objects.create(
+            owner=self.user, title='Large')
+        self.small = ArtCollection.objects.create(
+            owner=self.user, title='Small')
+        base_url = 'https://res.cloudinary.com/demo/image/upload/v1'
+        for i in range(12):
+            Artpiece.objects.create(
+                owner=self.user,
+                title=f'Artpiece {i}',
+                image=f'{base_url}/piece{i}.jpg',
+                art_collection=self.large if i < 10 else self.small)
+
+    def test_list_returns_counts_and_covers_in_fixed_queries(self):
+        """
+        Tests that each collection of the list has its artpiece count and
+        the thumbnails of its 4 latest artpieces, and that the list costs
+        the same number of queries for one or two collections.
+        """
+        other_user = CustomUser.objects.create_user(
+            email='other@test.com',
+            password='testpass'
+        )
+        ArtCollection.objects.create(owner=other_user, title='Other')
+
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(f'/api/collections/?owner={other_user.id}')
+        with CaptureQueriesContext(connection) as two:
+            response = self.client.get(
+                f'/api/collections/?owner={self.user.id}')
+
+        self.assertEqual(len(two), len(one))
+        collections = {
+            result['title']: result for result in response.data['results']}
+        self.assertEqual(collections['Large']['artpiece_count'], 10)
+        self.assertEqual(collections['Small']['artpiece_count'], 2)
+        covers = collections['Large']['cover_images']
+        self.assertEqual(len(covers), 4)
+        self.assertTrue(covers[0].endswith('/v1/piece9'))
+        self.assertIn('/c_fill,', covers[0])
+        self.assertNotIn('artpieces', collections['Large'])
+
+    def test_collection_artpieces_are_paginated(self):
+        """
+        Tests that the artpieces of a collection are listed newest first,
+        8 per page, following the cursor of the next link.
+        """
+        url = reverse('collection-artpieces', args=[self.large.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [result['title'] for result in response.data['results']]
+        self.assertEqual(titles[:2], ['Artpiece 9', 'Artpiece 8'])
+        self.assertEqual(len(titles), 8)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [result['title'] for result in response.data['results']],
+            ['Artpiece 1', 'Artpiece 0'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(
+            reverse('collection-artpieces', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
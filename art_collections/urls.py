@@ -13,6 +13,11 @@ urlpatterns = [
         views.ArtCollectionList.as_view(),
         name='collection-list'
         ),
+    path(
+        'collections/<int:pk>/artpieces/',
+        views.ArtCollectionArtpieceList.as_view(),
+        name='collection-artpieces'
+        ),
     path(
         'collections/<int:pk>/update-artpieces/',
         ArtCollectionUpdateArtpieces.as_view(),
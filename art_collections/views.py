@@ -2,12 +2,32 @@
 from rest_framework import generics, permissions, filters
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import transaction
+from django.db.models import Count, Q
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.exceptions import PermissionDenied
-from .serializers import ArtCollectionSerializer
+from .serializers import (
+    ArtCollectionArtpieceIdsSerializer, ArtCollectionSerializer)
 from viridian_api.permissions import IsOwnerOrReadOnly, IsOwner
 from .models import ArtCollection
 from artpieces.models import Artpiece
+from artpieces.search import refresh_search_documents
+from artpieces.serializers import ArtpieceSerializer
+from artpieces.views import ArtpieceViewerStateMixin
+from viridian_api.pagination import KeysetPagination
+
+
+def annotate_collections(queryset):
+    """
+    Joins the owner and owner's profile, and annotates the number of
+    artpieces of each collection, for `ArtCollectionSerializer`. The
+    default ordering is applied explicitly, as it is not used by
+    aggregating queries.
+    """
+    return queryset.select_related('owner__profile').annotate(
+        artpiece_count=Count('collection_artpieces')
+    ).order_by('-created_on')
 
 
 class ArtCollectionDetail(generics.RetrieveUpdateDestroyAPIView):
@@ -30,7 +50,7 @@ class ArtCollectionDetail(generics.RetrieveUpdateDestroyAPIView):
     """
     serializer_class = ArtCollectionSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = ArtCollection.objects.all()
+    queryset = annotate_collections(ArtCollection.objects.all())
 
 
 class ArtCollectionList(generics.ListCreateAPIView):
@@ -66,7 +86,7 @@ class ArtCollectionList(generics.ListCreateAPIView):
     """
     serializer_class = ArtCollectionSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = ArtCollection.objects.all()
+    queryset = annotate_collections(ArtCollection.objects.all())
     filter_backends = [
         DjangoFilterBackend,
         filters.OrderingFilter,
@@ -86,6 +106,34 @@ class ArtCollectionList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
+class ArtCollectionArtpieceList(ArtpieceViewerStateMixin,
+                                generics.ListAPIView):
+    """
+    API view listing the artpieces of an art collection, newest first.
+
+    Uses `ArtpieceSerializer` for serialization, and keyset pagination over
+    the (art_collection, created_on, id) index, so each page is a single
+    index range scan however large the collection.
+
+    Methods:
+        get_queryset: Returns the artpieces of the collection, or raises a
+        404 error if the collection does not exist.
+    """
+    serializer_class = ArtpieceSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        """
+        Returns the artpieces of the collection, with the state
+        `ArtpieceSerializer` needs, see `ArtpieceViewerStateMixin`.
+        """
+        collection = get_object_or_404(
+            ArtCollection.objects.only('pk'), pk=self.kwargs['pk'])
+        queryset = Artpiece.objects.filter(
+            art_collection=collection).order_by('-created_on')
+        return self.annotate_viewer_state(queryset)
+
+
 class ArtCollectionUpdateArtpieces(generics.GenericAPIView):
     """
     API view to bulk update the association of artpieces to an art collection.
@@ -111,56 +159,53 @@ class ArtCollectionUpdateArtpieces(generics.GenericAPIView):
         of artpiece IDs. Adds new artpieces to the collection and removes
         artpieces that are not in the provided list. Ensures art pieces to be
         added to the collection belongs to the user.
+
+        The artpieces are checked with a single query, then moved with two
+        UPDATE statements in one transaction, so the collection is either
+        fully updated or left unchanged. The search documents of the moved
+        artpieces, which include the collection title, are refreshed.
         """
-        collection_id = kwargs.get('pk')
-        new_artpiece_ids = request.data.get('artpiece_ids', [])
-
-        try:
-            art_collection = self.get_object()
-            existing_artpieces = Artpiece.objects.filter(
-                art_collection=collection_id)
-
-            # Remove artpieces that are no longer selected
-            for artpiece in existing_artpieces:
-                if artpiece.id not in new_artpiece_ids:
-                    artpiece_to_remove = Artpiece.objects.get(id=artpiece.id)
-                    artpiece_to_remove.remove_from_collection()
-
-            # Add artpieces that are not already in the collection
-            for artpiece_id in new_artpiece_ids:
-                try:
-                    artpiece_to_add = Artpiece.objects.get(id=artpiece_id)
-                    if artpiece_to_add.owner != request.user:
-                        raise PermissionDenied(
-                            detail="You can only add your own artpieces.")
-                    artpiece_to_add.add_to_collection(art_collection)
-                except Artpiece.DoesNotExist:
-                    # Handle case where artpiece doesn't exist
-                    return Response(
-                        {
-                            'detail':
-                            (f'Artpiece with ID {artpiece_id} not found.')
-                        }, status=status.HTTP_404_NOT_FOUND)
-
-            # Refresh the art collection instance
-            art_collection.refresh_from_db()
-
-            # Serialize and return the updated art collection
-            serializer = self.get_serializer(instance=art_collection)
-            return Response(serializer.data)
-
-        except ArtCollection.DoesNotExist:
+        art_collection = self.get_object()
+        ids_serializer = ArtCollectionArtpieceIdsSerializer(
+            data=request.data)
+        ids_serializer.is_valid(raise_exception=True)
+        new_artpiece_ids = set(ids_serializer.validated_data['artpiece_ids'])
+
+        # The selected artpieces and the ones currently in the collection
+        rows = list(Artpiece.objects.filter(
+            Q(pk__in=new_artpiece_ids) | Q(art_collection=art_collection)
+        ).values_list('pk', 'owner_id', 'art_collection_id'))
+        owners = {pk: owner_id for pk, owner_id, _ in rows}
+        current_ids = {
+            pk for pk, _, collection_id in rows
+            if collection_id == art_collection.pk}
+
+        missing_ids = sorted(new_artpiece_ids - owners.keys())
+        if missing_ids:
             return Response(
-                {'detail': 'Art collection not found.'},
+                {'detail': f'Artpiece with ID {missing_ids[0]} not found.'},
                 status=status.HTTP_404_NOT_FOUND
                 )
-        except Artpiece.DoesNotExist:
+        if any(owners[pk] != request.user.pk for pk in new_artpiece_ids):
             return Response(
-                {'detail': 'One or more artpieces not found.'},
-                status=status.HTTP_404_NOT_FOUND
-                )
-        except PermissionDenied as e:
-            return Response(
-                {'detail': str(e)},
+                {'detail': 'You can only add your own artpieces.'},
                 status=status.HTTP_403_FORBIDDEN
                 )
+
+        removed_ids = current_ids - new_artpiece_ids
+        added_ids = new_artpiece_ids - current_ids
+        if removed_ids or added_ids:
+            now = timezone.now()
+            with transaction.atomic():
+                Artpiece.objects.filter(pk__in=removed_ids).update(
+                    art_collection=None, updated_on=now)
+                Artpiece.objects.filter(
+                    pk__in=added_ids, owner=request.user).update(
+                    art_collection=art_collection, updated_on=now)
+                # update() does not send post_save to the search receivers
+                refresh_search_documents(Artpiece.objects.filter(
+                    pk__in=removed_ids | added_ids))
+
+        # Serialize and return the updated art collection
+        serializer = self.get_serializer(instance=art_collection)
+        return Response(serializer.data)
@@ -0,0 +1,202 @@
+import json
+from django.db import IntegrityError, transaction
+from images.metadata import set_image_metadata
+from images.pipeline import enqueue_image_uploads
+from images.placeholders import schedule_image_placeholder
+from images.uploads import RejectedUpload
+from profiles.models import adjust_profile_stats
+from .models import Artpiece, Hashtag
+from .search import refresh_search_documents
+from .serializers import ArtpieceSerializer
+
+MAX_BATCH_SIZE = 20
+TITLE_TAKEN_ERROR = 'artpiece with this title already exists.'
+
+
+def parse_batch(request):
+    """
+    Pairs the items of a batch create request with their image files.
+
+    The request has an `items` field, a list of artpiece objects (as JSON
+    text in multipart requests), and the image of the item at index i is
+    sent as the `image_<i>` file. Items can send an `image_upload` instead,
+    see `images.signed_uploads`. Files rejected by
+    `ImageSizeLimitUploadHandler` are kept as `RejectedUpload`, so their
+    items report the error.
+
+    Args:
+        request: The batch create request.
+
+    Returns:
+        list: The data of each item, including its image.
+
+    Raises:
+        ValueError: If `items` is not a list of objects, or is too long.
+    """
+    items = request.data.get('items')
+    if isinstance(items, str):
+        items = json.loads(items)
+    if not isinstance(items, list) or not items or not all(
+            isinstance(item, dict) for item in items):
+        raise ValueError('Expected a non-empty list of artpieces.')
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(
+            f'Ensure there are no more than {MAX_BATCH_SIZE} artpieces.')
+
+    rejected = getattr(request._request, 'rejected_uploads', {})
+    batch = []
+    for index, item in enumerate(items):
+        item = dict(item)
+        item.pop('image', None)
+        field_name = f'image_{index}'
+        if field_name in rejected:
+            item['image'] = RejectedUpload(rejected[field_name])
+        elif field_name in request.FILES:
+            item['image'] = request.FILES[field_name]
+        batch.append(item)
+    return batch
+
+
+def create_artpieces(batch, context):
+    """
+    Creates the valid artpieces of a batch.
+
+    Each item is validated with `ArtpieceSerializer`, and titles repeated
+    within the batch are rejected. The valid artpieces are then written with
+    a fixed number of queries: they are inserted with a single
+    `bulk_create`, counted in the owner's profile stats with a single
+    UPDATE, their hashtags attached with one insert per table, and their
+    images queued with a single insert, to be uploaded concurrently by the
+    image worker threads, see `images.pipeline`. An invalid item does not
+    prevent the others from being created. If another request takes a title
+    after the items are validated, the insert fails on the unique title,
+    and the write is retried without the items whose title was taken.
+
+    Args:
+        batch: The data of each item, see `parse_batch`.
+        context: The serializer context, with the request.
+
+    Returns:
+        list: For each item, in order, either the created Artpiece or a dict
+        of validation errors.
+    """
+    results = [None] * len(batch)
+    valid = []
+    titles = set()
+    for index, item in enumerate(batch):
+        serializer = ArtpieceSerializer(data=item, context=context)
+        if not serializer.is_valid():
+            results[index] = serializer.errors
+            continue
+        data = dict(serializer.validated_data)
+        if not data.get('image') and not data.get('image_upload'):
+            results[index] = {'image': ['This field is required.']}
+        elif data['title'] in titles:
+            results[index] = {'title': [
+                'This title is used by another artpiece of the batch.']}
+        else:
+            titles.add(data['title'])
+            valid.append((index, serializer, data))
+
+    owner = context['request'].user
+    while valid:
+        try:
+            artpieces = _write_artpieces(owner, valid)
+        except IntegrityError:
+            taken = set(Artpiece.objects.filter(
+                title__in=[data['title'] for _, _, data in valid]
+            ).values_list('title', flat=True))
+            if not taken:
+                raise
+            for index, _, data in valid:
+                if data['title'] in taken:
+                    results[index] = {'title': [TITLE_TAKEN_ERROR]}
+            valid = [item for item in valid if item[2]['title'] not in taken]
+        else:
+            for (index, _, _), artpiece in zip(valid, artpieces):
+                results[index] = artpiece
+            break
+    return results
+
+
+def _write_artpieces(owner, valid):
+    """
+    Inserts a batch of validated artpieces, with their hashtags, images,
+    search documents and profile stats, in one transaction.
+
+    Args:
+        owner: The user creating the artpieces.
+        valid: The index, serializer and validated data of each item.
+
+    Returns:
+        list: The created Artpiece instances, in the order of `valid`.
+
+    Raises:
+        IntegrityError: If a title was taken after the items were validated.
+    """
+    artpieces, images, signed, hashtags = [], [], [], []
+    for _, serializer, data in valid:
+        image = data.get('image')
+        signed_upload = data.get('image_upload')
+        artpiece = Artpiece(owner=owner, **{
+            name: value for name, value in data.items()
+            if name not in ('image', 'image_upload', 'hashtags')})
+        if signed_upload:
+            artpiece.image = signed_upload['url']
+            set_image_metadata(artpiece, signed_upload)
+            signed.append(artpiece)
+        else:
+            artpiece.image_status = 'processing'
+            images.append((artpiece, image))
+        artpieces.append(artpiece)
+        hashtags.append(
+            serializer._parse_hashtags(data.get('hashtags', '')))
+
+    with transaction.atomic():
+        Artpiece.objects.bulk_create(artpieces)
+        _add_hashtags(artpieces, hashtags)
+        if images:
+            enqueue_image_uploads(images, 'image')
+        for artpiece in signed:
+            schedule_image_placeholder(artpiece, 'image')
+        # bulk_create does not send post_save to the search and profile
+        # stats receivers
+        refresh_search_documents(Artpiece.objects.filter(
+            pk__in=[artpiece.pk for artpiece in artpieces]))
+        adjust_profile_stats(
+            owner.pk,
+            artpiece_count=len(artpieces),
+            for_sale_count=sum(
+                artpiece.for_sale == 1 for artpiece in artpieces))
+    return artpieces
+
+
+def _add_hashtags(artpieces, hashtags):
+    """
+    Attaches hashtags to a batch of new artpieces, creating the missing
+    hashtags and the through rows with one insert each.
+
+    The hashtags are locked once read, so the orphan cleanup of another
+    transaction cannot delete them before they are attached. A hashtag
+    deleted by the cleanup between the insert and the read is created again.
+
+    Args:
+        artpieces: The saved Artpiece instances.
+        hashtags: The list of hashtag names of each artpiece.
+    """
+    names = {name for names in hashtags for name in names}
+    if not names:
+        return
+    hashtag_ids = {}
+    while len(hashtag_ids) < len(names):
+        missing = names - hashtag_ids.keys()
+        Hashtag.objects.bulk_create(
+            [Hashtag(name=name) for name in missing], ignore_conflicts=True)
+        hashtag_ids.update(Hashtag.objects.select_for_update().filter(
+            name__in=missing).values_list('name', 'pk'))
+    Through = Artpiece.hashtags.through
+    Through.objects.bulk_create([
+        Through(artpiece_id=artpiece.pk, hashtag_id=hashtag_ids[name])
+        for artpiece, names in zip(artpieces, hashtags)
+        for name in set(names)
+    ])
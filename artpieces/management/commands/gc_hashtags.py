@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from artpieces.models import Hashtag
+
+
+class Command(BaseCommand):
+    """
+    Management command deleting orphaned hashtags, i.e. hashtags no longer
+    associated with any art piece.
+
+    Hashtags orphaned by editing or deleting an artpiece are cleaned up when
+    the transaction commits. This command catches the ones left by other
+    paths, such as artpieces deleted along with their owner, with a fixed
+    number of queries, and is meant to be run periodically.
+
+    Usage:
+        python manage.py gc_hashtags [--dry-run]
+    """
+    help = 'Deletes hashtags that are not associated with any artpiece.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report orphaned hashtags without deleting them.',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = Hashtag.objects.orphaned().count()
+            action = 'Found'
+        else:
+            count = Hashtag.objects.delete_orphans()
+            action = 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {count} orphaned hashtag(s).'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from artpieces.models import Artpiece
+from artpieces.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    """
+    Management command recomputing the search document of every artpiece
+    and rewriting the full-text index.
+
+    Usage:
+        python manage.py rebuild_search_index [--batch-size 500]
+    """
+    help = 'Rebuilds the artpiece full-text search index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of artpieces refreshed per batch.',
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index(Artpiece, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} artpiece(s).'))
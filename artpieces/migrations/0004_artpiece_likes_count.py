@@ -0,0 +1,38 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_likes_count(apps, schema_editor):
+    """ Sets likes_count on existing artpieces from the Like table. """
+    Artpiece = apps.get_model('artpieces', 'Artpiece')
+    Like = apps.get_model('likes', 'Like')
+    counts = Like.objects.filter(
+        liked_piece=OuterRef('pk')
+    ).order_by().values('liked_piece').annotate(
+        count=Count('pk')).values('count')
+    Artpiece.objects.update(likes_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artpieces', '0003_alter_artpiece_art_medium'),
+        ('likes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artpiece',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='artpiece',
+            index=models.Index(fields=['likes_count', 'id'], name='artpiece_likes_count_idx'),
+        ),
+        migrations.RunPython(
+            populate_likes_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artpieces', '0004_artpiece_likes_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artpiece',
+            index=models.Index(fields=['created_on', 'id'], name='artpiece_created_on_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:41
+
+from django.db import migrations, models
+from artpieces.search import get_search_backend, rebuild_search_index
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Creates the full-text index for the database in use and indexes the
+    existing artpieces.
+    """
+    get_search_backend(schema_editor.connection).create_index(schema_editor)
+    rebuild_search_index(apps.get_model('artpieces', 'Artpiece'))
+
+
+def drop_search_index(apps, schema_editor):
+    """ Drops the full-text index for the database in use. """
+    get_search_backend(schema_editor.connection).drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artpieces', '0005_keyset_pagination_indexes'),
+        ('art_collections', '0002_initial'),
+        ('profiles', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artpiece',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artpieces', '0006_artpiece_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artpiece',
+            name='image_status',
+            field=models.CharField(choices=[('ready', 'Ready'), ('processing', 'Processing'), ('failed', 'Failed')], default='ready', max_length=10),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artpieces', '0009_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artpiece',
+            index=models.Index(fields=['art_collection', 'created_on', 'id'], name='artpiece_collection_idx'),
+        ),
+    ]
@@ -1,12 +1,67 @@
-import re
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
 from django.core.validators import MaxLengthValidator
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from users.models import CustomUser
+from viridian_api.tracking import FieldTrackerMixin
 from cloudinary.models import CloudinaryField
-from cloudinary.uploader import destroy
 from art_collections.models import ArtCollection
+from images.models import IMAGE_STATUS_CHOICES
+from images.metadata import clear_image_metadata
+from images.outbox import schedule_image_deletion
+from .search import get_search_backend, refresh_search_documents
+
+
+class HashtagManager(models.Manager):
+    """
+    Manager for the Hashtag model, cleaning up orphaned hashtags (hashtags
+    no longer associated with any art piece) with set-based queries.
+
+    Methods:
+    - orphaned(pks=None): Returns the orphaned hashtags, optionally limited
+    to the given ids.
+    - delete_orphans(pks=None): Deletes the orphaned hashtags with a fixed
+    number of queries and returns the number deleted.
+    - schedule_orphan_cleanup(pks): Deletes the given hashtags, if orphaned,
+    once the current transaction commits.
+    """
+    def orphaned(self, pks=None):
+        """
+        Returns the hashtags without any art piece, optionally limited to the
+        hashtags with the given ids.
+        """
+        through = self.model.hashed_artpieces.through
+        queryset = self.get_queryset().filter(~Exists(
+            through.objects.filter(hashtag_id=OuterRef('pk'))))
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        return queryset
+
+    def delete_orphans(self, pks=None):
+        """
+        Deletes the orphaned hashtags, optionally limited to the hashtags with
+        the given ids, and returns the number of hashtags deleted.
+
+        The orphans are deleted through the regular queryset deletion, so
+        deletion signals are sent: the orphans are selected, then deleted
+        along with their (empty) through rows, with three queries however
+        many there are.
+        """
+        if pks is not None and not pks:
+            return 0
+        _, deleted = self.orphaned(pks).delete()
+        return deleted.get(self.model._meta.label, 0)
+
+    def schedule_orphan_cleanup(self, pks):
+        """
+        Deletes the hashtags with the given ids that are orphaned once the
+        current transaction commits (immediately in autocommit mode), so the
+        request does not pay for the cleanup.
+        """
+        pks = list(pks)
+        if pks:
+            transaction.on_commit(lambda: self.delete_orphans(pks))
 
 
 class Hashtag(models.Model):
@@ -20,6 +75,8 @@ class Hashtag(models.Model):
         ordering (list): Specifies that hashtag instances should be ordered by
         their name in ascending order.
 
+        objects (HashtagManager): The manager for the Hashtag model.
+
     Methods:
         __str__(): Returns the name of the hashtag.
     """
@@ -29,6 +86,8 @@ class Hashtag(models.Model):
         blank=False
         )
 
+    objects = HashtagManager()
+
     class Meta:
         ordering = ['name']
 
@@ -36,7 +95,7 @@ class Hashtag(models.Model):
         return self.name
 
 
-class Artpiece(models.Model):
+class Artpiece(FieldTrackerMixin, models.Model):
     """
     Represents an art piece in the platform.
 
@@ -52,6 +111,20 @@ class Artpiece(models.Model):
         - description (TextField): A brief description of the art piece.
         Optional, with a max length of 180 characters.
         - image (CloudinaryField): The image of the art piece. Mandatory field.
+        - image_status (CharField): Whether the image is ready, still being
+        uploaded to image storage, or failed to upload, see `images.pipeline`.
+        - image_public_id (CharField): The Cloudinary public id of the image.
+        - image_width (PositiveIntegerField): The width of the image in px.
+        - image_height (PositiveIntegerField): The height of the image in px.
+        - image_format (CharField): The file format of the image.
+        The image metadata are stored when the image is, and backfilled by the
+        `backfill_image_metadata` management command, see `images.metadata`.
+        - image_placeholder (TextField): A tiny blurred version of the image,
+        as a data URI, shown while the image loads.
+        - image_color (CharField): The dominant color of the image, as a hex
+        string. The placeholder and color are computed when the image is
+        stored, and backfilled by the `backfill_image_placeholders`
+        management command, see `images.placeholders`.
         - art_medium (CharField): The medium of the art piece, chosen from
         predefined choices.
         - for_sale (IntegerField): The sale status of the art piece, chosen
@@ -61,6 +134,17 @@ class Artpiece(models.Model):
         - hashtags (ManyToManyField): Optional many-to-many relationship with
         Hashtag. An art piece can have multiple hashtags, and a hashtag can be
         associated with multiple art pieces.
+        - likes_count (PositiveIntegerField): Denormalized number of likes on
+        the art piece. Kept up to date when likes are created or deleted, and
+        repaired by the `reconcile_like_counts` management command.
+        - search_document (TextField): Text indexed for full-text search: the
+        title, owner's profile name, hashtags and collection title. Kept up to
+        date by signal receivers, see `artpieces.search`.
+        - tracked_fields (tuple): Fields whose database values are remembered,
+        see FieldTrackerMixin.
+        - derived_fields (tuple): Fields written by UPDATE statements of their
+        own, left out of full saves so stale loaded values never overwrite
+        them.
 
     Choices:
         FOR_SALE_CHOICES: Defines the sale status of the art piece.
@@ -83,6 +167,10 @@ class Artpiece(models.Model):
     Meta:
         ordering (list): Specifies the default ordering of the Artpiece
         objects. Ordered by creation date in descending order.
+        indexes (list): Indexes on likes_count and created_on (with id as
+        tie-breaker) so ordering and keyset pagination by popularity or date
+        are index scans, and on art_collection and created_on for paginating
+        through the artpieces of a collection.
 
     Methods:
         __str__: Returns a string representation of the Artpiece instance,
@@ -91,10 +179,14 @@ class Artpiece(models.Model):
         not already added.
         remove_from_collection: Removes the art piece from its current
         collection.
-        save: Deletes the old image from Cloudinary if a new image has been
-        added
-        delete: Deletes the image from Cloudinary before deleting the artpiece
+        save: Records the old image for deletion from Cloudinary if a new
+        image has been added, and leaves the derived fields out of updates
+        delete: Records the image for deletion from Cloudinary before deleting
+        the artpiece
     """
+    tracked_fields = ('image', 'image_public_id', 'for_sale')
+    derived_fields = ('likes_count', 'search_document')
+
     FOR_SALE_CHOICES = [
         (0, 'Not for sale'),
         (1, 'For sale'),
@@ -128,6 +220,16 @@ class Artpiece(models.Model):
         'image',
         blank=False,
         null=False)
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        default='ready')
+    image_public_id = models.CharField(max_length=255, blank=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_format = models.CharField(max_length=10, blank=True)
+    image_placeholder = models.TextField(blank=True)
+    image_color = models.CharField(max_length=7, blank=True)
     art_medium = models.CharField(
         max_length=30,
         choices=ART_MEDIUM_CHOICES,
@@ -144,9 +246,25 @@ class Artpiece(models.Model):
         Hashtag,
         related_name='hashed_artpieces',
         blank=True)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    search_document = models.TextField(
+        blank=True,
+        default='',
+        editable=False)
 
     class Meta:
         ordering = ['-created_on']
+        indexes = [
+            models.Index(
+                fields=['likes_count', 'id'],
+                name='artpiece_likes_count_idx'),
+            models.Index(
+                fields=['created_on', 'id'],
+                name='artpiece_created_on_idx'),
+            models.Index(
+                fields=['art_collection', 'created_on', 'id'],
+                name='artpiece_collection_idx'),
+        ]
 
     def __str__(self):
         return f'{self.id} {self.title}'
@@ -169,79 +287,155 @@ class Artpiece(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        Overrides the save method to handle image updates by deleting the old
-        image from Cloudinary.
-        """
-        old_image = None
-        if self.pk:
-            old_image = Artpiece.objects.get(pk=self.pk).image
+        Overrides the save method to handle image updates by recording the
+        old image for deletion from Cloudinary, see `images.outbox`.
 
-        super().save(*args, **kwargs)
+        The old image is known from the tracked field values, so no query is
+        made, and the check is skipped when `update_fields` excludes the
+        image. A new image assigned without its metadata clears the metadata
+        of the old one.
 
-        if old_image and old_image != self.image:
-            # Check if the old image is not the default image
-            match = re.search(r'/([^/]+)$', old_image.url)
-            if match:
-                public_id = match.group(1).split('.')[0]
-                destroy(public_id)
+        Saving an existing artpiece without `update_fields` updates every
+        field except the `derived_fields`, so a like counted since the
+        artpiece was loaded is not undone.
+        """
+        old_image = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding \
+                and not kwargs.get('force_insert'):
+            update_fields = kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.derived_fields]
+        if self.pk and (update_fields is None or 'image' in update_fields) \
+                and self.has_changed('image'):
+            old_image = self.get_original_value('image')
+            old_public_id = self.get_original_value('image_public_id')
+            if not self.has_changed('image_public_id'):
+                kwargs['update_fields'] = clear_image_metadata(
+                    self, update_fields)
+
+        # The old image is recorded for deletion only if the save commits
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_image:
+                schedule_image_deletion(old_image, public_id=old_public_id)
 
     def delete(self, *args, **kwargs):
         """
-        Deletes the art piece's associated image from Cloudinary before
-        deleting the artpiece instance.
+        Records the art piece's associated image for deletion from
+        Cloudinary and deletes the artpiece instance, in one transaction.
 
-        Deletes any hashtags associated to the artpiece instance that are
-        orphaned after deletion.
+        Schedules the deletion of any hashtags associated to the artpiece
+        instance that are orphaned after deletion, once the transaction
+        commits.
         """
-        if self.image:
-            # Regular expression to extract public_id from image url
-            match = re.search(r'/([^/]+)$', self.image.url)
-            if match:
-                public_id = match.group(1)
-                destroy(public_id)
-
-        # Save hashtag id's before deleting artpiece
+        # Read the hashtag ids before the through rows are deleted
         hashtag_ids = list(self.hashtags.values_list('pk', flat=True))
 
-        # Delete the Artpiece instance
-        super().delete(*args, **kwargs)
+        # The image is recorded for deletion only if the delete commits
+        with transaction.atomic():
+            if self.image:
+                schedule_image_deletion(
+                    self.image, public_id=self.image_public_id)
 
-        # Check and delete orphaned hashtags
-        for hashtag_id in hashtag_ids:
-            hashtag = Hashtag.objects.get(pk=hashtag_id)
-            if hashtag.hashed_artpieces.count() == 0:
-                hashtag.delete()
+            # Delete the Artpiece instance
+            result = super().delete(*args, **kwargs)
+            Hashtag.objects.schedule_orphan_cleanup(hashtag_ids)
+        return result
 
 
 @receiver(m2m_changed, sender=Artpiece.hashtags.through)
 def check_hashtags(sender, instance, action, reverse, pk_set, **kwargs):
     """
-    Signal handler delete unused hashtags when an Artpiece instance's hashtags
-    field is updated.
+    Signal handler deleting unused hashtags when an Artpiece instance's
+    hashtags field is updated.
 
     This function listens to the `m2m_changed` signal for the `hashtags`
-    ManyToManyField on the `Artpiece` model. If a hashtag is about to be
-    removed from an artpiece, and is not associated with any other artpieces,
-    it is deleted from the database.
+    ManyToManyField on the `Artpiece` model. When hashtags are removed from
+    (or cleared off) an artpiece, the ones no longer associated with any
+    artpiece are deleted in a single query once the transaction commits.
+    Orphans left by other paths (e.g. artpieces deleted along with their
+    owner) are removed by the `gc_hashtags` management command.
 
     Args:
         sender (Model): The model class that sent the signal (Artpiece).
         instance (Artpiece): The instance of the Artpiece being modified.
-        action (str): The type of modification being made - "pre_remove" and
-        "pre_clear" actions.
-        reverse (bool): A flag indicating the direction of the relation.
+        action (str): The type of modification being made - "post_remove"
+        and "pre_clear" actions.
+        reverse (bool): A flag indicating the direction of the relation. Only
+        changes made from the Artpiece side are handled.
         pk_set (set): A set of primary key values for the related hashtag
         objects.
         **kwargs: Additional keyword arguments.
+    """
+    if reverse:
+        return
+    if action == "post_remove":
+        Hashtag.objects.schedule_orphan_cleanup(pk_set)
+    elif action == "pre_clear":
+        Hashtag.objects.schedule_orphan_cleanup(
+            instance.hashtags.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Artpiece)
+def refresh_artpiece_search_document(sender, instance, update_fields,
+                                     **kwargs):
+    """
+    Signal handler refreshing the search document of a saved Artpiece,
+    unless the save was restricted to fields that are not indexed.
+    """
+    indexed_fields = {'title', 'owner', 'art_collection'}
+    if update_fields is not None and not indexed_fields & set(update_fields):
+        return
+    refresh_search_documents(Artpiece.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Artpiece.hashtags.through)
+def refresh_hashtag_search_documents(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    """
+    Signal handler refreshing search documents after the hashtags of an
+    Artpiece (or the artpieces of a Hashtag) have changed.
+    """
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+    if not reverse:
+        refresh_search_documents(Artpiece.objects.filter(pk=instance.pk))
+    elif pk_set:
+        refresh_search_documents(Artpiece.objects.filter(pk__in=pk_set))
 
-    Credit: https://stackoverflow.com/questions/10609699/\
-        efficiently-delete-orphaned-m2m-objects-tags-in-django
-    """
-    if action in ["pre_remove", "pre_clear"]:
-        if action == "pre_clear":
-            pk_set = set(instance.hashtags.values_list('pk', flat=True))
-        for hashtag_id in pk_set:
-            hashtag = Hashtag.objects.get(pk=hashtag_id)
-            # checks if the hashtag is orphaned and deletes it
-            if hashtag.hashed_artpieces.count() == 1:
-                hashtag.delete()
+
+@receiver(post_delete, sender=Artpiece)
+def remove_artpiece_from_search_index(sender, instance, **kwargs):
+    """ Signal handler removing a deleted Artpiece from the search index. """
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender='profiles.Profile')
+def refresh_owner_search_documents(sender, instance, created, update_fields,
+                                   **kwargs):
+    """
+    Signal handler refreshing the search documents of a profile owner's
+    artpieces when the name of the profile has changed.
+    """
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    if not instance.has_changed('name'):
+        return
+    refresh_search_documents(
+        Artpiece.objects.filter(owner_id=instance.owner_id))
+
+
+@receiver(post_save, sender=ArtCollection)
+def refresh_collection_search_documents(sender, instance, created,
+                                        update_fields, **kwargs):
+    """
+    Signal handler refreshing the search documents of a collection's
+    artpieces when the collection (and possibly its title) has been updated.
+    """
+    if created or (
+            update_fields is not None and 'title' not in update_fields):
+        return
+    refresh_search_documents(
+        Artpiece.objects.filter(art_collection=instance))
@@ -0,0 +1,254 @@
+import re
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+SEARCH_VECTOR_COLUMN = 'search_vector'
+SEARCH_VECTOR_INDEX = 'artpiece_search_vector_idx'
+FTS_TABLE = 'artpieces_artpiece_fts'
+MAX_SEARCH_TERMS = 10
+
+
+def build_search_document(artpiece):
+    """
+    Returns the text indexed for an artpiece: its title, the owner's profile
+    name, its hashtags and the title of its collection.
+
+    Args:
+        artpiece: The Artpiece instance, ideally with `owner__profile` and
+        `art_collection` selected and `hashtags` prefetched.
+
+    Returns:
+        str: The search document.
+    """
+    parts = [artpiece.title]
+    profile = getattr(artpiece.owner, 'profile', None)
+    if profile is not None:
+        parts.append(profile.name)
+    parts.extend(hashtag.name for hashtag in artpiece.hashtags.all())
+    if artpiece.art_collection is not None:
+        parts.append(artpiece.art_collection.title)
+    return ' '.join(part for part in parts if part)
+
+
+def refresh_search_documents(queryset):
+    """
+    Recomputes and stores the search documents of the artpieces in the
+    queryset, and updates the full-text index.
+
+    Args:
+        queryset: A queryset of Artpiece instances.
+    """
+    artpieces = list(
+        queryset.select_related('owner__profile', 'art_collection')
+        .prefetch_related('hashtags')
+    )
+    if not artpieces:
+        return
+    for artpiece in artpieces:
+        artpiece.search_document = build_search_document(artpiece)
+    queryset.model.objects.bulk_update(artpieces, ['search_document'])
+    get_search_backend().index(artpieces)
+
+
+def rebuild_search_index(model, batch_size=500):
+    """
+    Refreshes the search documents of every artpiece, in batches.
+
+    Args:
+        model: The Artpiece model class.
+        batch_size: The number of artpieces refreshed per batch.
+
+    Returns:
+        int: The number of artpieces refreshed.
+    """
+    ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        refresh_search_documents(
+            model.objects.filter(pk__in=ids[start:start + batch_size]))
+    return len(ids)
+
+
+def get_search_terms(text):
+    """
+    Splits a search string into at most MAX_SEARCH_TERMS word tokens, so
+    that the terms can be safely embedded in full-text query syntax.
+    """
+    return re.findall(r'\w+', text or '')[:MAX_SEARCH_TERMS]
+
+
+class BaseSearchBackend:
+    """
+    Search backend for databases without full-text support. Matches every
+    term against the stored search document with `icontains`, which is a
+    single column scan without joins.
+
+    Methods:
+        create_index: Creates the database structures backing the index.
+        drop_index: Drops the database structures backing the index.
+        index: Writes the search documents of artpieces to the index.
+        remove: Removes artpieces from the index.
+        filter: Filters a queryset to the artpieces matching all terms and
+        annotates a `search_rank` (higher is better).
+    """
+    def create_index(self, schema_editor):
+        pass
+
+    def drop_index(self, schema_editor):
+        pass
+
+    def index(self, artpieces):
+        pass
+
+    def remove(self, ids):
+        pass
+
+    def filter(self, queryset, terms):
+        condition = Q()
+        for term in terms:
+            condition &= Q(search_document__icontains=term)
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField()))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Search backend for PostgreSQL. The index is a generated `tsvector`
+    column over the search document with a GIN index, so PostgreSQL keeps it
+    up to date itself. Results are ranked with `ts_rank`, and every term is
+    matched as a prefix so results update as the user types.
+    """
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f'ALTER TABLE artpieces_artpiece ADD COLUMN {SEARCH_VECTOR_COLUMN}'
+            " tsvector GENERATED ALWAYS AS (to_tsvector('simple', "
+            "coalesce(search_document, ''))) STORED")
+        schema_editor.execute(
+            f'CREATE INDEX {SEARCH_VECTOR_INDEX} ON artpieces_artpiece '
+            f'USING GIN ({SEARCH_VECTOR_COLUMN})')
+
+    def drop_index(self, schema_editor):
+        schema_editor.execute(
+            'ALTER TABLE artpieces_artpiece '
+            f'DROP COLUMN {SEARCH_VECTOR_COLUMN}')
+
+    def filter(self, queryset, terms):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        column = f'"artpieces_artpiece"."{SEARCH_VECTOR_COLUMN}"'
+        return queryset.filter(RawSQL(
+            f"{column} @@ to_tsquery('simple', %s)",
+            [tsquery],
+            output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f"ts_rank({column}, to_tsquery('simple', %s))",
+            [tsquery],
+            output_field=FloatField(),
+        ))
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    Search backend for SQLite (used in DEV). The index is an FTS5 virtual
+    table keyed by artpiece id, written whenever search documents are
+    refreshed. Results are ranked with `bm25`, and every term is matched as
+    a prefix.
+    """
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+            "search_document, tokenize='unicode61 remove_diacritics 2')")
+
+    def drop_index(self, schema_editor):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def index(self, artpieces):
+        ids = [artpiece.pk for artpiece in artpieces]
+        self.remove(ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, search_document) '
+                'VALUES (%s, %s)',
+                [(artpiece.pk, artpiece.search_document)
+                 for artpiece in artpieces])
+
+    def remove(self, ids):
+        if not ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+                list(ids))
+
+    def filter(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(RawSQL(
+            f'"artpieces_artpiece"."id" IN (SELECT rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s)',
+            [match],
+            output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f'(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} '
+            'MATCH %s AND rowid = "artpieces_artpiece"."id")',
+            [match],
+            output_field=FloatField(),
+        ))
+
+
+def get_search_backend(using=None):
+    """
+    Returns the search backend for the database vendor in use.
+
+    Args:
+        using: An optional database connection, defaults to the default
+        connection.
+    """
+    vendor = (using or connection).vendor
+    if vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    return BaseSearchBackend()
+
+
+class RankedSearchFilter(filters.SearchFilter):
+    """
+    Base search filter matching every search term with a custom search
+    instead of `icontains` lookups, ordered by relevance unless the request
+    specifies an ordering.
+
+    Methods:
+        search: Filters a queryset to the matches of the search terms, and
+        annotates their `search_rank` (higher is better). Implemented by
+        subclasses.
+    """
+    def search(self, queryset, terms):
+        raise NotImplementedError
+
+    def filter_queryset(self, request, queryset, view):
+        terms = get_search_terms(
+            request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+
+        # An ordering set by OrderingFilter, or the model's, breaks ties
+        ordering = [
+            field for field in queryset.query.order_by
+            if isinstance(field, str)
+        ] or list(queryset.model._meta.ordering)
+        queryset = self.search(queryset, terms)
+        return queryset.order_by('-search_rank', *ordering)
+
+
+class ArtpieceSearchFilter(RankedSearchFilter):
+    """
+    Search filter for artpieces backed by the full-text index instead of
+    `icontains` lookups across joined tables.
+
+    Matches artpieces whose title, owner's profile name, hashtags or
+    collection title contain every search term (as a prefix), ordered by
+    relevance unless the request specifies an ordering.
+    """
+    def search(self, queryset, terms):
+        return get_search_backend().filter(queryset, terms)
@@ -2,7 +2,12 @@ import re
 from rest_framework import serializers
 from .models import Artpiece, Hashtag
 from likes.models import Like
-import cloudinary.uploader
+from images.metadata import set_image_metadata
+from images.pipeline import enqueue_image_upload
+from images.placeholders import schedule_image_placeholder
+from images.signed_uploads import SignedUploadField
+from images.uploads import ImageUploadField
+from images.variants import get_image_variants, get_thumbnail_url
 
 
 class HashtagSerializer(serializers.ModelSerializer):
@@ -31,14 +36,26 @@ class ArtpieceSerializer(serializers.ModelSerializer):
         - is_owner: Boolean indicating if the request user is the owner.
         - profile_id: ID of the owner's profile (read-only).
         - profile_name: The name as specified in the owner's profile.
-        - profile_image: URL of the owner's profile image (read-only).
+        - profile_image: URL of the owner's profile image thumbnail
+        (read-only).
         - created_on: Time and date when the art piece was created (read-only).
         - updated_on: Time and date when the art piece was last updated
         (read-only).
         - title: Title of the art piece.
         - description: Description of the art piece.
         - image: Image of the art piece (write-only).
+        - image_upload: Result of a direct upload to Cloudinary, used instead
+        of `image` (write-only), see `images.signed_uploads`.
         - image_url: URL of the image.
+        - image_variants: URLs of the thumb, card and full size variants of
+        the image (read-only), see `images.variants`.
+        - image_status: Whether the image is ready, still being uploaded, or
+        failed to upload (read-only).
+        - image_width: Width of the image in px, if known (read-only).
+        - image_height: Height of the image in px, if known (read-only).
+        - image_placeholder: Tiny blurred version of the image as a data URI,
+        if computed (read-only).
+        - image_color: Dominant color of the image, if computed (read-only).
         - art_medium: Medium used for the art piece.
         - for_sale: Sale status of the art piece.
         - art_collection: Collection to which the art piece belongs.
@@ -56,7 +73,10 @@ class ArtpieceSerializer(serializers.ModelSerializer):
             art piece.
         - get_like_id: Returns the like ID if the requesting user has liked the
         artpiece.
+        - get_profile_image: Returns the URL of the owner's profile image
+        thumbnail.
         - get_image_url: Returns the URL of the art piece's image.
+        - get_image_variants: Returns the URLs of the image variants.
         - create: Handles creation of a new Artpiece instance.
         - update: Handles updating an existing Artpiece instance.
         - _create_or_update_hashtags: Adds or updates hashtags associated with
@@ -69,10 +89,16 @@ class ArtpieceSerializer(serializers.ModelSerializer):
     is_owner = serializers.SerializerMethodField()
     profile_name = serializers.ReadOnlyField(source='owner.profile.name')
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(
-        source='owner.profile.profile_image.url')
+    profile_image = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
-    image = serializers.ImageField(write_only=True, required=False)
+    image_variants = serializers.SerializerMethodField()
+    image = ImageUploadField(write_only=True, required=False)
+    image_upload = SignedUploadField(write_only=True, required=False)
+    image_status = serializers.ReadOnlyField()
+    image_width = serializers.ReadOnlyField()
+    image_height = serializers.ReadOnlyField()
+    image_placeholder = serializers.ReadOnlyField()
+    image_color = serializers.ReadOnlyField()
     hashtags = serializers.CharField(write_only=True, required=False)
     likes_count = serializers.ReadOnlyField()
     like_id = serializers.SerializerMethodField()
@@ -80,8 +106,7 @@ class ArtpieceSerializer(serializers.ModelSerializer):
     def validate_image(self, data):
         """
         Validates the image field - ensures the image is provided when creating
-        a new instance. Checks that the size does not exceed 2MB and dimensions
-        are within 2000x2000px.
+        a new instance. Size and dimensions are validated by ImageUploadField.
 
         Args:
             data: The image data to be validated.
@@ -91,23 +116,13 @@ class ArtpieceSerializer(serializers.ModelSerializer):
 
         Raises:
             serializers.ValidationError: If the image is not provided for a new
-            instance, or if the image size or dimensions exceed the specified
-            limits.
+            instance.
         """
         if not data:  # No image provided
             if not self.instance:  # Creating new instance
                 raise serializers.ValidationError('Image is required.')
             return data  # If updating artpiece, keep existing image
 
-        if data.size > 2 * 1024 * 1024:
-            raise serializers.ValidationError('Image size larger than 2MB!')
-        if data.image.height > 2000:
-            raise serializers.ValidationError(
-                'Image height larger than 2000px!')
-        if data.image.width > 2000:
-            raise serializers.ValidationError(
-                'Image width larger than 2000px!')
-
         return data
 
     def validate_hashtags(self, value):
@@ -161,7 +176,8 @@ class ArtpieceSerializer(serializers.ModelSerializer):
     def get_like_id(self, obj):
         """
         Returns the id of the 'like' object if the requesting user owns a
-        'like' associated to the artpiece.
+        'like' associated to the artpiece. Uses the `like_id` annotation when
+        the view has provided one, to avoid a query per artpiece.
 
         Args:
             obj: The Artpiece instance.
@@ -169,6 +185,9 @@ class ArtpieceSerializer(serializers.ModelSerializer):
         Returns:
             integer: The ID of the 'like' object (or None).
         """
+        if hasattr(obj, 'like_id'):
+            # Annotated by ArtpieceViewerStateMixin
+            return obj.like_id
         user = self.context['request'].user
         if user.is_authenticated:
             like = Like.objects.filter(
@@ -191,10 +210,32 @@ class ArtpieceSerializer(serializers.ModelSerializer):
             return obj.image
         return obj.image.url
 
+    def get_image_variants(self, obj):
+        """
+        Returns the URLs of the thumb, card and full size variants of the art
+        piece's image, built without calling Cloudinary.
+
+        Args:
+            obj: The Artpiece instance.
+
+        Returns:
+            dict: The URL of each variant.
+        """
+        return get_image_variants(obj.image, obj.image_public_id)
+
+    def get_profile_image(self, obj):
+        """ Returns the URL of the owner's profile image thumbnail. """
+        profile = obj.owner.profile
+        return get_thumbnail_url(
+            profile.profile_image, profile.image_public_id)
+
     def create(self, validated_data):
         """
-        Handles creation of a new Artpiece instance. Processes the image upload
-        and associates hashtags with the new art piece.
+        Handles creation of a new Artpiece instance. Uses the image uploaded
+        directly to Cloudinary, or queues the uploaded image file, and
+        associates hashtags with the new art piece. With an image file, the
+        art piece is created in the 'processing' image status until the image
+        has been stored, see `images.pipeline`.
 
         Args:
             validated_data: The validated data for the new Artpiece instance.
@@ -208,21 +249,29 @@ class ArtpieceSerializer(serializers.ModelSerializer):
         hashtags_str = validated_data.pop('hashtags', '')
         hashtags_list = self._parse_hashtags(hashtags_str)
         image = validated_data.pop('image', None)
+        signed_upload = validated_data.pop('image_upload', None)
 
-        if not image:
+        if not image and not signed_upload:
             raise serializers.ValidationError(
                 {'image': 'This field is required.'})
 
-        upload_data = cloudinary.uploader.upload(image)
-        validated_data['image'] = upload_data['secure_url']
-        artpiece = Artpiece.objects.create(**validated_data)
+        if signed_upload:
+            artpiece = Artpiece(image=signed_upload['url'], **validated_data)
+            set_image_metadata(artpiece, signed_upload)
+            artpiece.save()
+            schedule_image_placeholder(artpiece, 'image')
+        else:
+            artpiece = Artpiece.objects.create(
+                image_status='processing', **validated_data)
+            enqueue_image_upload(artpiece, 'image', image)
         self._create_or_update_hashtags(artpiece, hashtags_list)
         return artpiece
 
     def update(self, instance, validated_data):
         """
-        Handles updating an existing Artpiece instance. Processes the image
-        upload and updates hashtags associated with the art piece.
+        Handles updating an existing Artpiece instance. Queues the image
+        upload, if any, and updates hashtags associated with the art piece.
+        The current image is kept until the new one has been stored.
 
         Args:
             instance: The existing Artpiece instance to be updated.
@@ -234,9 +283,12 @@ class ArtpieceSerializer(serializers.ModelSerializer):
         hashtags_str = validated_data.pop('hashtags', '')
         hashtags_list = self._parse_hashtags(hashtags_str)
         image = validated_data.pop('image', None)
-        if image:
-            upload_data = cloudinary.uploader.upload(image)
-            instance.image = upload_data['secure_url']
+        signed_upload = validated_data.pop('image_upload', None)
+        if signed_upload:
+            instance.image = signed_upload['url']
+            set_image_metadata(instance, signed_upload)
+        elif image:
+            instance.image_status = 'processing'
         instance.title = validated_data.get('title', instance.title)
         instance.description = validated_data.get(
             'description', instance.description
@@ -249,6 +301,10 @@ class ArtpieceSerializer(serializers.ModelSerializer):
             'art_collection_id', instance.art_collection_id
             )
         instance.save()
+        if image and not signed_upload:
+            enqueue_image_upload(instance, 'image', image)
+        elif signed_upload:
+            schedule_image_placeholder(instance, 'image')
         self._create_or_update_hashtags(instance, hashtags_list)
         return instance
 
@@ -256,14 +312,30 @@ class ArtpieceSerializer(serializers.ModelSerializer):
         """
         Adds or updates hashtags associated with an art piece.
 
+        Only the difference between the current and the new hashtags is
+        written: missing hashtags are created with a single bulk insert, and
+        the through rows are added and removed in bulk, so the number of
+        queries does not depend on the number of hashtags.
+
         Args:
             artpiece: The Artpiece instance.
             hashtags_list: The list of hashtags to associate with the art piece
         """
-        artpiece.hashtags.clear()
-        for tag_name in hashtags_list:
-            hashtag, created = Hashtag.objects.get_or_create(name=tag_name)
-            artpiece.hashtags.add(hashtag)
+        wanted = set(hashtags_list)
+        current = dict(artpiece.hashtags.values_list('name', 'pk'))
+
+        removed_ids = [
+            pk for name, pk in current.items() if name not in wanted]
+        if removed_ids:
+            artpiece.hashtags.remove(*removed_ids)
+
+        added_names = wanted - current.keys()
+        if added_names:
+            Hashtag.objects.bulk_create(
+                [Hashtag(name=name) for name in added_names],
+                ignore_conflicts=True)
+            artpiece.hashtags.add(*Hashtag.objects.filter(
+                name__in=added_names).values_list('pk', flat=True))
 
     def _parse_hashtags(self, hashtags_str):
         """
@@ -299,6 +371,8 @@ class ArtpieceSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'owner', 'is_owner', 'profile_id', 'profile_name',
             'profile_image', 'created_on', 'updated_on',
-            'title', 'description', 'image', 'image_url', 'art_medium',
+            'title', 'description', 'image', 'image_upload', 'image_url',
+            'image_variants', 'image_status', 'image_width', 'image_height',
+            'image_placeholder', 'image_color', 'art_medium',
             'for_sale', 'art_collection', 'hashtags', 'likes_count', 'like_id',
         ]
@@ -1,5 +1,22 @@
+import json
+from base64 import b64encode
+import shutil
+import tempfile
+from io import StringIO
 from unittest.mock import patch
+from urllib.parse import urlencode
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, models
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from users.models import CustomUser
+from likes.models import Like
+from likes.trending import refresh_trending_leaderboard
+from art_collections.models import ArtCollection
+from images.models import ImageDeletion, ImageUpload
+from . import batch
 from .models import Artpiece, Hashtag
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -150,11 +167,12 @@ class ArtpieceDetailTests(APITestCase):
             'title': 'a new title',
             'hashtags': '#hashtag2 #hashtag3',
         }
-        response = self.client.put(
-            f'/api/artpieces/{self.test_artpiece.id}/',
-            data,
-            format='multipart'
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f'/api/artpieces/{self.test_artpiece.id}/',
+                data,
+                format='multipart'
+            )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.test_artpiece.refresh_from_db()
         updated_hashtags = set(
@@ -163,6 +181,39 @@ class ArtpieceDetailTests(APITestCase):
         self.assertEqual(updated_hashtags, expected_hashtags)
         self.assertFalse(Hashtag.objects.filter(name='hashtag1').exists())
 
+    def test_hashtag_update_query_count_does_not_grow_with_hashtags(self):
+        """
+        Tests that replacing hashtags costs the same number of queries for 2
+        and for 10 hashtags, and that unchanged hashtags cost no writes.
+        """
+        self.client.login(
+            email='test@test.com',
+            password='testpass')
+        url = f'/api/artpieces/{self.test_artpiece.id}/'
+
+        def put_hashtags(hashtags):
+            with self.captureOnCommitCallbacks(execute=True), \
+                    CaptureQueriesContext(connection) as context:
+                response = self.client.put(
+                    url,
+                    {'title': 'test title', 'hashtags': hashtags},
+                    format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+
+        few_queries = put_hashtags('#hashtag3 #hashtag4')
+        many_queries = put_hashtags(
+            ' '.join(f'#tag{i}' for i in range(10)))
+        unchanged_queries = put_hashtags(
+            ' '.join(f'#tag{i}' for i in range(10)))
+
+        self.assertEqual(few_queries, many_queries)
+        self.assertLess(unchanged_queries, many_queries)
+        self.assertEqual(
+            set(self.test_artpiece.hashtags.values_list('name', flat=True)),
+            {f'tag{i}' for i in range(10)})
+        self.assertEqual(Hashtag.objects.count(), 10)
+
     def test_can_delete_artpiece(self):
         """
         Tests that a logged in user can delete an artpiece.
@@ -175,9 +226,632 @@ class ArtpieceDetailTests(APITestCase):
             email='test@test.com',
             password='testpass')
 
-        response = self.client.delete(
-            f'/api/artpieces/{self.test_artpiece.id}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                f'/api/artpieces/{self.test_artpiece.id}/')
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertTrue(self.test_artpiece.DoesNotExist)
         self.assertEqual(Hashtag.objects.count(), 0)
+
+    def test_saving_stale_artpiece_keeps_likes_count(self):
+        """
+        Tests that saving an artpiece loaded before it was liked does not
+        overwrite its likes_count.
+        """
+        artpiece = Artpiece.objects.get(pk=self.test_artpiece.pk)
+        CustomUser.objects.create_user(
+            email='liker@test.com', password='testpass')
+        self.client.login(email='liker@test.com', password='testpass')
+        response = self.client.post(
+            '/api/likes/', {'liked_piece': artpiece.pk})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        artpiece.description = 'edited'
+        artpiece.save()
+        artpiece.remove_from_collection()
+
+        self.test_artpiece.refresh_from_db()
+        self.assertEqual(self.test_artpiece.description, 'edited')
+        self.assertEqual(self.test_artpiece.likes_count, 1)
+
+    def test_orphaned_hashtags_are_deleted_on_commit(self):
+        """
+        Tests that hashtags orphaned by a hashtag update are only deleted
+        once the transaction commits, and that a hashtag still used by
+        another artpiece is kept.
+        """
+        other_artpiece = Artpiece.objects.create(
+            owner=self.test_user, title='other title')
+        other_artpiece.hashtags.add(Hashtag.objects.get(name='hashtag2'))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.test_artpiece.hashtags.clear()
+        self.assertEqual(Hashtag.objects.count(), 2)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            list(Hashtag.objects.values_list('name', flat=True)),
+            ['hashtag2'])
+
+
+class ArtpieceImageTrackingTests(APITestCase):
+    """
+    Test suite for detecting image changes on save without reading the
+    artpiece again.
+    """
+
+    def setUp(self):
+        """
+        Set up an artpiece with a Cloudinary image url, loaded from the
+        database.
+        """
+        artpiece = Artpiece.objects.create(
+            owner=CustomUser.objects.create_user(
+                email='test@test.com', password='testpass'),
+            title='test title',
+            image='https://res.cloudinary.com/demo/image/upload/v1/old.jpg')
+        self.artpiece = Artpiece.objects.get(pk=artpiece.pk)
+
+    def test_save_without_image_change_makes_no_extra_query(self):
+        """
+        Asserts saving a loaded artpiece with an unchanged image does not
+        fetch the artpiece again (with `.get()`) or delete the image.
+        """
+        self.artpiece.title = 'new title'
+        with CaptureQueriesContext(connection) as context:
+            self.artpiece.save()
+        self.assertFalse(ImageDeletion.objects.exists())
+        self.assertFalse(any(
+            query['sql'].endswith('LIMIT 21')
+            for query in context.captured_queries))
+
+    def test_new_image_deletes_old_image(self):
+        """
+        Asserts assigning a new image records the old one for deletion from
+        Cloudinary, once.
+        """
+        self.artpiece.image = \
+            'https://res.cloudinary.com/demo/image/upload/v2/new.jpg'
+        self.artpiece.save()
+        self.artpiece.save()
+        self.assertEqual(
+            list(ImageDeletion.objects.values_list('public_id', flat=True)),
+            ['old'])
+
+    def test_update_fields_without_image_skips_check(self):
+        """
+        Asserts saving with update_fields excluding the image does not delete
+        the image, even if a new one was assigned.
+        """
+        self.artpiece.image = \
+            'https://res.cloudinary.com/demo/image/upload/v2/new.jpg'
+        self.artpiece.save(update_fields=['title'])
+        self.assertFalse(ImageDeletion.objects.exists())
+
+
+class GcHashtagsTests(APITestCase):
+    """
+    Test suite for the gc_hashtags management command.
+    """
+
+    def setUp(self):
+        """
+        Set up an artpiece with one hashtag, and two orphaned hashtags.
+        """
+        artpiece = Artpiece.objects.create(
+            owner=CustomUser.objects.create_user(
+                email='test@test.com', password='testpass'),
+            title='test title')
+        artpiece.hashtags.add(Hashtag.objects.create(name='used'))
+        Hashtag.objects.create(name='orphan1')
+        Hashtag.objects.create(name='orphan2')
+
+    def test_dry_run_only_reports_orphans(self):
+        """
+        Asserts --dry-run reports the orphaned hashtags without deleting them.
+        """
+        out = StringIO()
+        call_command('gc_hashtags', '--dry-run', stdout=out)
+        self.assertIn('Found 2 orphaned hashtag(s)', out.getvalue())
+        self.assertEqual(Hashtag.objects.count(), 3)
+
+    def test_deletes_orphans_in_a_fixed_number_of_queries(self):
+        """
+        Asserts the command deletes every orphaned hashtag, and only them,
+        selecting them once and deleting them with their through rows.
+        """
+        with CaptureQueriesContext(connection) as context:
+            call_command('gc_hashtags', stdout=StringIO())
+        self.assertEqual(len(context.captured_queries), 3)
+        self.assertEqual(
+            list(Hashtag.objects.values_list('name', flat=True)), ['used'])
+
+
+class ArtpieceAutocommitTests(TransactionTestCase):
+    """
+    Test suite for artpiece writes outside a transaction, as in production,
+    where on-commit callbacks run immediately.
+    """
+
+    def test_deleting_artpiece_deletes_its_orphaned_hashtags(self):
+        """
+        Asserts deleting the only artpiece with a hashtag deletes the
+        hashtag, and keeps a hashtag still used by another artpiece.
+        """
+        owner = CustomUser.objects.create_user(
+            email='test@test.com', password='testpass')
+        artpiece = Artpiece.objects.create(owner=owner, title='solo title')
+        other_artpiece = Artpiece.objects.create(
+            owner=owner, title='other title')
+        artpiece.hashtags.add(
+            Hashtag.objects.create(name='solo'),
+            Hashtag.objects.create(name='shared'))
+        other_artpiece.hashtags.add(Hashtag.objects.get(name='shared'))
+
+        artpiece.delete()
+
+        self.assertEqual(
+            list(Hashtag.objects.values_list('name', flat=True)), ['shared'])
+
+    def test_failed_delete_keeps_image(self):
+        """
+        Asserts the image of an artpiece that fails to be deleted is not
+        recorded for deletion from Cloudinary.
+        """
+        artpiece = Artpiece.objects.create(
+            owner=CustomUser.objects.create_user(
+                email='test@test.com', password='testpass'),
+            title='test title',
+            image='https://res.cloudinary.com/demo/image/upload/v1/a.jpg',
+            image_public_id='a')
+
+        with patch.object(models.Model, 'delete',
+                          side_effect=DatabaseError('database is locked')):
+            with self.assertRaises(DatabaseError):
+                artpiece.delete()
+
+        self.assertTrue(Artpiece.objects.filter(pk=artpiece.pk).exists())
+        self.assertFalse(ImageDeletion.objects.exists())
+
+
+class ArtpieceQueryCountTests(APITestCase):
+    """
+    Test suite asserting the artpiece detail, list and trending endpoints
+    resolve likes, hashtags and owner profiles in a fixed number of queries.
+    """
+
+    def setUp(self):
+        """
+        Set up a viewer and an artist, and log in the viewer.
+        """
+        self.viewer = CustomUser.objects.create_user(
+            email='viewer@test.com',
+            password='testpass')
+        self.artist = CustomUser.objects.create_user(
+            email='artist@test.com',
+            password='testpass')
+        self.client.login(email='viewer@test.com', password='testpass')
+        self.created = 0
+
+    def _create_artpieces(self, count):
+        """
+        Creates `count` artpieces owned by the artist, each with two hashtags
+        and liked by the viewer.
+        """
+        artpieces = []
+        for _ in range(count):
+            self.created += 1
+            artpiece = Artpiece.objects.create(
+                owner=self.artist, title=f'test title {self.created}')
+            artpiece.hashtags.add(
+                Hashtag.objects.create(name=f'first{self.created}'),
+                Hashtag.objects.create(name=f'second{self.created}'))
+            Like.objects.create(owner=self.viewer, liked_piece=artpiece)
+            artpieces.append(artpiece)
+        return artpieces
+
+    def _count_queries(self, url):
+        """
+        Makes a GET request to the url, asserts a 200 status code and returns
+        the number of queries executed along with the response.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_list_query_count_does_not_grow_with_page(self):
+        """
+        Asserts listing one artpiece and a full page of artpieces costs the
+        same number of queries, and that the viewer's like ids are returned.
+        """
+        self._create_artpieces(1)
+        single_page_queries, _ = self._count_queries('/api/artpieces/')
+
+        self._create_artpieces(7)
+        full_page_queries, response = self._count_queries('/api/artpieces/')
+
+        self.assertEqual(single_page_queries, full_page_queries)
+        self.assertEqual(len(response.data['results']), 8)
+        for artpiece in response.data['results']:
+            self.assertIsNotNone(artpiece['like_id'])
+            self.assertEqual(len(artpiece['hashtags'].split()), 2)
+
+    def test_trending_query_count_does_not_grow_with_hashtags(self):
+        """
+        Asserts the trending endpoint costs the same number of queries however
+        many hashtags the trending artpieces have.
+        """
+        artpieces = self._create_artpieces(4)
+        refresh_trending_leaderboard()
+        initial_queries, _ = self._count_queries('/api/artpieces/trending/')
+
+        for artpiece in artpieces:
+            artpiece.hashtags.add(
+                *[Hashtag.objects.create(name=f'extra{artpiece.id}{i}')
+                  for i in range(3)])
+        final_queries, response = self._count_queries(
+            '/api/artpieces/trending/')
+
+        self.assertEqual(initial_queries, final_queries)
+        self.assertEqual(len(response.data['results']), 4)
+        for artpiece in response.data['results']:
+            self.assertEqual(len(artpiece['hashtags'].split()), 5)
+
+    def test_detail_query_count_matches_list(self):
+        """
+        Asserts retrieving an artpiece costs no more queries than listing a
+        page of them, and returns the viewer's like id.
+        """
+        artpieces = self._create_artpieces(8)
+        list_queries, _ = self._count_queries('/api/artpieces/')
+        detail_queries, response = self._count_queries(
+            f'/api/artpieces/{artpieces[0].id}/')
+
+        self.assertLessEqual(detail_queries, list_queries)
+        like = Like.objects.get(
+            owner=self.viewer, liked_piece=artpieces[0])
+        self.assertEqual(response.data['like_id'], like.id)
+
+
+class ArtpieceCursorPaginationTests(APITestCase):
+    """
+    Test suite for the opt-in cursor pagination mode of the artpiece list.
+    """
+
+    def setUp(self):
+        """
+        Set up a test user owning 20 artpieces, with likes_count values that
+        contain ties.
+        """
+        self.test_user = CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass')
+        for i in range(20):
+            Artpiece.objects.create(
+                owner=self.test_user, title=f'test title {i}')
+            Artpiece.objects.filter(title=f'test title {i}').update(
+                likes_count=i % 3)
+
+    def _walk(self, url):
+        """
+        Follows the `next` links from the url and returns the ids of all
+        listed artpieces, the responses and the executed queries.
+        """
+        ids, responses, queries = [], [], []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(artpiece['id'] for artpiece in response.data['results'])
+            responses.append(response)
+            queries.extend(query['sql'] for query in context.captured_queries)
+            url = response.data['next']
+        return ids, responses, queries
+
+    def test_cursor_mode_lists_every_artpiece_once_without_count(self):
+        """
+        Asserts walking the cursor pages returns every artpiece once, in the
+        default order, without a COUNT query and without a `count` key.
+        """
+        ids, responses, queries = self._walk(
+            '/api/artpieces/?pagination=cursor')
+
+        expected = list(Artpiece.objects.values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(responses), 3)
+        self.assertNotIn('count', responses[0].data)
+        self.assertFalse(
+            any('COUNT(' in sql.upper() for sql in queries))
+
+    def test_cursor_mode_follows_likes_count_ordering_with_ties(self):
+        """
+        Asserts cursor pages follow `?ordering=-likes_count`, paging through
+        ties on likes_count without skipping or repeating artpieces.
+        """
+        ids, _, _ = self._walk(
+            '/api/artpieces/?pagination=cursor&ordering=-likes_count')
+
+        expected = list(Artpiece.objects.order_by(
+            '-likes_count', '-pk').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_cursor_mode_previous_link(self):
+        """
+        Asserts the `previous` link of the second page returns the first page.
+        """
+        _, responses, _ = self._walk('/api/artpieces/?pagination=cursor')
+        response = self.client.get(responses[1].data['previous'])
+
+        self.assertEqual(
+            [artpiece['id'] for artpiece in response.data['results']],
+            [artpiece['id'] for artpiece in responses[0].data['results']])
+
+    def test_crafted_cursors_are_rejected(self):
+        """
+        Asserts cursors whose values do not match the ordering fields are
+        rejected with a 404 instead of an error.
+        """
+        positions = [
+            ['garbage', 1], [{'a': 1}, 1], [None, None],
+            ['2024-01-01T00:00:00+00:00', 'x'], ['2024-01-01', [1]],
+        ]
+        for position in positions:
+            cursor = b64encode(urlencode(
+                {'o': 0, 'p': json.dumps(position)}).encode()).decode()
+            response = self.client.get(
+                '/api/artpieces/', {'pagination': 'cursor', 'cursor': cursor})
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+    def test_page_number_mode_is_unchanged(self):
+        """
+        Asserts the list still uses page number pagination by default.
+        """
+        response = self.client.get('/api/artpieces/')
+        self.assertEqual(response.data['count'], 20)
+        self.assertIn('page=2', response.data['next'])
+
+
+class ArtpieceSearchTests(APITestCase):
+    """
+    Test suite for full-text search on the artpiece list, and for keeping
+    the search documents up to date.
+    """
+
+    def setUp(self):
+        """
+        Set up an artist with a named profile and a collection, an artpiece
+        in the collection with a hashtag, and an unrelated artpiece.
+        """
+        self.artist = CustomUser.objects.create_user(
+            email='artist@test.com',
+            password='testpass')
+        self.artist.profile.name = 'Vincent'
+        self.artist.profile.save()
+        self.collection = ArtCollection.objects.create(
+            owner=self.artist, title='Harbour studies')
+        self.artpiece = Artpiece.objects.create(
+            owner=self.artist,
+            title='Sunflowers at dusk',
+            art_collection=self.collection)
+        self.artpiece.hashtags.add(Hashtag.objects.create(name='impasto'))
+        self.other_artpiece = Artpiece.objects.create(
+            owner=CustomUser.objects.create_user(
+                email='other@test.com', password='testpass'),
+            title='Still life')
+
+    def _search(self, text):
+        """ Returns the ids of the artpieces matching the search text. """
+        response = self.client.get('/api/artpieces/', {'search': text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [artpiece['id'] for artpiece in response.data['results']]
+
+    def test_search_matches_every_indexed_field_by_prefix(self):
+        """
+        Asserts the artpiece is found by a prefix of its title, its owner's
+        profile name, its hashtag and its collection title.
+        """
+        for text in ['sunfl', 'vinc', '#impa', 'harbour', 'dusk vincent']:
+            self.assertEqual(self._search(text), [self.artpiece.id])
+        self.assertEqual(self._search('sunflowers still'), [])
+
+    def test_search_ranks_better_matches_first(self):
+        """
+        Asserts an artpiece matching a term in several fields ranks above one
+        matching it once.
+        """
+        self.other_artpiece.title = 'Still life with sunflowers'
+        self.other_artpiece.save()
+        self.other_artpiece.hashtags.add(
+            Hashtag.objects.create(name='sunflowers'))
+
+        self.assertEqual(
+            self._search('sunflowers'),
+            [self.other_artpiece.id, self.artpiece.id])
+
+    def test_search_document_follows_related_changes(self):
+        """
+        Asserts renaming the profile or collection, or retagging the
+        artpiece, is reflected in search results.
+        """
+        self.artist.profile.name = 'Claude'
+        self.artist.profile.save()
+        self.collection.title = 'Water lilies'
+        self.collection.save()
+        self.artpiece.hashtags.set([Hashtag.objects.create(name='pastel')])
+
+        for text in ['claude', 'lilies', 'pastel']:
+            self.assertEqual(self._search(text), [self.artpiece.id])
+        for text in ['vincent', 'harbour', 'impasto']:
+            self.assertEqual(self._search(text), [])
+
+    def test_profile_edit_without_rename_keeps_search_documents(self):
+        """
+        Asserts editing a profile without renaming it does not rebuild the
+        search documents of the owner's artpieces.
+        """
+        profile = self.artist.profile
+        profile.description = 'Painter'
+        with patch('artpieces.models.refresh_search_documents') as refresh:
+            profile.save()
+        refresh.assert_not_called()
+
+    def test_deleted_artpiece_is_not_found(self):
+        """ Asserts a deleted artpiece is removed from the search index. """
+        self.artpiece.delete()
+        self.assertEqual(self._search('sunflowers'), [])
+
+
+class ArtpieceBatchCreateTests(APITestCase):
+    """
+    Test suite for the batch artpiece creation endpoint, storing images with
+    the local storage backend instead of Cloudinary.
+    """
+
+    def setUp(self):
+        """
+        Set up temporary image directories, and log in a test user.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        settings_override = override_settings(
+            IMAGE_STORAGE_BACKEND='images.storage.LocalImageStorage',
+            IMAGE_SPOOL_DIR=f'{tmp_dir}/spool',
+            IMAGE_LOCAL_STORAGE_DIR=f'{tmp_dir}/media',
+            IMAGE_UPLOAD_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass')
+        self.client.login(email='test@test.com', password='testpass')
+
+    def _image_file(self, name):
+        """ Returns an uploaded JPEG file generated in memory. """
+        buffer = BytesIO()
+        Image.new('RGB', (20, 20), 'green').save(buffer, format='JPEG')
+        return SimpleUploadedFile(
+            name, buffer.getvalue(), content_type='image/jpeg')
+
+    def _post_batch(self, items, image_count):
+        """ Posts a batch of items, with images for the first items. """
+        data = {'items': json.dumps(items)}
+        for index in range(image_count):
+            data[f'image_{index}'] = self._image_file(f'image{index}.jpg')
+        return self.client.post(
+            '/api/artpieces/batch/', data, format='multipart')
+
+    def test_batch_reports_result_of_each_item(self):
+        """
+        Asserts the valid artpieces of a batch are created with a single
+        INSERT, with their hashtags, search documents and profile stats, and
+        their images queued at once, while invalid items are reported.
+        """
+        items = [
+            {'title': 'first', 'hashtags': '#sea #blue'},
+            {'title': 'second', 'hashtags': '#sea'},
+            {'title': 'first'},
+            {'title': 'no image'},
+        ]
+        with CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks() as callbacks:
+            response = self._post_batch(items, image_count=3)
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data['results']
+        self.assertEqual(
+            [result['status'] for result in results], [201, 201, 400, 400])
+        self.assertIn('title', results[2]['errors'])
+        self.assertIn('image', results[3]['errors'])
+        self.assertEqual(
+            set(results[0]['artpiece']['hashtags'].split()),
+            {'#sea', '#blue'})
+        self.assertEqual(
+            results[1]['artpiece']['image_status'], 'processing')
+        artpiece_inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "artpieces_artpiece"')]
+        self.assertEqual(len(artpiece_inserts), 1)
+        self.assertIn(
+            'sea', Artpiece.objects.get(title='second').search_document)
+        stats = CustomUser.objects.get(email='test@test.com').profile.stats
+        self.assertEqual(stats.artpiece_count, 2)
+
+        self.assertEqual(ImageUpload.objects.count(), 2)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            set(Artpiece.objects.values_list('image_status', flat=True)),
+            {'ready'})
+
+    def test_title_taken_during_batch_is_reported(self):
+        """
+        Asserts an item whose title is taken after it is validated is
+        reported as invalid, and the other items are still created.
+        """
+        owner = CustomUser.objects.get(email='test@test.com')
+        items = [{'title': 'first'}, {'title': 'second'}]
+        original_write = batch._write_artpieces
+
+        def write_after_race(owner, valid):
+            if not Artpiece.objects.filter(title='first').exists():
+                Artpiece.objects.create(title='first', owner=owner)
+            return original_write(owner, valid)
+
+        with patch('artpieces.batch._write_artpieces', write_after_race):
+            response = self._post_batch(items, image_count=2)
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [400, 201])
+        self.assertEqual(
+            results[0]['errors'], {'title': [batch.TITLE_TAKEN_ERROR]})
+        self.assertEqual(
+            Artpiece.objects.filter(owner=owner).count(), 2)
+        self.assertEqual(ImageUpload.objects.count(), 1)
+
+    def test_hashtag_deleted_during_batch_is_created_again(self):
+        """
+        Asserts a hashtag deleted by the orphan cleanup while a batch is
+        written is created again and attached.
+        """
+        Hashtag.objects.create(name='sea')
+        original_bulk_create = Hashtag.objects.bulk_create
+
+        def bulk_create_then_cleanup(objs, **kwargs):
+            created = original_bulk_create(objs, **kwargs)
+            if bulk_create.call_count == 1:
+                Hashtag.objects.delete_orphans()
+            return created
+
+        with patch.object(Hashtag.objects, 'bulk_create',
+                          side_effect=bulk_create_then_cleanup) \
+                as bulk_create:
+            response = self._post_batch(
+                [{'title': 'first', 'hashtags': '#sea'}], image_count=1)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Artpiece.objects.get().hashtags.values_list(
+                'name', flat=True)),
+            ['sea'])
+        self.assertEqual(bulk_create.call_count, 2)
+
+    def test_batch_size_is_limited(self):
+        """
+        Asserts a batch of more than 20 artpieces, or without items, is
+        rejected.
+        """
+        response = self._post_batch(
+            [{'title': f'title {i}'} for i in range(21)], image_count=0)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('items', response.data)
+
+        response = self._post_batch([], image_count=0)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Artpiece.objects.exists())
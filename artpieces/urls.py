@@ -4,6 +4,11 @@ from artpieces import views
 urlpatterns = [
     path('artpieces/', views.ArtpieceList.as_view()),
     path('artpieces/<int:pk>/', views.ArtpieceDetail.as_view()),
+    path(
+        'artpieces/batch/',
+        views.ArtpieceBatchCreate.as_view(),
+        name='artpiece_batch_create'
+        ),
     path(
         'artpieces/trending/',
         views.ArtpieceTrendList.as_view(),
@@ -1,13 +1,47 @@
-from rest_framework import generics, permissions, filters
-from django.db.models import Count
+from rest_framework import generics, permissions, filters, status
+from rest_framework.response import Response
+from django.db.models import OuterRef, Subquery
 from django_filters.rest_framework import DjangoFilterBackend
+from .batch import create_artpieces, parse_batch
 from .serializers import ArtpieceSerializer
 from .models import Artpiece
+from .search import ArtpieceSearchFilter
 from likes.models import Like
 from viridian_api.permissions import IsOwnerOrReadOnly
 
 
-class ArtpieceDetail(generics.RetrieveUpdateDestroyAPIView):
+class ArtpieceViewerStateMixin:
+    """
+    Mixin for artpiece views that resolves everything `ArtpieceSerializer`
+    needs for a page of artpieces in a fixed number of queries.
+
+    Methods:
+    - annotate_viewer_state: Joins the owner and owner's profile, prefetches
+    hashtags, and annotates the requesting user's like id on the queryset.
+    - get_queryset: Applies `annotate_viewer_state` to the view's queryset.
+    """
+    def annotate_viewer_state(self, queryset):
+        """
+        Joins the owner and the owner's profile, prefetches hashtags, and
+        annotates `like_id` with the id of the requesting user's like (or
+        None) through a subquery.
+        """
+        queryset = queryset.select_related(
+            'owner__profile').prefetch_related('hashtags')
+        user = self.request.user
+        if user.is_authenticated:
+            like_id = Like.objects.filter(
+                owner=user, liked_piece=OuterRef('pk')).values('id')[:1]
+            queryset = queryset.annotate(like_id=Subquery(like_id))
+        return queryset
+
+    def get_queryset(self):
+        """ Applies `annotate_viewer_state` to the view's queryset. """
+        return self.annotate_viewer_state(super().get_queryset())
+
+
+class ArtpieceDetail(ArtpieceViewerStateMixin,
+                     generics.RetrieveUpdateDestroyAPIView):
     """
     API view for retrieving, updating, or deleting an artpiece instance.
 
@@ -19,12 +53,10 @@ class ArtpieceDetail(generics.RetrieveUpdateDestroyAPIView):
     """
     serializer_class = ArtpieceSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Artpiece.objects.annotate(
-        likes_count=Count('likes', disctinct=True)
-    ).order_by('-created_on')
+    queryset = Artpiece.objects.order_by('-created_on')
 
 
-class ArtpieceList(generics.ListCreateAPIView):
+class ArtpieceList(ArtpieceViewerStateMixin, generics.ListCreateAPIView):
     """
     API view for listing and creating artpieces.
 
@@ -38,9 +70,11 @@ class ArtpieceList(generics.ListCreateAPIView):
     - DjangoFilterBackend: Allows filtering of artpieces based on specified
         fields ('art_medium', 'for_sale', 'art_collection_id', 'likes__owner',
         'owner').
-    - SearchFilter: Enables searching for artpieces based on fields
-        ('title', 'owner__profile__name', 'hashtags__name',
-        'art_collection_id__title').
+    - ArtpieceSearchFilter: Enables full-text searching for artpieces based
+        on fields ('title', 'owner__profile__name', 'hashtags__name',
+        'art_collection_id__title'), through the search document indexed for
+        each artpiece. Results are ordered by relevance unless an ordering is
+        requested.
     - OrderingFilter: Allows ordering of artpieces based on fields
         ('likes_count', 'created_on').
 
@@ -50,12 +84,10 @@ class ArtpieceList(generics.ListCreateAPIView):
     """
     serializer_class = ArtpieceSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Artpiece.objects.annotate(
-        likes_count=Count('likes', disctinct=True)
-    ).order_by('-created_on')
+    queryset = Artpiece.objects.order_by('-created_on')
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        ArtpieceSearchFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = [
@@ -84,49 +116,95 @@ class ArtpieceList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class ArtpieceTrendList(generics.ListAPIView):
+class ArtpieceBatchCreate(ArtpieceViewerStateMixin, generics.GenericAPIView):
+    """
+    API view for creating up to 20 artpieces in one request, see
+    `artpieces.batch`.
+
+    Uses `ArtpieceSerializer` to validate each artpiece and serialize the
+    created ones.
+
+    Permissions:
+    - IsAuthenticated: Only authenticated users can create artpieces.
+
+    Methods:
+    - post: Creates the valid artpieces of the batch, and reports the result
+        of each item. Responds with 201 if every artpiece was created, 400 if
+        none was, and 207 otherwise.
+    """
+    serializer_class = ArtpieceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Artpiece.objects.all()
+
+    def post(self, request, *args, **kwargs):
+        """
+        Creates the valid artpieces of the batch. The result of each item is
+        reported in order, with the created artpiece or the validation
+        errors, and the created artpieces are serialized with a fixed number
+        of queries.
+        """
+        try:
+            batch = parse_batch(request)
+        except ValueError as error:
+            return Response(
+                {'items': [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = create_artpieces(batch, self.get_serializer_context())
+        created = self.get_queryset().in_bulk([
+            result.pk for result in results
+            if isinstance(result, Artpiece)])
+        items = []
+        for index, result in enumerate(results):
+            if isinstance(result, Artpiece):
+                items.append({
+                    'index': index,
+                    'status': status.HTTP_201_CREATED,
+                    'artpiece': self.get_serializer(created[result.pk]).data,
+                })
+            else:
+                items.append({
+                    'index': index,
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': result,
+                })
+
+        if len(created) == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': items}, status=response_status)
+
+
+class ArtpieceTrendList(ArtpieceViewerStateMixin, generics.ListAPIView):
     """
     API view for listing the top 4 'trending' art pieces.
 
     Uses `ArtpieceSerializer` for serialization.
 
+    Reads the top of the precomputed trending leaderboard (see
+    `likes.trending`), which ranks art pieces by the number of likes received
+    in the last 30 days, topped up with the most liked art pieces of all time.
+    The leaderboard is rebuilt by the `refresh_trending` management command.
+
     Methods:
-    - get_queryset: Retrieves the top 4 art pieces with the highest number of
-        likes in the last 30 days. If fewer than 4 art pieces have likes in the
-        last 30 days, it includes additional top-liked art pieces to make a
-        total of 4.
+    - get_queryset: Retrieves the top 4 art pieces of the leaderboard.
 
-    The queryset is ordered by the number of likes in descending order.
+    The queryset is ordered by leaderboard rank.
     """
     serializer_class = ArtpieceSerializer
+    trending_count = 4
 
     def get_queryset(self):
         """
-        Retrieves the top 4 art pieces with the highest number of
-        likes in the last 30 days. If fewer than 4 art pieces have likes in the
-        last 30 days, it includes additional top-liked art pieces to make a
-        total of 4.
+        Retrieves the top 4 art pieces of the trending leaderboard with a
+        single query over the leaderboard's rank index.
+
+        Slices the leaderboard rather than filtering on rank, as the entries
+        of deleted art pieces cascade away, leaving gaps in the ranks.
         """
-        trending_artpieces = Like.top_trending_artpieces()
-        trending_artpiece_ids = {
-            artpiece['liked_piece'] for artpiece in trending_artpieces
-            }
-
-        if len(trending_artpiece_ids) < 4:
-            # If less than 4 "trending" art pieces, get the total top 4
-            additional_artpieces = Artpiece.objects.annotate(
-                likes_count=Count('likes')
-            ).exclude(id__in=trending_artpiece_ids).order_by(
-                '-likes_count')[:4-len(trending_artpiece_ids)]
-
-            additional_artpiece_ids = {
-                artpiece.id for artpiece in additional_artpieces
-                }
-            trending_artpiece_ids.update(additional_artpiece_ids)
-
-        # Get the final queryset of art pieces
         queryset = Artpiece.objects.filter(
-            id__in=trending_artpiece_ids).annotate(
-            likes_count=Count('likes', distinct=True)).order_by('-likes_count')
-
-        return queryset
+            trending__isnull=False
+        ).order_by('trending__rank')
+        return self.annotate_viewer_state(queryset)[:self.trending_count]
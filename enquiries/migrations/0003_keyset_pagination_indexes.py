@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enquiry',
+            index=models.Index(fields=['updated_on', 'id'], name='enquiry_updated_on_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.13 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enquiry',
+            index=models.Index(condition=models.Q(('buyer_has_checked', False)), fields=['buyer'], name='enquiry_buyer_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enquiry',
+            index=models.Index(condition=models.Q(('artist_has_checked', False)), fields=['artpiece'], name='enquiry_artist_unread_idx'),
+        ),
+    ]
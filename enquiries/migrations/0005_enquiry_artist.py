@@ -0,0 +1,49 @@
+# Generated by Django 4.2.13 on 2026-10-18 08:16
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def populate_artist(apps, schema_editor):
+    """ Sets the artist of existing enquiries to their artpiece's owner. """
+    Enquiry = apps.get_model('enquiries', 'Enquiry')
+    Artpiece = apps.get_model('artpieces', 'Artpiece')
+    owners = Artpiece.objects.filter(pk=OuterRef('artpiece')).values('owner')
+    Enquiry.objects.filter(artpiece__isnull=False).update(
+        artist=Subquery(owners[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('enquiries', '0004_unread_partial_indexes'),
+        ('artpieces', '0010_collection_artpieces_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='enquiry',
+            name='enquiry_artist_unread_idx',
+        ),
+        migrations.AddField(
+            model_name='enquiry',
+            name='artist',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='artist_enquiries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(populate_artist, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='enquiry',
+            index=models.Index(fields=['buyer', 'updated_on', 'id'], name='enquiry_buyer_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enquiry',
+            index=models.Index(fields=['artist', 'updated_on', 'id'], name='enquiry_artist_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enquiry',
+            index=models.Index(condition=models.Q(('artist_has_checked', False)), fields=['artist'], name='enquiry_artist_unread_idx'),
+        ),
+    ]
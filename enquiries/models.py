@@ -1,11 +1,14 @@
 from django.db import models
+from django.db.models import Case, Count, F, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from users.models import CustomUser
+from viridian_api.tracking import FieldTrackerMixin
 from artpieces.models import Artpiece
 
 
-class Enquiry(models.Model):
+class Enquiry(FieldTrackerMixin, models.Model):
     """
     Represents an enquiry made by a user regarding an art piece.
 
@@ -14,6 +17,9 @@ class Enquiry(models.Model):
             model.
         - artpiece (ForeignKey): The artpiece the enquiry is about. Linked to
             the Artpiece model.
+        - artist (ForeignKey): The owner of the artpiece, set when the enquiry
+            is created and kept if the artpiece is deleted, so the artist's
+            inbox is read without joining artpieces. Linked to the User model.
         - initial_message (CharField): The initial message content of the
             enquiry. Must be provided and has a max length of 255 characters.
         - response_message (CharField): The response message from the artist.
@@ -28,6 +34,8 @@ class Enquiry(models.Model):
             checked the enquiry. Default is True.
         - artist_has_checked (BooleanField): Indicates whether the artist has
             checked the enquiry. Default is False.
+        - tracked_fields (tuple): Fields whose database values are remembered,
+            see FieldTrackerMixin.
 
     Choices:
         STATUS_CHOICES: Defines the status of the enquiry.
@@ -38,11 +46,25 @@ class Enquiry(models.Model):
     Meta:
         ordering (list): Specifies the default ordering of the Enquiry objects.
         Ordered by creation date in descending order.
+        indexes (list): Index on updated_on (with id as tie-breaker) for the
+        inbox ordering and keyset pagination, indexes on the buyer and the
+        artist followed by updated_on, so each half of a user's inbox is an
+        index range scan, and partial indexes on the buyer and artist of the
+        enquiries not checked by the buyer or the artist, for counting unread
+        enquiries.
 
     Methods:
         __str__: Returns a string representation of the Enquiry instance,
             including the art piece and the buyer.
+        save: Sets the artist of a new enquiry from its artpiece.
+        inbox: Returns the enquiries of a user, as buyer or artist.
+        mark_checked: Marks the enquiry as checked by the buyer or artist.
+        mark_all_checked: Marks the enquiries of a user as checked.
+        get_summary: Returns the unread and pending enquiry counts of a user,
+            as buyer and as artist.
     """
+    tracked_fields = ('status', 'response_message')
+
     STATUS_CHOICES = [
         (0, 'Pending'),
         (1, 'Accepted'),
@@ -60,6 +82,13 @@ class Enquiry(models.Model):
         blank=True,
         on_delete=models.SET_NULL
         )
+    artist = models.ForeignKey(
+        CustomUser,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='artist_enquiries'
+        )
     initial_message = models.CharField(
         null=False,
         max_length=255,
@@ -78,15 +107,165 @@ class Enquiry(models.Model):
 
     class Meta:
         ordering = ['-created_on']
+        indexes = [
+            models.Index(
+                fields=['updated_on', 'id'],
+                name='enquiry_updated_on_idx'),
+            models.Index(
+                fields=['buyer', 'updated_on', 'id'],
+                name='enquiry_buyer_inbox_idx'),
+            models.Index(
+                fields=['artist', 'updated_on', 'id'],
+                name='enquiry_artist_inbox_idx'),
+            models.Index(
+                fields=['buyer'],
+                condition=Q(buyer_has_checked=False),
+                name='enquiry_buyer_unread_idx'),
+            models.Index(
+                fields=['artist'],
+                condition=Q(artist_has_checked=False),
+                name='enquiry_artist_unread_idx'),
+        ]
 
     def __str__(self):
         return f'Enquiry re {self.artpiece} by {self.buyer}'
 
+    def save(self, *args, **kwargs):
+        """
+        Overrides the save method to set the artist of a new enquiry to the
+        owner of its artpiece.
+        """
+        if self._state.adding and self.artist_id is None and self.artpiece:
+            self.artist_id = self.artpiece.owner_id
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def inbox(cls, user, queryset=None):
+        """
+        Returns the enquiries of a user, as the buyer or the artist, as the
+        UNION ALL of the enquiries bought by the user and the enquiries
+        received by the user, each filtered on its own indexed column,
+        instead of an OR across both columns.
+
+        Args:
+            user: The user.
+            queryset: An optional, possibly filtered and ordered, queryset of
+            enquiries to restrict. Defaults to all enquiries.
+
+        Returns:
+            QuerySet: A union queryset with the ordering of `queryset`.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        if not user.is_authenticated:
+            return queryset.none()
+        ordering = queryset.query.order_by or cls._meta.ordering
+        queryset = queryset.order_by()
+        as_buyer = queryset.filter(buyer=user)
+        as_artist = queryset.filter(artist=user).exclude(buyer=user)
+        return as_buyer.union(as_artist, all=True).order_by(*ordering)
+
+    def mark_checked(self, user):
+        """
+        Marks the enquiry as checked by the user, if they are its buyer or
+        artist, with a conditional single-column UPDATE. No query is made if
+        the enquiry is already checked, and `updated_on` is left unchanged,
+        so reading an enquiry does not move it up the inbox.
+
+        Args:
+            user: The user reading the enquiry.
+
+        Returns:
+            bool: True if the enquiry was updated.
+        """
+        if user == self.buyer:
+            field_name = 'buyer_has_checked'
+        elif user == self.artist:
+            field_name = 'artist_has_checked'
+        else:
+            return False
+        if getattr(self, field_name):
+            return False
+        setattr(self, field_name, True)
+        return bool(type(self).objects.filter(
+            pk=self.pk, **{field_name: False}).update(**{field_name: True}))
+
+    @classmethod
+    def mark_all_checked(cls, user, ids=None):
+        """
+        Marks the enquiries of a user as checked, as the buyer or the artist
+        of each, with a single UPDATE of the unchecked enquiries only.
+
+        Args:
+            user: The user.
+            ids: An optional list of enquiry ids to restrict the update to.
+
+        Returns:
+            int: The number of enquiries updated.
+        """
+        queryset = cls.objects.filter(
+            Q(buyer=user, buyer_has_checked=False)
+            | Q(artist=user, artist_has_checked=False))
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        return queryset.update(
+            buyer_has_checked=Case(
+                When(buyer=user, then=Value(True)),
+                default=F('buyer_has_checked')),
+            artist_has_checked=Case(
+                When(artist=user, then=Value(True)),
+                default=F('artist_has_checked')),
+        )
+
+    @classmethod
+    def get_summary(cls, user):
+        """
+        Returns the number of unread and pending enquiries of a user, as the
+        buyer and as the artist, with a single query.
+
+        Each count is a separate scalar subquery, so the unread counts are
+        served by the partial indexes on the unchecked enquiries and the
+        pending counts by the buyer and artist indexes.
+
+        Args:
+            user: The user.
+
+        Returns:
+            dict: The `unread` and `pending` counts of the `buyer` and the
+            `artist` roles, and the total `unread` count.
+        """
+        def count(queryset, owner):
+            return Coalesce(Subquery(
+                queryset.order_by().values(owner).annotate(
+                    count=Count('pk')).values('count')), 0)
+
+        as_buyer = cls.objects.filter(buyer=user)
+        as_artist = cls.objects.filter(artist=user)
+        counts = CustomUser.objects.filter(pk=user.pk).values(
+            buyer_unread=count(
+                as_buyer.filter(buyer_has_checked=False), 'buyer'),
+            buyer_pending=count(as_buyer.filter(status=0), 'buyer'),
+            artist_unread=count(
+                as_artist.filter(artist_has_checked=False), 'artist'),
+            artist_pending=count(as_artist.filter(status=0), 'artist'),
+        ).get()
+        return {
+            'buyer': {
+                'unread': counts['buyer_unread'],
+                'pending': counts['buyer_pending'],
+            },
+            'artist': {
+                'unread': counts['artist_unread'],
+                'pending': counts['artist_pending'],
+            },
+            'unread': counts['buyer_unread'] + counts['artist_unread'],
+        }
+
 
 @receiver(pre_save, sender=Enquiry)
 def delete_enquiry_if_null(sender, instance, **kwargs):
     """
-    Deletes the Enquiry instance if both artpiece and buyer are null.
+    Deletes the Enquiry instance if both artist and buyer are null.
     """
-    if instance.artpiece_id is None and instance.buyer_id is None:
+    if instance.artist_id is None and instance.buyer_id is None:
         instance.delete()
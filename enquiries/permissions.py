@@ -3,10 +3,10 @@ from rest_framework import permissions
 
 class IsBuyerOrArtist(permissions.BasePermission):
     """
-    Custom permission to allow access only to the buyer or artpiece owner.
+    Custom permission to allow access only to the buyer or artist.
     """
 
     def has_object_permission(self, request, view, obj):
         is_buyer = obj.buyer and request.user == obj.buyer
-        is_artist = obj.artpiece and request.user == obj.artpiece.owner
+        is_artist = obj.artist and request.user == obj.artist
         return is_buyer or is_artist
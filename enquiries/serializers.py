@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Enquiry
 from artpieces.models import Artpiece
+from images.variants import get_thumbnail_url
 
 
 class EnquirySerializer(serializers.ModelSerializer):
@@ -44,55 +45,58 @@ class EnquirySerializer(serializers.ModelSerializer):
 
     def get_buyer_profile_image(self, obj):
         """
-        Returns the buyer's profile image url,
+        Returns the url of the buyer's profile image thumbnail,
         if the buyer field is not null.
         """
         if obj.buyer is None:
             return None
-        return obj.buyer.profile.profile_image.url
+        profile = obj.buyer.profile
+        return get_thumbnail_url(
+            profile.profile_image, profile.image_public_id)
 
     def get_is_artist(self, obj):
         """
-        Returns True if the requesting user is the owner of
-        the artpiece.
+        Returns True if the requesting user is the artist.
         """
         request = self.context['request']
-        return obj.artpiece is not None and request.user == obj.artpiece.owner
+        return obj.artist is not None and request.user == obj.artist
 
     def get_artist_name(self, obj):
         """
-        Returns the artists name from the profile, if the artpiece field is not
+        Returns the artists name from the profile, if the artist field is not
         set to null.
         """
-        if obj.artpiece is None:
+        if obj.artist is None:
             return None
-        return obj.artpiece.owner.profile.name
+        return obj.artist.profile.name
 
     def get_artist_profile_id(self, obj):
         """
-        Returns the artist's profile id, if the artpiece field
+        Returns the artist's profile id, if the artist field
         is not set to null.
         """
-        if obj.artpiece is None:
+        if obj.artist is None:
             return None
-        return obj.artpiece.owner.profile.id
+        return obj.artist.profile.id
 
     def get_artist_profile_image(self, obj):
         """
-        Returns the artist's profile image url, if the artpiece field is not
-        set to null.
+        Returns the url of the artist's profile image thumbnail, if the
+        artist field is not set to null.
         """
-        if obj.artpiece is None:
+        if obj.artist is None:
             return None
-        return obj.artpiece.owner.profile.profile_image.url
+        profile = obj.artist.profile
+        return get_thumbnail_url(
+            profile.profile_image, profile.image_public_id)
 
     def get_artist_email(self, obj):
         """
         Returns email address of the artist if the enquiry
         has been accepted (status is 1)
         """
-        if obj.status == 1 and obj.artpiece:
-            return obj.artpiece.owner.email
+        if obj.status == 1 and obj.artist:
+            return obj.artist.email
         return None
 
     def validate(self, data):
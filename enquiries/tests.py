@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -50,6 +52,117 @@ class EnquiryListTests(APITestCase):
         self.assertEqual(response.data['buyer_name'], self.user.profile.name)
 
 
+class EnquiryInboxTests(APITestCase):
+    """
+    Test suite for the enquiry inbox, the union of the enquiries made and
+    received by a user.
+    """
+
+    def setUp(self):
+        """
+        Sets up a user who both made and received enquiries, and two other
+        users.
+        """
+        self.user = CustomUser.objects.create_user(
+            email='user@test.com', password='pass'
+        )
+        self.artist = CustomUser.objects.create_user(
+            email='artist@test.com', password='pass'
+        )
+        self.buyer = CustomUser.objects.create_user(
+            email='buyer@test.com', password='pass'
+        )
+        artwork = Artpiece.objects.create(
+            title='Art', owner=self.artist, for_sale=1)
+        own_artwork = Artpiece.objects.create(
+            title='Own art', owner=self.user, for_sale=1)
+        self.enquiries = [
+            Enquiry.objects.create(
+                buyer=self.user, artpiece=artwork,
+                initial_message=f'bought {index}')
+            for index in range(5)
+        ] + [
+            Enquiry.objects.create(
+                buyer=self.buyer, artpiece=own_artwork,
+                initial_message=f'received {index}')
+            for index in range(5)
+        ]
+        self.client.login(email='user@test.com', password='pass')
+
+    def test_artist_is_set_and_kept_without_artpiece(self):
+        """
+        Asserts the artist of an enquiry is set from its artpiece, and that
+        the artist still sees the enquiry after the artpiece is deleted.
+        """
+        enquiry = self.enquiries[-1]
+        self.assertEqual(enquiry.artist, self.user)
+        enquiry.artpiece.delete()
+        response = self.client.get(
+            reverse('enquiry-list') + f'?artist={self.user.id}')
+        ids = [result['id'] for result in response.data['results']]
+        self.assertIn(enquiry.id, ids)
+        self.assertEqual(len(ids), 5)
+
+    def test_inbox_is_paginated_with_a_cursor(self):
+        """
+        Asserts the inbox lists the enquiries made and received by the user,
+        newest first, across two pages of keyset pagination, and can be
+        filtered by role.
+        """
+        url = reverse('enquiry-list') + '?pagination=cursor'
+        ids = []
+        response = self.client.get(url)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [result['id'] for result in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        expected = sorted(
+            self.enquiries, key=lambda enquiry: enquiry.updated_on,
+            reverse=True)
+        self.assertEqual(ids, [enquiry.id for enquiry in expected])
+
+        response = self.client.get(
+            reverse('enquiry-list') + f'?artpiece__owner={self.user.id}')
+        self.assertEqual(
+            {result['initial_message'][:8]
+             for result in response.data['results']},
+            {'received'})
+
+    def _count_list_queries(self):
+        """ Returns the number of queries made to list the inbox. """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('enquiry-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        """
+        Asserts the buyers, artists and their profiles are loaded with the
+        enquiries, so listing one or eight enquiries costs the same number
+        of queries, as does retrieving an enquiry.
+        """
+        Enquiry.objects.exclude(pk=self.enquiries[0].pk).delete()
+        single_query_count = self._count_list_queries()
+        for index in range(7):
+            Enquiry.objects.create(
+                buyer=self.user, artpiece=self.enquiries[0].artpiece,
+                initial_message=f'more {index}')
+        self.assertEqual(self._count_list_queries(), single_query_count)
+
+        url = reverse('enquiry-detail', args=[self.enquiries[0].id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        enquiry_queries = [
+            query for query in queries.captured_queries
+            if 'FROM "enquiries_enquiry"' in query['sql']
+            or 'FROM "users_customuser"' in query['sql']
+            or 'FROM "profiles_profile"' in query['sql']]
+        self.assertEqual(len(enquiry_queries), 2)
+
+
 class EnquiryDetailTests(APITestCase):
     """
     Test suite for the EnquiryDetail view.
@@ -92,10 +205,67 @@ class EnquiryDetailTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['id'], self.enquiry.id)
 
+    def test_retrieve_marks_checked_only_once(self):
+        """
+        Test that the artist reading an enquiry marks it as checked with a
+        single-column UPDATE that leaves updated_on unchanged, and that
+        reading it again writes nothing.
+        """
+        self.client.login(email='artist1@test.com', password='pass')
+        url = reverse('enquiry-detail', args=[self.enquiry.id])
+        updated_on = self.enquiry.updated_on
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertTrue(response.data['artist_has_checked'])
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "enquiries_enquiry"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('updated_on', updates[0])
+        self.enquiry.refresh_from_db()
+        self.assertTrue(self.enquiry.artist_has_checked)
+        self.assertEqual(self.enquiry.updated_on, updated_on)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE')])
+
+    def test_mark_all_checked(self):
+        """
+        Test that a user can mark all their enquiries as checked, as buyer
+        and as artist, with a single UPDATE.
+        """
+        other_artpiece = Artpiece.objects.create(
+            title='Art 2', owner=self.user, for_sale=1)
+        Enquiry.objects.create(
+            buyer=self.artist, artpiece=other_artpiece,
+            initial_message='enquiry message')
+        Enquiry.objects.filter(pk=self.enquiry.pk).update(
+            buyer_has_checked=False)
+
+        self.client.login(email='user1@test.com', password='pass')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('enquiry-mark-checked'), {}, format='json')
+        self.assertEqual(response.data, {'updated': 2})
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(Enquiry.get_summary(self.user)['unread'], 0)
+        self.enquiry.refresh_from_db()
+        self.assertFalse(self.enquiry.artist_has_checked)
+
+        response = self.client.post(
+            reverse('enquiry-mark-checked'), {'ids': 'all'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_update_enquiry(self):
         """
         Test that the artpiece owner/artist can update the enquiry status when
-        the status is 0 ('pending').
+        the status is 0 ('pending'), with a single UPDATE that also resets
+        the buyer's 'checked' status.
         """
         self.client.login(email='artist1@test.com', password='pass')
         url = reverse('enquiry-detail', args=[self.enquiry.id])
@@ -103,11 +273,16 @@ class EnquiryDetailTests(APITestCase):
             'response_message': 'enquiry response',
             'status': 1,
         }
-        response = self.client.put(url, data, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "enquiries_enquiry"')]), 1)
         self.enquiry.refresh_from_db()
         self.assertEqual(self.enquiry.response_message, 'enquiry response')
         self.assertEqual(self.enquiry.status, 1)
+        self.assertFalse(self.enquiry.buyer_has_checked)
 
     def test_delete_enquiry_by_buyer(self):
         """
@@ -134,3 +309,60 @@ class EnquiryDetailTests(APITestCase):
         self.enquiry.refresh_from_db()
         self.assertIsNone(self.enquiry.artpiece)
         self.assertIsNotNone(self.enquiry.buyer)
+
+
+class EnquirySummaryTests(APITestCase):
+    """
+    Test suite for the EnquirySummary view.
+    """
+
+    def setUp(self):
+        """
+        Sets up a buyer, an artist with two artpieces, and enquiries in
+        different states.
+        """
+        self.buyer = CustomUser.objects.create_user(
+            email='buyer@test.com', password='pass'
+        )
+        self.artist = CustomUser.objects.create_user(
+            email='artist@test.com', password='pass'
+        )
+        artpieces = [
+            Artpiece.objects.create(title=f'Art {index}', owner=self.artist)
+            for index in range(2)]
+        Enquiry.objects.create(
+            buyer=self.buyer, artpiece=artpieces[0],
+            initial_message='unread by the artist')
+        Enquiry.objects.create(
+            buyer=self.buyer, artpiece=artpieces[1],
+            initial_message='answered', status=1,
+            buyer_has_checked=False, artist_has_checked=True)
+
+    def test_summary_counts_each_role_in_one_query(self):
+        """
+        Asserts the unread and pending counts of the buyer and the artist
+        are returned, each read with a single query.
+        """
+        url = reverse('enquiry-summary')
+        self.client.login(email='artist@test.com', password='pass')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if 'enquiries_enquiry' in query['sql']]), 1)
+        self.assertEqual(response.data, {
+            'buyer': {'unread': 0, 'pending': 0},
+            'artist': {'unread': 1, 'pending': 1},
+            'unread': 1,
+        })
+
+        self.client.login(email='buyer@test.com', password='pass')
+        response = self.client.get(url)
+        self.assertEqual(response.data['buyer'], {'unread': 1, 'pending': 1})
+        self.assertEqual(response.data['unread'], 1)
+
+    def test_summary_requires_authentication(self):
+        """ Asserts anonymous users cannot read a summary. """
+        response = self.client.get(reverse('enquiry-summary'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import EnquiryList, EnquiryDetail
+from .views import (
+    EnquiryList, EnquiryDetail, EnquiryMarkChecked, EnquirySummary)
 
 urlpatterns = [
     path(
@@ -7,6 +8,16 @@ urlpatterns = [
         EnquiryList.as_view(),
         name='enquiry-list'
         ),
+    path(
+        'enquiries/summary/',
+        EnquirySummary.as_view(),
+        name='enquiry-summary'
+        ),
+    path(
+        'enquiries/mark-checked/',
+        EnquiryMarkChecked.as_view(),
+        name='enquiry-mark-checked'
+        ),
     path(
         'enquiries/<int:pk>/',
         EnquiryDetail.as_view(),
@@ -1,18 +1,37 @@
-from django.db.models import Q
 from rest_framework import generics, permissions, filters
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
-from django_filters.rest_framework import DjangoFilterBackend
+from django_filters import rest_framework as django_filters
 from .serializers import EnquirySerializer, EnquiryResponseSerializer
 from .models import Enquiry
 from .permissions import IsBuyerOrArtist
 
 
+class EnquiryFilter(django_filters.FilterSet):
+    """
+    Filters for the enquiry list.
+
+    Filters:
+    - buyer: Enquiries made by the given user.
+    - artist: Enquiries received by the given user.
+    - artpiece__owner: Same as artist, kept for existing clients. Filters on
+    the artist column instead of joining artpieces.
+    """
+    artpiece__owner = django_filters.NumberFilter(field_name='artist')
+
+    class Meta:
+        model = Enquiry
+        fields = ['buyer', 'artist']
+
+
 class EnquiryList(generics.ListCreateAPIView):
     """
     API view for listing and creating enquiries.
 
-    Uses `EnquirySerializer` for serialization.
+    Uses `EnquirySerializer` for serialization. The buyer and artist, with
+    their profiles, are selected with the enquiries in a single joined
+    query, in each part of the inbox union.
 
     Permissions:
     - IsAuthenticatedOrReadOnly: Only authenticated users can create an
@@ -20,42 +39,38 @@ class EnquiryList(generics.ListCreateAPIView):
 
     Filter Backends:
     - DjangoFilterBackend: Allows filtering of enquiries based on specified
-    fields ('buyer', 'artpiece__owner').
+    fields, see `EnquiryFilter`.
     - OrderingFilter: Allows ordering of enquiries based on fields
     ('updated_on').
 
     Methods:
-    - get_queryset: Restricts the returned enquiries to those related to the
-    requesting user.
+    - filter_queryset: Applies the filters, then restricts the returned
+    enquiries to those related to the requesting user.
     - perform_create: Overrides the creation process to associate the enquiry
     with the authenticated user before saving.
     """
     serializer_class = EnquirySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Enquiry.objects.all().order_by('-updated_on')
+    queryset = Enquiry.objects.select_related(
+        'buyer__profile', 'artist__profile').order_by('-updated_on')
     filter_backends = [
-        DjangoFilterBackend,
+        django_filters.DjangoFilterBackend,
         filters.OrderingFilter,
     ]
-    filterset_fields = [
-        'buyer',
-        'artpiece__owner'
-    ]
+    filterset_class = EnquiryFilter
     ordering_fields = [
         'updated_on',
     ]
 
-    def get_queryset(self):
+    def filter_queryset(self, queryset):
         """
-        Restricts the returned enquiries to those related to the
-        requesting user (as a buyer, or artpiece owner).
+        Applies the filters and ordering, then restricts the returned
+        enquiries to those related to the requesting user (as a buyer, or
+        artist), see `Enquiry.inbox`. The inbox is a union, which cannot be
+        filtered further, so it is built last.
         """
-        user = self.request.user
-        queryset = super().get_queryset()
-
-        queryset = queryset.filter(Q(buyer=user) | Q(artpiece__owner=user))
-
-        return queryset
+        queryset = super().filter_queryset(queryset)
+        return Enquiry.inbox(self.request.user, queryset)
 
     def perform_create(self, serializer):
         """
@@ -70,10 +85,11 @@ class EnquiryDetail(generics.RetrieveUpdateDestroyAPIView):
     API view for retrieving, updating, and 'deleting' enquiries.
 
     Uses `EnquirySerializer` for read operations and
-    `EnquiryResponseSerializer` for update operations.
+    `EnquiryResponseSerializer` for update operations. The buyer and artist,
+    with their profiles, are selected with the enquiry.
 
     Permissions:
-    - IsBuyerOrArtist: Allows access only to the buyer or artpiece owner.
+    - IsBuyerOrArtist: Allows access only to the buyer or artist.
 
     Methods:
     - get_serializer_class: Determines which serializer to use based on the
@@ -83,10 +99,11 @@ class EnquiryDetail(generics.RetrieveUpdateDestroyAPIView):
     - update: Updates an enquiry with response and status, ensuring only the
     artist can update and only when the status is 'pending' (0).
     - perform_update: Saves the enquiry and resets the buyer's 'checked' status
-    - destroy: Soft deletes the enquiry by nullifying the buyer or artpiece
-    fields instead of actual deletion.
+    - destroy: Soft deletes the enquiry by nullifying the buyer, or the
+    artpiece and artist, fields instead of actual deletion.
     """
-    queryset = Enquiry.objects.all()
+    queryset = Enquiry.objects.select_related(
+        'buyer__profile', 'artist__profile')
     permission_classes = [IsBuyerOrArtist]
 
     def get_serializer_class(self):
@@ -101,27 +118,22 @@ class EnquiryDetail(generics.RetrieveUpdateDestroyAPIView):
     def get(self, request, *args, **kwargs):
         """
         Retrieves an enquiry and updates the 'checked' status for the buyer
-        or artist, based on who made the request.
+        or artist, based on who made the request. The status is only written
+        if it changes, see `Enquiry.mark_checked`.
 
         Annotates the artists email if the enquiry status is 'accepted' (1).
         """
         instance = self.get_object()
 
         # Set 'artist_has_checked' or 'buyer_has_checked'
-        request_user = self.request.user
-        if request_user == instance.buyer:
-            instance.buyer_has_checked = True
-        elif request_user == instance.artpiece.owner:
-            instance.artist_has_checked = True
-        # Save the updated instance
-        instance.save()
+        instance.mark_checked(self.request.user)
 
         serializer = self.get_serializer(instance)
         data = serializer.data
 
         # Annotate artist_email if status is accepted
-        if instance.status == 1:
-            data['artist_email'] = instance.artpiece.owner.email
+        if instance.status == 1 and instance.artist:
+            data['artist_email'] = instance.artist.email
 
         return Response(data)
 
@@ -133,7 +145,7 @@ class EnquiryDetail(generics.RetrieveUpdateDestroyAPIView):
         instance = self.get_object()
 
         # Ensure PUT request is coming from the artist
-        if request.user != instance.artpiece.owner:
+        if request.user != instance.artist:
             raise ValidationError(
                 "You do not have permission to update this enquiry."
                 )
@@ -149,22 +161,72 @@ class EnquiryDetail(generics.RetrieveUpdateDestroyAPIView):
         return Response(serializer.data)
 
     def perform_update(self, serializer):
-        """ Saves the enquiry and resets the buyer's 'checked' status """
-        instance = serializer.save()
-        instance.buyer_has_checked = False
-        instance.save()
+        """
+        Saves the enquiry and resets the buyer's 'checked' status, with a
+        single save.
+        """
+        serializer.save(buyer_has_checked=False)
 
     def destroy(self, request, *args, **kwargs):
         """
-        Soft deletes the enquiry by nullifying the buyer or artpiece
-        fields instead of actual deletion.
+        Soft deletes the enquiry by nullifying the buyer, or the artpiece
+        and artist, fields instead of actual deletion.
         """
         instance = self.get_object()
 
-        if request.user == instance.artpiece.owner:
+        if request.user == instance.artist:
             instance.artpiece = None
+            instance.artist = None
         elif request.user == instance.buyer:
             instance.buyer = None
 
         instance.save()
         return Response(status=204)
+
+
+class EnquirySummary(APIView):
+    """
+    API view returning the number of unread and pending enquiries of the
+    requesting user, as the buyer and as the artist, see
+    `Enquiry.get_summary`.
+
+    Lets the navbar poll for unread enquiries with a single aggregate query
+    instead of fetching the enquiry list.
+
+    Permissions:
+    - IsAuthenticated: Only authenticated users have enquiries.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """ Returns the enquiry counts of the requesting user. """
+        return Response(Enquiry.get_summary(request.user))
+
+
+class EnquiryMarkChecked(APIView):
+    """
+    API view marking the enquiries of the requesting user as checked, as
+    the buyer or the artist of each, with a single UPDATE, see
+    `Enquiry.mark_all_checked`.
+
+    Permissions:
+    - IsAuthenticated: Only authenticated users have enquiries.
+
+    Methods:
+    - post: Marks all the user's enquiries as checked, or only those whose
+    ids are given as `ids`, and returns the number updated.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Marks the user's enquiries as checked. Responds with 400 if `ids`
+        is given but is not a list of integers.
+        """
+        ids = request.data.get('ids')
+        if ids is not None and (
+                not isinstance(ids, list) or not all(
+                    isinstance(pk, int) for pk in ids)):
+            raise ValidationError({'ids': ['Expected a list of integers.']})
+        updated = Enquiry.mark_all_checked(request.user, ids)
+        return Response({'updated': updated})
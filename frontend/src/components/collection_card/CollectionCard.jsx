@@ -10,7 +10,7 @@ import { useNavigate } from "react-router-dom";
  *
  * Props:
  * - collection: Object containing collection details (id, is_owner, title, description,
- *   created_on, updated_on, artpieces).
+ *   created_on, updated_on, artpiece_count).
  * - handleDisplayContentChange: Function to handle displaying collection content.
  * - handleDeleteConfirm: Function to handle confirming deletion of the collection.
  * - listPage: Boolean indicating if the card is displayed on a list page.
@@ -34,7 +34,7 @@ const CollectionCard = ({
     description,
     created_on,
     updated_on,
-    artpieces,
+    artpiece_count,
   } = { ...collection };
   const navigate = useNavigate();
 
@@ -48,12 +48,12 @@ const CollectionCard = ({
         <div>
           <h5>{title}</h5>
           <p>{description}</p>
-          {artpieces.length === 0 ? (
+          {!artpiece_count ? (
             <p className="small mb-0">This collection contains no artpieces</p>
           ) : (
             <p className="small mb-0">
               This collection contains{" "}
-              <span className="fw-bold">{artpieces.length} artpieces</span>
+              <span className="fw-bold">{artpiece_count} artpieces</span>
             </p>
           )}
           <p className="small mb-0">
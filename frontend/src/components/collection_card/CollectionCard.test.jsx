@@ -17,10 +17,8 @@ const mockCollection = {
   description: "This is a test collection",
   created_on: "2022-01-01",
   updated_on: "2022-01-02",
-  artpieces: [
-    { id: 1, title: "Artpiece 1" },
-    { id: 2, title: "Artpiece 2" },
-  ],
+  artpiece_count: 2,
+  cover_images: [],
 };
 
 describe("CollectionCard component", () => {
@@ -39,6 +37,7 @@ describe("CollectionCard component", () => {
     expect(getByText("Test Collection")).toBeInTheDocument();
     expect(getByText("This is a test collection")).toBeInTheDocument();
     expect(getByText("Last updated: 2022-01-02")).toBeInTheDocument();
+    expect(getByText("2 artpieces")).toBeInTheDocument();
     expect(getByText("Show")).toBeInTheDocument();
   });
 
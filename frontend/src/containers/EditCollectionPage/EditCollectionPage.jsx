@@ -51,6 +51,7 @@ import NotFoundImg from "../../assets/images/notfound.webp";
  * API Calls:
  * - axiosReq.get(`/collections/${id}/`): Fetches the current collection data.
  * - axiosReq.get(`/artpieces/?owner=${collection.owner}`): Fetches the user's owned art pieces.
+ * - axiosReq.get(`/collections/${id}/artpieces/`): Fetches every page of the collection's art pieces, to preselect them.
  * - axiosReq.put(`/collections/${id}/`): Submits the updated collection data to the backend API.
  * - axiosReq.post(`/collections/${id}/update-artpieces/`): Submits the selected art pieces to be associated with the collection.
  *
@@ -90,7 +91,18 @@ const EditCollectionPage = ({ newCollection }) => {
           `/artpieces/?owner=${collection.owner}`
         );
         setOwnedArtpieces(artpieceData);
-        setSelectedArtpieces(collection.artpieces);
+        // The selection replaces the collection's artpieces on submit, so
+        // every page of them is loaded
+        const collectionArtpieceIds = [];
+        let next = `/collections/${id}/artpieces/`;
+        while (next) {
+          const { data } = await axiosReq.get(next);
+          data.results.forEach((artpiece) =>
+            collectionArtpieceIds.push(artpiece.id)
+          );
+          next = data.next;
+        }
+        setSelectedArtpieces(collectionArtpieceIds);
         setHasLoaded(true);
       } catch (err) {
         // Ignoring the error intentionally
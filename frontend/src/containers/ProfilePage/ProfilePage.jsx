@@ -41,6 +41,7 @@ import NotFoundImg from "../../assets/images/notfound.webp";
  * - profile: Stores the user's profile data.
  * - artpieces: Stores the user's art pieces data with support for infinite scrolling.
  * - collections: Stores the user's collections data.
+ * - collectionArtpieces: Stores the art pieces of the displayed collection, with support for infinite scrolling.
  * - displayContent: Determines whether to show art pieces, collections, or a specific collection's details.
  * - showDelete: Controls the visibility of the delete confirmation modal.
  * - collectionToDelete: Has the ID of the collection to be deleted.
@@ -57,6 +58,7 @@ import NotFoundImg from "../../assets/images/notfound.webp";
  * - axiosReq.get(`/profiles/${id}/`): Fetches the user's profile data.
  * - axiosReq.get(`/artpieces/?owner=${profileData.owner}`): Fetches the user's art pieces.
  * - axiosReq.get(`/collections/?owner=${profileData.owner}`): Fetches the user's collections.
+ * - axiosReq.get(`/collections/${displayContent.id}/artpieces/`): Fetches the art pieces of the displayed collection.
  * - axiosRes.delete(`/collections/${collectionToDelete}/`): Deletes the specified collection.
  *
  * @returns {JSX.Element} The ProfilePage component.
@@ -68,6 +70,9 @@ const ProfilePage = () => {
   const [profile, setProfile] = useState([]);
   const [artpieces, setArtpieces] = useState({ results: [] });
   const [collections, setCollections] = useState({ results: [] });
+  const [collectionArtpieces, setCollectionArtpieces] = useState({
+    results: [],
+  });
   const navigate = useNavigate();
   const [displayContent, setDisplayContent] = useState("artpieces");
   const [showDelete, setShowDelete] = useState(false);
@@ -109,6 +114,26 @@ const ProfilePage = () => {
     setHasLoaded(false);
   }, [id, navigate, currentUser, search]);
 
+  useEffect(() => {
+    const collectionId = displayContent?.id;
+    if (!collectionId) {
+      return;
+    }
+    const fetchCollectionArtpieces = async () => {
+      try {
+        const { data } = await axiosReq.get(
+          `/collections/${collectionId}/artpieces/`
+        );
+        setCollectionArtpieces(data);
+      } catch (err) {
+        // Ignoring the error intentionally
+      }
+    };
+
+    setCollectionArtpieces({ results: [] });
+    fetchCollectionArtpieces();
+  }, [displayContent?.id]);
+
   const handleEdit = () => {
     navigate(`/profiles/${profile.id}/edit`);
   };
@@ -317,23 +342,31 @@ const ProfilePage = () => {
                       handleDeleteConfirm={handleDeleteConfirm}
                     />
                   </Row>
-                  {displayContent.artpieces.length ? (
-                    <Row xs={2} md={3} lg={4} className="g-1 m-0 px-3 my-1">
-                      {artpieces.results
-                        .filter((artpiece) =>
-                          displayContent.artpieces.includes(artpiece.id)
+                  {collectionArtpieces.results.length ? (
+                    <InfiniteScroll
+                      dataLength={collectionArtpieces.results.length}
+                      next={() =>
+                        fetchMoreData(
+                          collectionArtpieces,
+                          setCollectionArtpieces
                         )
-                        .map((artpiece) => (
+                      }
+                      hasMore={!!collectionArtpieces.next}
+                      loader={<p>Loading...</p>}
+                    >
+                      <Row xs={2} md={3} lg={4} className="g-1 m-0 px-3 my-1">
+                        {collectionArtpieces.results.map((artpiece) => (
                           <Col key={artpiece.id}>
                             <ArtpieceSimple
                               className="h-100"
                               basic
                               {...artpiece}
-                              setArtpieces={setArtpieces}
+                              setArtpieces={setCollectionArtpieces}
                             />
                           </Col>
                         ))}
-                    </Row>
+                      </Row>
+                    </InfiniteScroll>
                   ) : (
                     <Container>
                       <Asset
@@ -0,0 +1,5 @@
+from django.contrib import admin
+from .models import ImageUpload
+
+
+admin.site.register(ImageUpload)
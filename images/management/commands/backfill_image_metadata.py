@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from artpieces.models import Artpiece
+from images.metadata import BATCH_SIZE, backfill_image_metadata
+from profiles.models import Profile
+
+
+class Command(BaseCommand):
+    """
+    Management command filling the image public id, width, height and format
+    columns of the artpieces and profiles stored before these were, with
+    the Cloudinary Admin API.
+
+    Usage:
+        python manage.py backfill_image_metadata [--batch-size 100]
+    """
+    help = 'Backfills the image metadata of artpieces and profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of images looked up per API call (100 at most).',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = min(options['batch_size'], BATCH_SIZE)
+        for model, field_name in [
+                (Artpiece, 'image'), (Profile, 'profile_image')]:
+            updated, missing = backfill_image_metadata(
+                model, field_name, batch_size)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural.capitalize()}: filled '
+                f'{updated} image(s), {missing} not found.'))
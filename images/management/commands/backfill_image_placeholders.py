@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from artpieces.models import Artpiece
+from images.placeholders import BACKFILL_WORKERS, backfill_image_placeholders
+from profiles.models import Profile
+
+
+class Command(BaseCommand):
+    """
+    Management command computing the placeholder and dominant color of the
+    artpiece and profile images stored before these were, downloading a
+    small variant of each image from Cloudinary, several images in parallel.
+
+    Usage:
+        python manage.py backfill_image_placeholders [--workers 8]
+    """
+    help = 'Backfills the image placeholders of artpieces and profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=BACKFILL_WORKERS,
+            help='Number of images processed in parallel.',
+        )
+
+    def handle(self, *args, **options):
+        for model, field_name in [
+                (Artpiece, 'image'), (Profile, 'profile_image')]:
+            filled, failed = backfill_image_placeholders(
+                model, field_name, options['workers'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural.capitalize()}: computed '
+                f'{filled} placeholder(s), {failed} failed.'))
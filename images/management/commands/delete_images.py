@@ -0,0 +1,42 @@
+import time
+from django.core.management.base import BaseCommand
+from images.outbox import BATCH_SIZE, drain_image_deletions
+
+
+class Command(BaseCommand):
+    """
+    Management command deleting the images recorded in the ImageDeletion
+    outbox from Cloudinary, in batches of up to 100 images per API call.
+
+    With --poll, the command keeps running and drains the outbox every N
+    seconds; otherwise it is meant to be scheduled.
+
+    Usage:
+        python manage.py delete_images [--batch-size 100] [--poll 60]
+    """
+    help = 'Deletes images recorded in the deletion outbox from Cloudinary.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of images deleted per API call (100 at most).',
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=0,
+            help='Keep running, draining the outbox every N seconds.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = min(options['batch_size'], BATCH_SIZE)
+        while True:
+            deleted, failed = drain_image_deletions(batch_size)
+            if deleted or failed or not options['poll']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Deleted {deleted} image(s), {failed} failed.'))
+            if not options['poll']:
+                break
+            time.sleep(options['poll'])
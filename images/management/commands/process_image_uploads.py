@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand
+from images.pipeline import claimable_uploads, process_image_upload
+
+
+class Command(BaseCommand):
+    """
+    Management command storing the spooled image uploads left pending, e.g.
+    by a web process restarted before its upload threads finished, or by
+    attempts that failed and are due a retry.
+
+    Uploads are processed oldest first. With --poll, the command keeps
+    running and checks for pending uploads every N seconds. It must run on a
+    host that shares the spool directory with the web processes.
+
+    Usage:
+        python manage.py process_image_uploads [--poll 5]
+    """
+    help = 'Stores pending spooled image uploads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=0,
+            help='Keep running, checking for uploads every N seconds.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            stored = 0
+            upload_ids = list(
+                claimable_uploads().values_list('pk', flat=True))
+            for upload_id in upload_ids:
+                if process_image_upload(upload_id):
+                    stored += 1
+            if upload_ids or not options['poll']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Stored {stored} of {len(upload_ids)} pending image '
+                    'upload(s).'))
+            if not options['poll']:
+                break
+            time.sleep(options['poll'])
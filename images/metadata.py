@@ -0,0 +1,127 @@
+import logging
+import cloudinary.api
+from PIL import Image
+from .outbox import get_public_id
+from .placeholders import PLACEHOLDER_FIELDS, set_image_placeholder
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+IMAGE_METADATA_FIELDS = [
+    'image_public_id', 'image_width', 'image_height', 'image_format']
+
+
+def read_image_metadata(path):
+    """
+    Returns the width, height and format of an image file, reading only its
+    header.
+
+    Args:
+        path: The path of the image file.
+
+    Returns:
+        dict: The `width`, `height` and (lowercase) `format` of the image.
+    """
+    with Image.open(path) as image:
+        width, height = image.size
+        image_format = (image.format or '').lower()
+    return {
+        'width': width,
+        'height': height,
+        'format': 'jpg' if image_format == 'jpeg' else image_format,
+    }
+
+
+def set_image_metadata(instance, metadata):
+    """
+    Sets the image metadata columns of an artpiece or profile.
+
+    Args:
+        instance: The Artpiece or Profile instance.
+        metadata: A dict with the `public_id`, `width`, `height` and `format`
+        of the image, as returned by the image storage backends. Missing keys
+        clear the matching column.
+
+    Returns:
+        list: The names of the metadata fields, to pass as `update_fields`.
+    """
+    instance.image_public_id = metadata.get('public_id') or ''
+    instance.image_width = metadata.get('width')
+    instance.image_height = metadata.get('height')
+    instance.image_format = metadata.get('format') or ''
+    return IMAGE_METADATA_FIELDS
+
+
+def clear_image_metadata(instance, update_fields=None):
+    """
+    Clears the image metadata and placeholder columns of an artpiece or
+    profile, when a new image was assigned without its metadata.
+
+    Args:
+        instance: The Artpiece or Profile instance.
+        update_fields: The `update_fields` of the save, if any.
+
+    Returns:
+        The `update_fields` extended with the cleared fields, or None.
+    """
+    set_image_metadata(instance, {})
+    set_image_placeholder(instance, {})
+    if update_fields is None:
+        return None
+    return [*update_fields, *IMAGE_METADATA_FIELDS, *PLACEHOLDER_FIELDS]
+
+
+def backfill_image_metadata(model, field_name, batch_size=BATCH_SIZE):
+    """
+    Fills the image metadata columns of the rows of `model` whose image
+    dimensions are unknown, with the Cloudinary Admin API, `batch_size`
+    images per call (100 at most).
+
+    The public id is derived from the image url, see
+    `images.outbox.get_public_id`, and stored even for images Cloudinary
+    does not know, which keep empty dimensions.
+
+    Args:
+        model: The Artpiece or Profile model.
+        field_name: The name of the image field on the model.
+        batch_size: The number of images looked up per API call.
+
+    Returns:
+        tuple: The number of rows whose dimensions were filled and the number
+        of images that could not be looked up.
+    """
+    updated, missing = 0, 0
+    last_pk = 0
+    field = model._meta.get_field(field_name)
+    while True:
+        rows = list(
+            model.objects.filter(image_width__isnull=True, pk__gt=last_pk)
+            .exclude(**{field_name: ''}).order_by('pk')
+            .only('pk', field_name, *IMAGE_METADATA_FIELDS)[:batch_size])
+        if not rows:
+            return updated, missing
+        last_pk = rows[-1].pk
+
+        for row in rows:
+            row.image_public_id = row.image_public_id or get_public_id(
+                field.value_from_object(row)) or ''
+        public_ids = sorted({
+            row.image_public_id for row in rows if row.image_public_id})
+        try:
+            resources = cloudinary.api.resources_by_ids(
+                public_ids, max_results=len(public_ids))['resources']
+        except Exception as error:
+            logger.warning('Looking up images failed: %s', error)
+            resources = []
+        by_public_id = {
+            resource['public_id']: resource for resource in resources}
+
+        for row in rows:
+            resource = by_public_id.get(row.image_public_id)
+            if resource is None:
+                missing += 1
+                continue
+            set_image_metadata(row, resource)
+            updated += 1
+        model.objects.bulk_update(rows, IMAGE_METADATA_FIELDS)
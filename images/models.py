@@ -0,0 +1,117 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+IMAGE_STATUS_CHOICES = [
+    ('ready', 'Ready'),
+    ('processing', 'Processing'),
+    ('failed', 'Failed'),
+]
+
+
+class ImageUpload(models.Model):
+    """
+    Represents an image waiting in the spool to be pushed to image storage.
+
+    An upload is created when an artpiece or profile image is submitted, and
+    deleted once the image has been stored and its url swapped into the
+    target instance.
+
+    Attributes:
+        - content_type (ForeignKey): The model of the instance the image
+        belongs to.
+        - object_id (PositiveBigIntegerField): The id of the instance the image
+        belongs to.
+        - target (GenericForeignKey): The instance the image belongs to.
+        - field_name (CharField): The name of the image field on the target.
+        - spool_path (CharField): The path of the spooled image file.
+        - status (IntegerField): The status of the upload, chosen from
+        predefined choices.
+        - attempts (PositiveSmallIntegerField): The number of failed attempts
+        to store the image.
+        - error (TextField): The error of the last failed attempt.
+        - created_on (DateTimeField): The date and time when the upload was
+        created. Automatically set on creation.
+        - claimed_on (DateTimeField): The date and time when a worker started
+        processing the upload, if one has.
+
+    Choices:
+        STATUS_CHOICES: Defines the status of the upload.
+            0 - Pending
+            1 - Failed
+
+    Meta:
+        ordering (list): Specifies the default ordering of the ImageUpload
+        objects. Ordered by creation date in ascending order.
+        indexes (list): Index on status and created_on for the worker queue.
+
+    Methods:
+        __str__: Returns a string representation of the ImageUpload instance,
+        including its target and field name.
+    """
+    PENDING = 0
+    FAILED = 1
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (FAILED, 'Failed'),
+    ]
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(max_length=50)
+    spool_path = models.CharField(max_length=255)
+    status = models.IntegerField(choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    claimed_on = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_on']
+        indexes = [
+            models.Index(
+                fields=['status', 'created_on'],
+                name='image_upload_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.content_type.model} {self.object_id} {self.field_name}'
+
+
+class ImageDeletion(models.Model):
+    """
+    Represents a Cloudinary image waiting to be deleted (an outbox entry).
+
+    Deletions are recorded in the same transaction as the change that
+    replaced or removed the image, so a rolled back change never deletes an
+    image, and are drained in batches by the `delete_images` management
+    command, see `images.outbox`.
+
+    Attributes:
+        - public_id (CharField): The Cloudinary public id of the image.
+        - created_on (DateTimeField): The date and time when the deletion was
+        recorded. Automatically set on creation.
+        - attempts (PositiveSmallIntegerField): The number of failed attempts
+        to delete the image.
+        - last_attempt_on (DateTimeField): The date and time of the last failed
+        attempt, if any.
+        - error (TextField): The error of the last failed attempt.
+
+    Meta:
+        ordering (list): Specifies the default ordering of the ImageDeletion
+        objects. Ordered by creation date in ascending order.
+
+    Methods:
+        __str__: Returns the public id of the image.
+    """
+    public_id = models.CharField(max_length=255)
+    created_on = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_attempt_on = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['created_on']
+
+    def __str__(self):
+        return self.public_id
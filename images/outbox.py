@@ -0,0 +1,117 @@
+import logging
+import re
+from datetime import timedelta
+import cloudinary.api
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import ImageDeletion
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=5)
+
+
+def get_public_id(image):
+    """
+    Returns the public id of a Cloudinary image, derived from its url: the
+    path after the upload type and version (or the last segment of the url)
+    without the extension. Returns None if the url has no such segment.
+
+    Used for images stored before their public id was, see
+    `images.metadata`.
+
+    Args:
+        image: A CloudinaryResource or an image url string.
+    """
+    url = image if isinstance(image, str) else image.url
+    match = re.search(r'/upload/(?:v\d+/+)?([^/].*)$', url or '') or \
+        re.search(r'/([^/]+)$', url or '')
+    if match:
+        return re.sub(r'\.[^./]+$', '', match.group(1))
+    return None
+
+
+def schedule_image_deletion(image, keep=(), public_id=None):
+    """
+    Records an image to be deleted from Cloudinary, in the current
+    transaction.
+
+    Args:
+        image: A CloudinaryResource or an image url string.
+        keep: Public ids that must never be deleted, such as default images.
+        public_id: The stored public id of the image, if known. Derived from
+        the image url otherwise.
+
+    Returns:
+        ImageDeletion: The recorded deletion, or None if the image has no
+        public id or is kept.
+    """
+    public_id = public_id or get_public_id(image)
+    if not public_id or public_id in keep:
+        return None
+    return ImageDeletion.objects.create(public_id=public_id)
+
+
+def due_deletions(now=None):
+    """
+    Returns the deletions to attempt: the ones not tried yet, and the failed
+    ones last tried more than RETRY_DELAY ago.
+    """
+    now = now or timezone.now()
+    return ImageDeletion.objects.filter(
+        Q(last_attempt_on__isnull=True)
+        | Q(last_attempt_on__lte=now - RETRY_DELAY),
+        attempts__lt=MAX_ATTEMPTS,
+    )
+
+
+def drain_image_deletions(batch_size=BATCH_SIZE, now=None):
+    """
+    Deletes the due images from Cloudinary with the bulk `delete_resources`
+    API, `batch_size` public ids per call (100 at most).
+
+    Deletions Cloudinary reports as deleted or not found are removed from
+    the outbox. The others, and every deletion of a batch whose API call
+    failed, are kept and retried after RETRY_DELAY, up to MAX_ATTEMPTS
+    times.
+
+    Args:
+        batch_size: The number of public ids deleted per API call.
+        now: The time to drain at, defaults to now.
+
+    Returns:
+        tuple: The number of images deleted and the number of failures.
+    """
+    now = now or timezone.now()
+    deleted, failed = 0, 0
+    last_pk = 0
+    while True:
+        batch = list(
+            due_deletions(now).filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'public_id')[:batch_size])
+        if not batch:
+            return deleted, failed
+        last_pk = batch[-1][0]
+        public_ids = sorted({public_id for _, public_id in batch})
+
+        try:
+            response = cloudinary.api.delete_resources(public_ids)
+            statuses = response.get('deleted', {})
+            error = 'Not deleted'
+        except Exception as exception:
+            logger.warning('Deleting images failed: %s', exception)
+            statuses = {}
+            error = str(exception)
+
+        done_ids = [
+            pk for pk, public_id in batch
+            if statuses.get(public_id) in ('deleted', 'not_found')
+        ]
+        failed_ids = [pk for pk, _ in batch if pk not in done_ids]
+        ImageDeletion.objects.filter(pk__in=done_ids).delete()
+        ImageDeletion.objects.filter(pk__in=failed_ids).update(
+            attempts=F('attempts') + 1, last_attempt_on=now, error=error)
+        deleted += len(done_ids)
+        failed += len(failed_ids)
@@ -0,0 +1,288 @@
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .metadata import set_image_metadata
+from .placeholders import compute_placeholder, set_image_placeholder
+from .models import ImageUpload
+from .outbox import schedule_image_deletion
+from .storage import get_image_storage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 5
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+_executor = None
+
+
+def enqueue_image_upload(instance, field_name, image):
+    """
+    Writes an uploaded image to the spool directory and queues it to be
+    stored, once the current transaction commits.
+
+    The instance's `image_status` should be set to 'processing' by the
+    caller; the worker sets it to 'ready' (or 'failed') when done.
+
+    Args:
+        instance: The saved model instance the image belongs to.
+        field_name: The name of the image field on the instance.
+        image: The uploaded file.
+
+    Returns:
+        ImageUpload: The queued upload.
+    """
+    return enqueue_image_uploads([(instance, image)], field_name)[0]
+
+
+def enqueue_image_uploads(uploads, field_name):
+    """
+    Writes uploaded images to the spool directory and queues them to be
+    stored concurrently by the worker threads, with a single INSERT, once
+    the current transaction commits. See `enqueue_image_upload`.
+
+    Args:
+        uploads: A list of (instance, image) pairs, each instance being a
+        saved model instance and image its uploaded file.
+        field_name: The name of the image field on the instances.
+
+    Returns:
+        list: The queued ImageUpload instances.
+    """
+    spool_dir = Path(settings.IMAGE_SPOOL_DIR)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    image_uploads = []
+    for instance, image in uploads:
+        suffix = Path(image.name or '').suffix.lower()
+        spool_path = spool_dir / f'{uuid.uuid4().hex}{suffix}'
+        image.seek(0)
+        with open(spool_path, 'wb') as spool_file:
+            for chunk in image.chunks():
+                spool_file.write(chunk)
+        image_uploads.append(ImageUpload(
+            target=instance,
+            field_name=field_name,
+            spool_path=str(spool_path),
+        ))
+
+    image_uploads = ImageUpload.objects.bulk_create(image_uploads)
+    upload_ids = [upload.pk for upload in image_uploads]
+    transaction.on_commit(lambda: [
+        submit_image_upload(upload_id) for upload_id in upload_ids])
+    return image_uploads
+
+
+def submit_image_upload(upload_id):
+    """
+    Processes an upload on the in-process worker threads, or right away if
+    `IMAGE_UPLOAD_WORKERS` is 0.
+    """
+    if not settings.IMAGE_UPLOAD_WORKERS:
+        process_image_upload(upload_id)
+        return
+    _get_executor().submit(_process_in_thread, upload_id)
+
+
+def submit_image_task(func, *args):
+    """
+    Runs an image processing function on the in-process worker threads, or
+    right away if `IMAGE_UPLOAD_WORKERS` is 0. Errors are logged.
+    """
+    if not settings.IMAGE_UPLOAD_WORKERS:
+        _run_logged(func, *args)
+        return
+    _get_executor().submit(_run_in_thread, func, *args)
+
+
+def _get_executor():
+    """ Returns the in-process worker threads, starting them if needed. """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_UPLOAD_WORKERS,
+            thread_name_prefix='image-upload')
+    return _executor
+
+
+def _process_in_thread(upload_id):
+    """
+    Processes an upload, retrying failed attempts every RETRY_DELAY seconds,
+    and closes the thread's database connections.
+    """
+    try:
+        while process_image_upload(upload_id) is False:
+            time.sleep(RETRY_DELAY)
+    except Exception:
+        logger.exception('Image upload %s failed', upload_id)
+    finally:
+        connections.close_all()
+
+
+def _run_in_thread(func, *args):
+    """ Runs a function and closes the thread's database connections. """
+    try:
+        _run_logged(func, *args)
+    finally:
+        connections.close_all()
+
+
+def _run_logged(func, *args):
+    """ Runs a function, logging its errors. """
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Image task %s failed', func.__name__)
+
+
+def claimable_uploads(now=None):
+    """
+    Returns the pending uploads not being processed, including the ones
+    claimed by a worker that did not finish within CLAIM_TIMEOUT.
+    """
+    now = now or timezone.now()
+    return ImageUpload.objects.filter(
+        Q(claimed_on__isnull=True) | Q(claimed_on__lt=now - CLAIM_TIMEOUT),
+        status=ImageUpload.PENDING,
+    )
+
+
+def process_image_upload(upload_id):
+    """
+    Stores a spooled image and swaps its url, metadata and placeholder into
+    the target instance.
+
+    The upload is claimed with a conditional UPDATE first, so that the
+    in-process workers and the `process_image_uploads` command never store
+    the same image twice. An upload superseded by a newer upload of the same
+    field is discarded, before and after storing the image: swapping in an
+    upload deletes the older uploads of the field, so an older upload
+    finishing last never overwrites a newer image, and its stored image is
+    recorded for deletion instead. Failed attempts are retried up to
+    MAX_ATTEMPTS times, after which the upload and the instance's
+    `image_status` are marked as failed. An image whose placeholder cannot
+    be computed is stored without one.
+
+    Args:
+        upload_id: The id of the ImageUpload.
+
+    Returns:
+        True if the image was stored, False if the attempt failed and will be
+        retried, and None if there was nothing to do.
+    """
+    now = timezone.now()
+    claimed = claimable_uploads(now).filter(pk=upload_id).update(
+        claimed_on=now)
+    if not claimed:
+        return None
+    upload = ImageUpload.objects.select_related('content_type').get(
+        pk=upload_id)
+    model = upload.content_type.model_class()
+
+    if _newer_uploads(upload).exists():
+        _discard(upload)
+        return None
+
+    # Computed before storing the image, so a failure only loses the
+    # placeholder, and never stores the image again on retry
+    try:
+        placeholder = compute_placeholder(upload.spool_path)
+    except Exception as error:
+        logger.warning(
+            'Computing the placeholder of image upload %s failed: %s',
+            upload.pk, error)
+        placeholder = {}
+
+    try:
+        stored = get_image_storage().upload(upload.spool_path)
+    except Exception as error:
+        logger.warning('Storing image upload %s failed: %s', upload.pk, error)
+        upload.attempts += 1
+        if upload.attempts >= MAX_ATTEMPTS:
+            upload.status = ImageUpload.FAILED
+        updated = ImageUpload.objects.filter(pk=upload.pk).update(
+            attempts=upload.attempts, error=str(error), claimed_on=None,
+            status=upload.status)
+        if not updated:
+            # Superseded by a newer upload stored in the meantime
+            _remove_spool_file(upload.spool_path)
+            return None
+        if upload.status == ImageUpload.FAILED:
+            model.objects.filter(pk=upload.object_id).update(
+                image_status='failed')
+            return None
+        return False
+
+    # The upload row is locked, so a newer upload of the same field being
+    # swapped in at the same time, which deletes the older uploads, waits
+    # for this transaction, and this upload then finds itself superseded
+    older = []
+    with transaction.atomic():
+        pending = ImageUpload.objects.select_for_update().filter(
+            pk=upload.pk).exists()
+        superseded = not pending or _newer_uploads(upload).exists()
+        if superseded:
+            schedule_image_deletion(
+                stored['url'], public_id=stored.get('public_id'))
+        else:
+            instance = model.objects.filter(pk=upload.object_id).first()
+            if instance is not None:
+                # Saving through the model deletes the image being replaced
+                setattr(instance, upload.field_name, stored['url'])
+                metadata_fields = set_image_metadata(instance, stored)
+                placeholder_fields = set_image_placeholder(
+                    instance, placeholder)
+                instance.image_status = 'ready'
+                instance.save(update_fields=[
+                    upload.field_name, 'image_status', *metadata_fields,
+                    *placeholder_fields])
+            older = list(_field_uploads(upload).filter(pk__lt=upload.pk))
+            ImageUpload.objects.filter(
+                pk__in=[older_upload.pk for older_upload in older]).delete()
+
+    _discard(upload)
+    if superseded:
+        return None
+    # The spooled files of older uploads being stored are removed by their
+    # worker, once it finds them superseded
+    now = timezone.now()
+    for older_upload in older:
+        if older_upload.claimed_on is None or (
+                older_upload.claimed_on < now - CLAIM_TIMEOUT):
+            _remove_spool_file(older_upload.spool_path)
+    return True
+
+
+def _field_uploads(upload):
+    """ Returns the uploads of the same instance field as an upload. """
+    return ImageUpload.objects.filter(
+        content_type_id=upload.content_type_id,
+        object_id=upload.object_id,
+        field_name=upload.field_name,
+    )
+
+
+def _newer_uploads(upload):
+    """ Returns the uploads superseding an upload. """
+    return _field_uploads(upload).filter(pk__gt=upload.pk)
+
+
+def _remove_spool_file(spool_path):
+    """ Deletes a spooled file, if it still exists. """
+    try:
+        os.remove(spool_path)
+    except FileNotFoundError:
+        pass
+
+
+def _discard(upload):
+    """ Deletes an upload and its spooled file. """
+    _remove_spool_file(upload.spool_path)
+    upload.delete()
@@ -0,0 +1,182 @@
+import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.request import urlopen
+from cloudinary.utils import cloudinary_url
+from django.db import connections, transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from PIL import Image
+from .variants import resolve_image
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_FIELDS = ['image_placeholder', 'image_color']
+PLACEHOLDER_SIZE = 16
+# Size of the Cloudinary variant downloaded to compute a placeholder
+SOURCE_SIZE = 64
+FETCH_TIMEOUT = 10
+BACKFILL_WORKERS = 8
+
+
+def compute_placeholder(file):
+    """
+    Computes a low-quality image placeholder (LQIP) and the dominant color
+    of an image.
+
+    JPEG images are decoded at a reduced scale, so the full size pixels are
+    never decoded.
+
+    Args:
+        file: The path of the image file, or a file object.
+
+    Returns:
+        dict: The `placeholder`, a data URI of a WebP image of at most
+        16x16px keeping the aspect ratio of the image, and the dominant
+        `color` as a hex string.
+    """
+    with Image.open(file) as image:
+        image.draft('RGB', (SOURCE_SIZE, SOURCE_SIZE))
+        image = image.convert('RGB')
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=40)
+    data = base64.b64encode(buffer.getvalue()).decode('ascii')
+
+    palette_image = image.quantize(colors=4)
+    _, index = max(palette_image.getcolors())
+    red, green, blue = palette_image.getpalette()[index * 3:index * 3 + 3]
+    return {
+        'placeholder': f'data:image/webp;base64,{data}',
+        'color': f'#{red:02x}{green:02x}{blue:02x}',
+    }
+
+
+def set_image_placeholder(instance, placeholder):
+    """
+    Sets the placeholder columns of an artpiece or profile.
+
+    Args:
+        instance: The Artpiece or Profile instance.
+        placeholder: A dict with the `placeholder` and `color` of the image,
+        as returned by `compute_placeholder`. Missing keys clear the matching
+        column.
+
+    Returns:
+        list: The names of the placeholder fields, to pass as
+        `update_fields`.
+    """
+    instance.image_placeholder = placeholder.get('placeholder') or ''
+    instance.image_color = placeholder.get('color') or ''
+    return PLACEHOLDER_FIELDS
+
+
+def fetch_placeholder(image, public_id=''):
+    """
+    Computes the placeholder of an image stored on Cloudinary, from a
+    64px variant of the image, so only a few kilobytes are downloaded.
+
+    Args:
+        image: A CloudinaryResource or an image url string.
+        public_id: The stored public id of the image, if known.
+
+    Returns:
+        dict: The placeholder, see `compute_placeholder`, or None if the
+        image is not stored on Cloudinary.
+    """
+    _, public_id, version = resolve_image(image, public_id)
+    if public_id is None:
+        return None
+    url, _ = cloudinary_url(
+        public_id, version=version, secure=True, format='jpg',
+        width=SOURCE_SIZE, height=SOURCE_SIZE, crop='limit')
+    with urlopen(url, timeout=FETCH_TIMEOUT) as response:
+        return compute_placeholder(BytesIO(response.read()))
+
+
+def fill_image_placeholder(model, pk, field_name):
+    """
+    Computes and stores the placeholder of an artpiece or profile image
+    stored on Cloudinary, with a single UPDATE, unless the image has changed
+    in the meantime.
+
+    Args:
+        model: The Artpiece or Profile model.
+        pk: The id of the instance.
+        field_name: The name of the image field on the model.
+
+    Returns:
+        bool: True if the placeholder was stored.
+    """
+    # The stored value is read as is, to compare it when updating
+    row = model.objects.filter(pk=pk).values(
+        'image_public_id', stored=Cast(field_name, CharField())).first()
+    if row is None:
+        return False
+    image = model._meta.get_field(field_name).to_python(row['stored'])
+    placeholder = fetch_placeholder(image, row['image_public_id'])
+    if placeholder is None:
+        return False
+    return bool(model.objects.filter(
+        pk=pk, **{field_name: row['stored']}).update(
+            image_placeholder=placeholder['placeholder'],
+            image_color=placeholder['color']))
+
+
+def schedule_image_placeholder(instance, field_name):
+    """
+    Computes the placeholder of an image uploaded directly to Cloudinary on
+    the image worker threads, once the current transaction commits, see
+    `images.pipeline.submit_image_task`.
+    """
+    from .pipeline import submit_image_task
+
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: submit_image_task(
+        fill_image_placeholder, model, pk, field_name))
+
+
+def backfill_image_placeholders(model, field_name, workers=BACKFILL_WORKERS):
+    """
+    Computes the placeholders of the artpieces or profiles that have none,
+    `workers` images at a time (one at a time, in the calling thread, if
+    `workers` is 1).
+
+    Args:
+        model: The Artpiece or Profile model.
+        field_name: The name of the image field on the model.
+        workers: The number of images processed in parallel.
+
+    Returns:
+        tuple: The number of placeholders stored and the number of images
+        that failed.
+    """
+    pks = list(
+        model.objects.filter(image_placeholder='')
+        .exclude(**{field_name: ''}).order_by('pk')
+        .values_list('pk', flat=True))
+
+    def fill(pk):
+        try:
+            return fill_image_placeholder(model, pk, field_name)
+        except Exception as error:
+            logger.warning(
+                'Computing the placeholder of %s %s failed: %s',
+                model._meta.model_name, pk, error)
+            return False
+
+    def fill_in_thread(pk):
+        try:
+            return fill(pk)
+        finally:
+            connections.close_all()
+
+    if workers <= 1:
+        results = [fill(pk) for pk in pks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(fill_in_thread, pks))
+    filled = sum(results)
+    return filled, len(results) - filled
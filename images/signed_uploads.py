@@ -0,0 +1,140 @@
+import logging
+import time
+import cloudinary
+import cloudinary.api
+from cloudinary.exceptions import Error as CloudinaryError, NotFound
+from cloudinary.utils import api_sign_request, verify_api_response_signature
+from rest_framework import serializers
+from .outbox import schedule_image_deletion
+from .validators import MAX_IMAGE_DIMENSION, MAX_IMAGE_SIZE, SIZE_ERROR
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = ['jpg', 'png', 'webp']
+UPLOAD_FOLDER = 'viridian/users'
+
+# Cloudinary rejects upload signatures older than an hour
+SIGNATURE_MAX_AGE = 60 * 60
+
+
+def get_upload_folder(user):
+    """ Returns the Cloudinary folder a user's direct uploads go to. """
+    return f'{UPLOAD_FOLDER}/{user.pk}'
+
+
+def build_signed_upload_params(user, now=None):
+    """
+    Returns the parameters for uploading an image straight from the browser
+    to Cloudinary, signed with the API secret.
+
+    The signature pins the upload to the user's folder and to the allowed
+    formats, and applies an incoming transformation limiting the stored
+    image to 2000x2000px, so the constraints cannot be changed by the
+    client. Cloudinary rejects the signature after an hour.
+
+    Cloudinary's upload API has no parameter limiting the size of the
+    uploaded file in bytes (upload presets cannot set one either, only the
+    account plan does), so the 2MB limit cannot be signed. It is enforced by
+    `SignedUploadField` instead, which looks up the size of the stored image
+    when the upload result is submitted.
+
+    Args:
+        user: The user uploading the image.
+        now: Optional unix timestamp to sign, defaults to now.
+
+    Returns:
+        dict: The signed parameters, with the API key, cloud name and upload
+        url needed by the client.
+    """
+    config = cloudinary.config()
+    params = {
+        'timestamp': int(now or time.time()),
+        'folder': get_upload_folder(user),
+        'allowed_formats': ','.join(ALLOWED_FORMATS),
+        'transformation':
+            f'c_limit,h_{MAX_IMAGE_DIMENSION},w_{MAX_IMAGE_DIMENSION}',
+    }
+    params['signature'] = api_sign_request(params, config.api_secret)
+    params['api_key'] = config.api_key
+    params['upload_url'] = 'https://api.cloudinary.com/v1_1/' \
+        f'{config.cloud_name}/image/upload'
+    return params
+
+
+class SignedUploadField(serializers.Field):
+    """
+    Serializer field accepting the result of a direct Cloudinary upload,
+    as an object with the `public_id`, `version`, `signature` and `format`,
+    and optionally the `width` and `height`, returned by Cloudinary.
+
+    The response signature is verified with the API secret, and the image
+    must be in the requesting user's upload folder, so only images uploaded
+    with parameters from `build_signed_upload_params` are accepted. The
+    signature does not cover the dimensions, which are only used as layout
+    hints. Returns a dict with the secure `url` of the image and its
+    metadata, see `images.metadata`.
+
+    The size of the stored image is looked up with the Admin API, as the
+    upload signature cannot limit it, and images over 2MB are rejected and
+    scheduled for deletion.
+    """
+    default_error_messages = {
+        'invalid': 'Expected an object with public_id, version, signature '
+                   'and format.',
+        'format': 'Image format must be one of: {formats}.',
+        'signature': 'The upload signature is not valid.',
+        'dimensions': 'Image width and height must be positive integers.',
+        'missing': 'The uploaded image was not found.',
+        'size': SIZE_ERROR,
+        'unverified': 'The upload could not be verified, please try again.',
+    }
+
+    def to_internal_value(self, data):
+        try:
+            public_id = str(data['public_id'])
+            version = str(data['version'])
+            signature = str(data['signature'])
+            image_format = str(data['format']).lower()
+        except (KeyError, TypeError):
+            self.fail('invalid')
+
+        if image_format not in ALLOWED_FORMATS:
+            self.fail('format', formats=', '.join(ALLOWED_FORMATS))
+        user = self.context['request'].user
+        if not public_id.startswith(f'{get_upload_folder(user)}/') or \
+                not verify_api_response_signature(
+                    public_id, version, signature):
+            self.fail('signature')
+
+        try:
+            width, height = [
+                int(data[name]) if data.get(name) is not None else None
+                for name in ['width', 'height']]
+        except (TypeError, ValueError):
+            self.fail('dimensions')
+        if any(size is not None and size < 1 for size in [width, height]):
+            self.fail('dimensions')
+
+        url, _ = cloudinary.utils.cloudinary_url(
+            public_id, version=version, format=image_format, secure=True)
+        try:
+            size = cloudinary.api.resource(public_id)['bytes']
+        except NotFound:
+            self.fail('missing')
+        except (CloudinaryError, KeyError) as error:
+            logger.warning('Looking up upload %s failed: %s', public_id, error)
+            self.fail('unverified')
+        if size > MAX_IMAGE_SIZE:
+            schedule_image_deletion(url, public_id=public_id)
+            self.fail('size')
+
+        return {
+            'url': url,
+            'public_id': public_id,
+            'width': width,
+            'height': height,
+            'format': image_format,
+        }
+
+    def to_representation(self, value):
+        return value['url']
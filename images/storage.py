@@ -0,0 +1,57 @@
+import shutil
+from pathlib import Path
+import cloudinary.uploader
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .metadata import read_image_metadata
+
+
+class BaseImageStorage:
+    """
+    Interface of the image storage backends used by the upload pipeline.
+
+    Methods:
+        upload: Stores the image file at the given path and returns a dict
+        with its `url`, and the `public_id`, `width`, `height` and `format`
+        stored alongside it, see `images.metadata`.
+    """
+    def upload(self, path):
+        raise NotImplementedError
+
+
+class CloudinaryImageStorage(BaseImageStorage):
+    """
+    Stores images on Cloudinary, returning their secure url and the metadata
+    from the upload response.
+    """
+    def upload(self, path):
+        upload_data = cloudinary.uploader.upload(str(path), secure=True)
+        return {
+            'url': upload_data['secure_url'],
+            'public_id': upload_data['public_id'],
+            'width': upload_data.get('width'),
+            'height': upload_data.get('height'),
+            'format': upload_data.get('format', ''),
+        }
+
+
+class LocalImageStorage(BaseImageStorage):
+    """
+    Stores images in `IMAGE_LOCAL_STORAGE_DIR`, served under
+    `MEDIA_URL`. Stands in for Cloudinary in tests and offline development.
+    """
+    def upload(self, path):
+        path = Path(path)
+        location = Path(settings.IMAGE_LOCAL_STORAGE_DIR)
+        location.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, location / path.name)
+        return {
+            'url': f'{settings.MEDIA_URL}{path.name}',
+            'public_id': path.stem,
+            **read_image_metadata(path),
+        }
+
+
+def get_image_storage():
+    """ Returns an instance of the `IMAGE_STORAGE_BACKEND` setting. """
+    return import_string(settings.IMAGE_STORAGE_BACKEND)()
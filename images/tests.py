@@ -0,0 +1,704 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+import cloudinary
+from cloudinary.utils import api_sign_request
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import MemoryFileUploadHandler
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import override_settings
+from django.utils import timezone
+from users.models import CustomUser
+from artpieces.models import Artpiece
+from .models import ImageDeletion, ImageUpload
+from .outbox import (
+    RETRY_DELAY, drain_image_deletions, schedule_image_deletion)
+from .pipeline import MAX_ATTEMPTS, process_image_upload
+from .signed_uploads import get_upload_folder
+from .storage import LocalImageStorage
+from .validators import INVALID_ERROR, MAX_IMAGE_SIZE, SIZE_ERROR
+from .variants import _variant_urls, get_image_variants
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+def make_image_file(name='test_image.jpg', size=(20, 20), color='green'):
+    """ Returns an uploaded JPEG file generated in memory. """
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='JPEG')
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def assert_color_close(test, hex_color, rgb, tolerance=8):
+    """ Asserts a hex color string is within a tolerance of an RGB tuple. """
+    channels = [int(hex_color[i:i + 2], 16) for i in (1, 3, 5)]
+    for channel, expected in zip(channels, rgb):
+        test.assertLessEqual(abs(channel - expected), tolerance, hex_color)
+
+
+class ImagePipelineTests(APITestCase):
+    """
+    Test suite for the asynchronous image upload pipeline, using the local
+    storage backend instead of Cloudinary.
+    """
+
+    def setUp(self):
+        """
+        Set up temporary spool and storage directories, processing uploads
+        on commit, and log in a test user.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        settings_override = override_settings(
+            IMAGE_STORAGE_BACKEND='images.storage.LocalImageStorage',
+            IMAGE_SPOOL_DIR=os.path.join(self.tmp_dir, 'spool'),
+            IMAGE_LOCAL_STORAGE_DIR=os.path.join(self.tmp_dir, 'media'),
+            IMAGE_UPLOAD_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.test_user = CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass')
+        self.client.login(email='test@test.com', password='testpass')
+
+    def _spooled_files(self):
+        """ Returns the names of the files in the spool directory. """
+        return os.listdir(os.path.join(self.tmp_dir, 'spool'))
+
+    def _stored_files(self):
+        """ Returns the names of the files in the storage directory. """
+        return os.listdir(os.path.join(self.tmp_dir, 'media'))
+
+    def test_create_artpiece_returns_before_image_is_stored(self):
+        """
+        Asserts an artpiece is created in the 'processing' state with its
+        image spooled, and that the image is stored and swapped in once the
+        transaction commits.
+        """
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title', 'image': make_image_file()},
+                format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['image_status'], 'processing')
+        self.assertEqual(len(self._spooled_files()), 1)
+
+        for callback in callbacks:
+            callback()
+        artpiece = Artpiece.objects.get(pk=response.data['id'])
+        self.assertEqual(artpiece.image_status, 'ready')
+        self.assertTrue(str(artpiece.image).startswith('/media/'))
+        self.assertEqual(self._spooled_files(), [])
+        self.assertFalse(ImageUpload.objects.exists())
+
+    def test_update_profile_image_keeps_image_until_stored(self):
+        """
+        Asserts a new profile image is queued, and replaces the current image
+        once stored.
+        """
+        profile = self.test_user.profile
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f'/api/profiles/{profile.id}/',
+                {'name': profile.name, 'profile_image': make_image_file()},
+                format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['image_status'], 'processing')
+        profile.refresh_from_db()
+        self.assertEqual(profile.image_status, 'ready')
+        self.assertTrue(str(profile.profile_image).startswith('/media/'))
+
+    def test_failed_uploads_are_retried_then_marked_failed(self):
+        """
+        Asserts a failing storage backend leaves the upload pending for
+        retries, and marks the upload and the artpiece as failed after
+        MAX_ATTEMPTS attempts.
+        """
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title', 'image': make_image_file()},
+                format='multipart')
+        upload = ImageUpload.objects.get()
+
+        with patch('images.storage.LocalImageStorage.upload',
+                   side_effect=OSError('storage unavailable')), \
+                self.assertLogs('images.pipeline', 'WARNING'):
+            self.assertIs(process_image_upload(upload.pk), False)
+            for _ in range(MAX_ATTEMPTS - 1):
+                call_command('process_image_uploads', stdout=StringIO())
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, ImageUpload.FAILED)
+        self.assertEqual(upload.attempts, MAX_ATTEMPTS)
+        self.assertEqual(
+            Artpiece.objects.get(pk=response.data['id']).image_status,
+            'failed')
+
+    def test_placeholder_failure_does_not_fail_upload(self):
+        """
+        Asserts an image whose placeholder cannot be computed is stored once,
+        without a placeholder, instead of being retried.
+        """
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title', 'image': make_image_file()},
+                format='multipart')
+        upload = ImageUpload.objects.get()
+
+        with patch('images.pipeline.compute_placeholder',
+                   side_effect=OSError('cannot identify image file')), \
+                self.assertLogs('images.pipeline', 'WARNING'):
+            self.assertIs(process_image_upload(upload.pk), True)
+
+        self.assertEqual(len(self._stored_files()), 1)
+        self.assertFalse(ImageUpload.objects.exists())
+        artpiece = Artpiece.objects.get(pk=response.data['id'])
+        self.assertEqual(artpiece.image_status, 'ready')
+        self.assertEqual(artpiece.image_placeholder, '')
+
+    def test_command_stores_pending_uploads(self):
+        """
+        Asserts the process_image_uploads command stores uploads left
+        pending, and that a superseded upload is discarded.
+        """
+        artpiece = Artpiece.objects.create(
+            owner=self.test_user, title='test title')
+        url = f'/api/artpieces/{artpiece.id}/'
+        with self.captureOnCommitCallbacks():
+            for _ in range(2):
+                self.client.put(
+                    url,
+                    {'title': 'test title', 'image': make_image_file()},
+                    format='multipart')
+        self.assertEqual(ImageUpload.objects.count(), 2)
+        newest = ImageUpload.objects.last()
+
+        out = StringIO()
+        call_command('process_image_uploads', stdout=out)
+
+        self.assertIn('Stored 1 of 2', out.getvalue())
+        self.assertFalse(ImageUpload.objects.exists())
+        artpiece.refresh_from_db()
+        self.assertEqual(artpiece.image_status, 'ready')
+        spool_name = os.path.basename(newest.spool_path)
+        self.assertEqual(
+            str(artpiece.image), f'/media/{os.path.splitext(spool_name)[0]}')
+
+    def test_older_upload_finishing_last_is_discarded(self):
+        """
+        Asserts an upload superseded while its image was being stored does
+        not replace the newer image, and that its stored image is recorded
+        for deletion.
+        """
+        artpiece = Artpiece.objects.create(
+            owner=self.test_user, title='test title')
+        url = f'/api/artpieces/{artpiece.id}/'
+        with self.captureOnCommitCallbacks():
+            self.client.put(
+                url, {'title': 'test title', 'image': make_image_file()},
+                format='multipart')
+        older = ImageUpload.objects.get()
+        upload = LocalImageStorage.upload
+
+        def upload_slowly(storage, path):
+            # A newer image is uploaded and stored meanwhile
+            if path == older.spool_path:
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.client.put(
+                        url,
+                        {'title': 'test title', 'image': make_image_file()},
+                        format='multipart')
+            return upload(storage, path)
+
+        with patch.object(LocalImageStorage, 'upload', upload_slowly):
+            self.assertIsNone(process_image_upload(older.pk))
+
+        artpiece.refresh_from_db()
+        older_name = os.path.splitext(os.path.basename(older.spool_path))[0]
+        self.assertNotEqual(str(artpiece.image), f'/media/{older_name}')
+        self.assertEqual(artpiece.image_status, 'ready')
+        self.assertEqual(ImageDeletion.objects.get().public_id, older_name)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertEqual(self._spooled_files(), [])
+
+    def test_image_metadata_is_stored_with_image(self):
+        """
+        Asserts the public id, dimensions and format of a stored image are
+        saved, and the dimensions exposed by the API.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title',
+                 'image': make_image_file(size=(30, 20))},
+                format='multipart')
+        upload_name = self._stored_files()[0]
+
+        artpiece = Artpiece.objects.get(pk=response.data['id'])
+        self.assertEqual(
+            artpiece.image_public_id, os.path.splitext(upload_name)[0])
+        self.assertEqual(artpiece.image_format, 'jpg')
+        response = self.client.get(f'/api/artpieces/{artpiece.id}/')
+        self.assertEqual(
+            (response.data['image_width'], response.data['image_height']),
+            (30, 20))
+
+    def test_placeholder_is_computed_when_stored(self):
+        """
+        Asserts a small placeholder and the dominant color of a stored image
+        are saved and exposed by the API.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title',
+                 'image': make_image_file(size=(400, 200), color='red')},
+                format='multipart')
+
+        response = self.client.get(f'/api/artpieces/{response.data["id"]}/')
+        placeholder = response.data['image_placeholder']
+        self.assertTrue(placeholder.startswith('data:image/webp;base64,'))
+        self.assertLess(len(placeholder), 500)
+        assert_color_close(self, response.data['image_color'], (255, 0, 0))
+
+
+class ImageDeletionOutboxTests(APITestCase):
+    """
+    Test suite for the image deletion outbox and the delete_images command.
+    """
+
+    def _delete_resources(self, public_ids, **options):
+        """
+        Stands in for `cloudinary.api.delete_resources`, failing to delete
+        the public ids starting with 'stuck'.
+        """
+        self.api_calls.append(public_ids)
+        return {'deleted': {
+            public_id: 'rate_limited' if public_id.startswith('stuck')
+            else 'deleted'
+            for public_id in public_ids
+        }}
+
+    def setUp(self):
+        """ Record the calls made to the stand-in delete API. """
+        self.api_calls = []
+
+    def test_deletion_rolls_back_with_transaction(self):
+        """
+        Asserts a deletion recorded in a transaction that rolls back is not
+        kept.
+        """
+        try:
+            with transaction.atomic():
+                schedule_image_deletion(
+                    'https://res.cloudinary.com/demo/image/upload/v1/a.jpg')
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        self.assertFalse(ImageDeletion.objects.exists())
+
+    def test_default_images_are_kept(self):
+        """ Asserts images listed in `keep` are never recorded. """
+        schedule_image_deletion('default_t6trzy', keep=['default_t6trzy'])
+        schedule_image_deletion(
+            'https://res.cloudinary.com/demo/image/upload/default_t6trzy',
+            keep=['default_t6trzy'])
+        self.assertFalse(ImageDeletion.objects.exists())
+
+    def test_stored_public_id_is_deleted(self):
+        """
+        Asserts replacing an image records the deletion of its stored public
+        id, including its folder, and clears the metadata of the old image.
+        """
+        owner = CustomUser.objects.create_user(
+            email='test@test.com', password='testpass')
+        artpiece = Artpiece.objects.create(
+            owner=owner, title='test title',
+            image='https://res.cloudinary.com/demo/image/upload/v1/a/b.jpg',
+            image_public_id='a/b', image_width=10, image_height=10)
+
+        artpiece.image = 'https://res.cloudinary.com/demo/image/upload/c.jpg'
+        artpiece.save(update_fields=['image'])
+
+        self.assertEqual(ImageDeletion.objects.get().public_id, 'a/b')
+        artpiece.refresh_from_db()
+        self.assertEqual(artpiece.image_public_id, '')
+        self.assertIsNone(artpiece.image_width)
+
+    def test_deletions_are_drained_in_batches(self):
+        """
+        Asserts 250 deletions cost 3 API calls, and that the deleted images
+        are removed from the outbox.
+        """
+        ImageDeletion.objects.bulk_create([
+            ImageDeletion(public_id=f'image{i}') for i in range(250)])
+
+        with patch('cloudinary.api.delete_resources',
+                   side_effect=self._delete_resources):
+            out = StringIO()
+            call_command('delete_images', stdout=out)
+
+        self.assertEqual([len(ids) for ids in self.api_calls], [100, 100, 50])
+        self.assertIn('Deleted 250 image(s), 0 failed', out.getvalue())
+        self.assertFalse(ImageDeletion.objects.exists())
+
+    def test_failed_deletions_are_retried_later(self):
+        """
+        Asserts deletions that failed, by API error or by status, are kept
+        with their attempt counted, and only retried after RETRY_DELAY.
+        """
+        ImageDeletion.objects.create(public_id='stuck1')
+        ImageDeletion.objects.create(public_id='image1')
+        with patch('cloudinary.api.delete_resources',
+                   side_effect=self._delete_resources):
+            self.assertEqual(drain_image_deletions(), (1, 1))
+            self.assertEqual(drain_image_deletions(), (0, 0))
+
+        with patch('cloudinary.api.delete_resources',
+                   side_effect=OSError('unavailable')), \
+                self.assertLogs('images.outbox', 'WARNING'):
+            later = timezone.now() + RETRY_DELAY
+            self.assertEqual(drain_image_deletions(now=later), (0, 1))
+
+        deletion = ImageDeletion.objects.get()
+        self.assertEqual(deletion.public_id, 'stuck1')
+        self.assertEqual(deletion.attempts, 2)
+        self.assertEqual(deletion.error, 'unavailable')
+
+
+class ImageUploadValidationTests(APITestCase):
+    """
+    Test suite for the upload handler and the header-only image validation
+    shared by the artpiece and profile serializers.
+    """
+
+    def setUp(self):
+        """ Set up and log in a test user. """
+        self.test_user = CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass')
+        self.client.login(email='test@test.com', password='testpass')
+
+    def test_oversize_upload_is_rejected_while_streaming(self):
+        """
+        Asserts a file over 2MB is rejected with a size error, and that no
+        more than 2MB of it reaches the buffering upload handler.
+        """
+        received = []
+        receive_data_chunk = MemoryFileUploadHandler.receive_data_chunk
+
+        def spy(handler, raw_data, start):
+            received.append(len(raw_data))
+            return receive_data_chunk(handler, raw_data, start)
+
+        oversize_file = SimpleUploadedFile(
+            'large.jpg', os.urandom(MAX_IMAGE_SIZE + 1),
+            content_type='image/jpeg')
+        with patch.object(
+                MemoryFileUploadHandler, 'receive_data_chunk', spy):
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title', 'image': oversize_file},
+                format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['image'], [SIZE_ERROR])
+        self.assertLessEqual(sum(received), MAX_IMAGE_SIZE)
+        self.assertFalse(Artpiece.objects.exists())
+
+    def test_dimensions_are_checked_without_decoding(self):
+        """
+        Asserts an image wider than 2000px is rejected without its pixel data
+        being loaded.
+        """
+        wide_image = make_image_file(size=(2001, 10))
+        with patch.object(Image.Image, 'load',
+                          side_effect=AssertionError('pixels decoded')):
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title', 'image': wide_image},
+                format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['image'], ['Image width larger than 2000px!'])
+
+    def test_profile_image_must_be_an_image(self):
+        """
+        Asserts the profile serializer applies the same validation, rejecting
+        a file that is not an image.
+        """
+        profile = self.test_user.profile
+        response = self.client.put(
+            f'/api/profiles/{profile.id}/',
+            {'name': profile.name,
+             'profile_image': SimpleUploadedFile('notes.jpg', b'not an image')},
+            format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['profile_image'], [INVALID_ERROR])
+
+
+class SignedUploadTests(APITestCase):
+    """
+    Test suite for direct uploads to Cloudinary, signed by the API.
+    """
+
+    def setUp(self):
+        """
+        Set up test Cloudinary credentials, and log in a test user.
+        """
+        config = cloudinary.config()
+        for name, value in [('api_key', 'key'), ('api_secret', 'secret')]:
+            config_patch = patch.object(config, name, value, create=True)
+            config_patch.start()
+            self.addCleanup(config_patch.stop)
+        resource_patch = patch(
+            'cloudinary.api.resource', return_value={'bytes': 1024})
+        self.resource = resource_patch.start()
+        self.addCleanup(resource_patch.stop)
+
+        self.test_user = CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass')
+        self.client.login(email='test@test.com', password='testpass')
+
+    def _upload_result(self, public_id=None, version='1700000000'):
+        """ Returns a direct upload result signed like Cloudinary does. """
+        public_id = public_id or f'{get_upload_folder(self.test_user)}/art'
+        return {
+            'public_id': public_id,
+            'version': version,
+            'format': 'jpg',
+            'width': 400,
+            'height': 300,
+            'signature': api_sign_request(
+                {'public_id': public_id, 'version': version}, 'secret'),
+        }
+
+    def test_upload_signature_requires_login(self):
+        """
+        Asserts a logged out user cannot get upload parameters, and that the
+        parameters of a logged in user are signed for their folder.
+        """
+        self.client.logout()
+        response = self.client.post('/api/images/upload-signature/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.login(email='test@test.com', password='testpass')
+        response = self.client.post('/api/images/upload-signature/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        params = {
+            name: response.data[name] for name in
+            ['timestamp', 'folder', 'allowed_formats', 'transformation']}
+        self.assertEqual(
+            params['folder'], get_upload_folder(self.test_user))
+        self.assertEqual(
+            response.data['signature'], api_sign_request(params, 'secret'))
+
+    @override_settings(IMAGE_UPLOAD_WORKERS=0)
+    def test_create_artpiece_from_signed_upload(self):
+        """
+        Asserts an artpiece created from a direct upload is ready right away,
+        without an image going through the API, and its placeholder computed
+        from a small variant once created.
+        """
+        variant = make_image_file(size=(64, 48), color='blue')
+        with patch('images.placeholders.urlopen',
+                   return_value=variant) as urlopen, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title',
+                 'image_upload': self._upload_result()},
+                format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['image_status'], 'ready')
+        self.assertIn(
+            'v1700000000/viridian/users/', response.data['image_url'])
+        self.assertEqual(
+            (response.data['image_width'], response.data['image_height']),
+            (400, 300))
+        artpiece = Artpiece.objects.get()
+        self.assertEqual(
+            artpiece.image_public_id,
+            f'{get_upload_folder(self.test_user)}/art')
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertIn('/c_limit,h_64,w_64/', urlopen.call_args.args[0])
+        assert_color_close(self, artpiece.image_color, (0, 0, 255))
+
+    def test_forged_uploads_are_rejected(self):
+        """
+        Asserts a direct upload with a bad signature, or outside the user's
+        folder, is rejected.
+        """
+        forged = self._upload_result()
+        forged['signature'] = 'forged'
+        foreign = self._upload_result(public_id='viridian/users/0/art')
+
+        for upload_result in [forged, foreign]:
+            response = self.client.post(
+                '/api/artpieces/',
+                {'title': 'a test title', 'image_upload': upload_result},
+                format='json')
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('image_upload', response.data)
+        self.assertFalse(Artpiece.objects.exists())
+
+    def test_oversize_uploads_are_rejected(self):
+        """
+        Asserts a direct upload larger than 2MB, or missing from Cloudinary,
+        is rejected, and the oversize image scheduled for deletion.
+        """
+        self.resource.return_value = {'bytes': MAX_IMAGE_SIZE + 1}
+        response = self.client.post(
+            '/api/artpieces/',
+            {'title': 'a test title', 'image_upload': self._upload_result()},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['image_upload'], [SIZE_ERROR])
+        self.resource.assert_called_once_with(
+            f'{get_upload_folder(self.test_user)}/art')
+        self.assertEqual(
+            ImageDeletion.objects.get().public_id,
+            f'{get_upload_folder(self.test_user)}/art')
+
+        self.resource.side_effect = cloudinary.exceptions.NotFound
+        response = self.client.post(
+            '/api/artpieces/',
+            {'title': 'a test title', 'image_upload': self._upload_result()},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Artpiece.objects.exists())
+
+
+class BackfillImageMetadataTests(APITestCase):
+    """
+    Test suite for the backfill_image_metadata management command.
+    """
+
+    def test_metadata_are_looked_up_in_batches(self):
+        """
+        Asserts the metadata of images stored before their columns existed
+        are filled with one API call per batch, and images Cloudinary does
+        not know keep empty dimensions.
+        """
+        owner = CustomUser.objects.create_user(
+            email='test@test.com', password='testpass')
+        base_url = 'https://res.cloudinary.com/demo/image/upload/v1'
+        for i in range(3):
+            Artpiece.objects.create(
+                owner=owner, title=f'title {i}',
+                image=f'{base_url}/folder/image{i}.jpg')
+        resources = [
+            {'public_id': f'folder/image{i}', 'width': 100 + i,
+             'height': 50, 'format': 'png'}
+            for i in range(2)]
+
+        out = StringIO()
+        with patch('cloudinary.api.resources_by_ids',
+                   return_value={'resources': resources}) as lookup:
+            call_command(
+                'backfill_image_metadata', batch_size=2, stdout=out)
+
+        self.assertEqual(lookup.call_count, 3)
+        self.assertIn('Artpieces: filled 2 image(s), 1 not found.',
+                      out.getvalue())
+        self.assertEqual(
+            list(Artpiece.objects.order_by('pk').values_list(
+                'image_public_id', 'image_width', 'image_format')),
+            [('folder/image0', 100, 'png'), ('folder/image1', 101, 'png'),
+             ('folder/image2', None, '')])
+
+
+class ImageVariantTests(APITestCase):
+    """
+    Test suite for the image variant urls exposed by the serializers.
+    """
+
+    def setUp(self):
+        """ Set up a test user and an artpiece with a Cloudinary image. """
+        self.test_user = CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass')
+        self.artpiece = Artpiece.objects.create(
+            owner=self.test_user, title='test title',
+            image='https://res.cloudinary.com/demo/image/upload/v12/a/b.jpg',
+            image_public_id='a/b')
+
+    def test_artpiece_variants_are_cloudinary_transformations(self):
+        """
+        Asserts each variant is a resized, automatic format url of the image,
+        and the owner's avatar a thumbnail.
+        """
+        response = self.client.get(f'/api/artpieces/{self.artpiece.id}/')
+
+        variants = response.data['image_variants']
+        self.assertEqual(set(variants), {'thumb', 'card', 'full'})
+        self.assertEqual(
+            variants['card'],
+            'https://res.cloudinary.com/demo/image/upload/'
+            'c_limit,f_auto,q_auto,w_600/v12/a/b')
+        self.assertIn('c_fill,f_auto,g_auto,h_200', variants['thumb'])
+        self.assertIn('/c_fill,', response.data['profile_image'])
+
+    def test_variants_are_memoized(self):
+        """
+        Asserts the variant urls of an image are computed once, and images
+        not stored on Cloudinary are returned as is.
+        """
+        _variant_urls.cache_clear()
+        for _ in range(3):
+            self.client.get('/api/artpieces/')
+        self.assertEqual(_variant_urls.cache_info().misses, 2)
+
+        self.assertEqual(
+            get_image_variants('/media/a.jpg'),
+            {'thumb': '/media/a.jpg', 'card': '/media/a.jpg',
+             'full': '/media/a.jpg'})
+
+
+class BackfillImagePlaceholdersTests(APITestCase):
+    """
+    Test suite for the backfill_image_placeholders management command.
+    """
+
+    def test_placeholders_are_computed_for_cloudinary_images(self):
+        """
+        Asserts placeholders are computed for the images that have none, and
+        images not stored on Cloudinary are counted as failed.
+        """
+        owner = CustomUser.objects.create_user(
+            email='test@test.com', password='testpass')
+        base_url = 'https://res.cloudinary.com/demo/image/upload/v1'
+        cloudinary_piece = Artpiece.objects.create(
+            owner=owner, title='title 1', image=f'{base_url}/a.jpg')
+        Artpiece.objects.create(
+            owner=owner, title='title 2', image='/media/b.jpg')
+
+        out = StringIO()
+        with patch('images.placeholders.urlopen',
+                   side_effect=lambda *args, **kwargs: make_image_file()):
+            call_command(
+                'backfill_image_placeholders', workers=1, stdout=out)
+
+        self.assertIn(
+            'Artpieces: computed 1 placeholder(s), 1 failed.', out.getvalue())
+        self.assertIn(
+            'Profiles: computed 1 placeholder(s), 0 failed.', out.getvalue())
+        cloudinary_piece.refresh_from_db()
+        assert_color_close(self, cloudinary_piece.image_color, (0, 128, 0))
@@ -0,0 +1,57 @@
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from rest_framework import serializers
+from .validators import MAX_IMAGE_SIZE, SIZE_ERROR, validate_image_file
+
+
+class ImageSizeLimitUploadHandler(FileUploadHandler):
+    """
+    Upload handler aborting a file as soon as more than MAX_IMAGE_SIZE bytes
+    of it have been received, before the next handlers buffer it in memory or
+    on disk.
+
+    The rest of the file is skipped, and the field name is recorded in
+    `request.rejected_uploads` so that `ImageUploadField` can report the
+    error instead of treating the image as missing. It must be listed first
+    in the FILE_UPLOAD_HANDLERS setting.
+    """
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > MAX_IMAGE_SIZE:
+            if not hasattr(self.request, 'rejected_uploads'):
+                self.request.rejected_uploads = {}
+            self.request.rejected_uploads[self.field_name] = SIZE_ERROR
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class RejectedUpload:
+    """ Stands for a file skipped by `ImageSizeLimitUploadHandler`. """
+    def __init__(self, message):
+        self.message = message
+
+
+class ImageUploadField(serializers.FileField):
+    """
+    Serializer field for image uploads, validated with
+    `validate_image_file` from the image header only, unlike DRF's
+    `ImageField` which has Pillow verify the whole file.
+
+    Reports the files rejected by `ImageSizeLimitUploadHandler` as
+    validation errors.
+    """
+    def get_value(self, dictionary):
+        request = self.context.get('request')
+        rejected = getattr(
+            getattr(request, '_request', request), 'rejected_uploads', {})
+        if self.field_name in rejected:
+            return RejectedUpload(rejected[self.field_name])
+        return super().get_value(dictionary)
+
+    def to_internal_value(self, data):
+        if isinstance(data, RejectedUpload):
+            raise serializers.ValidationError(data.message)
+        file = super().to_internal_value(data)
+        validate_image_file(file)
+        return file
@@ -0,0 +1,9 @@
+from django.urls import path
+from images import views
+
+urlpatterns = [
+    path(
+        'images/upload-signature/',
+        views.SignedUploadParams.as_view(),
+        name='images-upload-signature'),
+]
@@ -0,0 +1,41 @@
+from PIL import Image
+from rest_framework import serializers
+
+MAX_IMAGE_SIZE = 2 * 1024 * 1024
+MAX_IMAGE_DIMENSION = 2000
+
+SIZE_ERROR = 'Image size larger than 2MB!'
+INVALID_ERROR = 'Upload a valid image. The file you uploaded was either ' \
+    'not an image or a corrupted image.'
+
+
+def validate_image_file(file):
+    """
+    Validates an uploaded image - Checks that the size does not exceed 2MB
+    and dimensions are within 2000x2000px.
+
+    The dimensions are read from the image header alone: `Image.open` is
+    lazy and the pixel data is never decoded.
+
+    Args:
+        file: The uploaded file.
+
+    Raises:
+        serializers.ValidationError: If the file is not an image, or if the
+        image size or dimensions exceed the limits.
+    """
+    if file.size > MAX_IMAGE_SIZE:
+        raise serializers.ValidationError(SIZE_ERROR)
+
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise serializers.ValidationError(INVALID_ERROR)
+    finally:
+        file.seek(0)
+
+    if height > MAX_IMAGE_DIMENSION:
+        raise serializers.ValidationError('Image height larger than 2000px!')
+    if width > MAX_IMAGE_DIMENSION:
+        raise serializers.ValidationError('Image width larger than 2000px!')
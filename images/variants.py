@@ -0,0 +1,89 @@
+import re
+from functools import lru_cache
+from cloudinary.utils import cloudinary_url
+from .outbox import get_public_id
+
+# Transformations of the image sizes served to clients, applied by
+# Cloudinary on first request and cached on its CDN
+IMAGE_VARIANTS = {
+    'thumb': {'width': 200, 'height': 200, 'crop': 'fill', 'gravity': 'auto'},
+    'card': {'width': 600, 'crop': 'limit'},
+    'full': {'width': 2000, 'height': 2000, 'crop': 'limit'},
+}
+
+
+@lru_cache(maxsize=4096)
+def _variant_urls(public_id, version):
+    """
+    Returns the urls of the variants of a Cloudinary image, as a tuple of
+    (name, url) pairs, so the result can be cached.
+    """
+    return tuple(
+        (name, cloudinary_url(
+            public_id, version=version, secure=True, fetch_format='auto',
+            quality='auto', **transformation)[0])
+        for name, transformation in IMAGE_VARIANTS.items()
+    )
+
+
+def resolve_image(image, public_id=''):
+    """
+    Returns the url of an image, with its Cloudinary public id and version.
+
+    Args:
+        image: A CloudinaryResource or an image url string.
+        public_id: The stored public id of the image, if known. Derived from
+        the image url otherwise.
+
+    Returns:
+        tuple: The url, public id and version of the image. The public id and
+        version are None for images not stored on Cloudinary, and the url is
+        None if there is no image.
+    """
+    if image and not isinstance(image, str):
+        # Urls saved in the field are loaded as the public id of a resource
+        stored = image.public_id or ''
+        image = stored if stored.startswith(('/', 'http')) else image.url
+    if not image:
+        return None, None, None
+    if '/image/upload/' not in image:
+        return image, None, None
+
+    version = re.search(r'/upload/(?:.*/)?v(\d+)/', image)
+    return (
+        image,
+        public_id or get_public_id(image),
+        version.group(1) if version else None,
+    )
+
+
+def get_image_variants(image, public_id=''):
+    """
+    Returns the urls of the thumb, card and full size variants of an image.
+
+    The urls are built locally, without calling Cloudinary, and memoized per
+    public id and version. Cloudinary picks the format (e.g. WebP or AVIF)
+    and quality per client. Images not stored on Cloudinary (see
+    `images.storage.LocalImageStorage`) are returned as is for every size.
+
+    Args:
+        image: A CloudinaryResource or an image url string.
+        public_id: The stored public id of the image, if known. Derived from
+        the image url otherwise.
+
+    Returns:
+        dict: The url of each variant in IMAGE_VARIANTS, or None if there is
+        no image.
+    """
+    url, public_id, version = resolve_image(image, public_id)
+    if url is None:
+        return None
+    if public_id is None:
+        return {name: url for name in IMAGE_VARIANTS}
+    return dict(_variant_urls(public_id, version))
+
+
+def get_thumbnail_url(image, public_id=''):
+    """ Returns the url of the thumb variant of an image, or None. """
+    variants = get_image_variants(image, public_id)
+    return variants['thumb'] if variants else None
@@ -0,0 +1,25 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .signed_uploads import build_signed_upload_params
+
+
+class SignedUploadParams(APIView):
+    """
+    View issuing signed parameters for uploading an image directly from the
+    browser to Cloudinary, without the image passing through the API.
+
+    - POST: Returns the signed upload parameters. Requires authentication.
+
+    The public id, version, signature and format returned by Cloudinary are
+    then sent as `image_upload` when creating or updating an artpiece, or as
+    `profile_image_upload` when updating a profile.
+
+    Permissions:
+    - `IsAuthenticated`: Only logged in users can upload images.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """ Returns signed upload parameters for the request user. """
+        return Response(build_signed_upload_params(request.user))
@@ -0,0 +1,129 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from artpieces.models import Artpiece
+from likes.models import Like
+from likes.trending import refresh_trending_leaderboard
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    """
+    Management command comparing the latency of the previous trending query
+    (an aggregate over the last 30 days of likes on every request) with the
+    precomputed leaderboard read.
+
+    Generates synthetic users, artpieces and likes (1M by default, spread
+    over the last 60 days) inside a transaction that is always rolled back,
+    so it leaves the database unchanged. It is still meant for local or
+    staging databases only.
+
+    Usage:
+        python manage.py benchmark_trending [--likes 1000000]
+        [--artpieces 2000] [--repeat 5]
+    """
+    help = 'Benchmarks the trending endpoint query, before and after the ' \
+           'precomputed leaderboard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--likes', type=int, default=1_000_000)
+        parser.add_argument('--artpieces', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._generate(options['likes'], options['artpieces'])
+
+            legacy = self._time(self._legacy_trending, options['repeat'])
+            decayed_refresh = self._time(
+                lambda: refresh_trending_leaderboard(half_life_days=7),
+                options['repeat'])
+            refresh = self._time(
+                refresh_trending_leaderboard, options['repeat'])
+            leaderboard = self._time(
+                self._leaderboard_trending, options['repeat'])
+
+            self._report('Per request, previous query', legacy)
+            self._report('Per request, leaderboard read', leaderboard)
+            self._report('Per schedule, leaderboard refresh', refresh)
+            self._report(
+                'Per schedule, time-decayed leaderboard refresh',
+                decayed_refresh)
+            transaction.set_rollback(True)
+
+    def _generate(self, like_count, artpiece_count):
+        """
+        Creates enough users that every like is a distinct (owner, artpiece)
+        pair, the artpieces, and the likes, in bulk.
+        """
+        prefix = uuid.uuid4().hex[:8]
+        user_count = -(-like_count // artpiece_count)
+        users = CustomUser.objects.bulk_create([
+            CustomUser(email=f'bench-{prefix}-{i}@example.com', password='!')
+            for i in range(user_count)
+        ], batch_size=1000)
+        artpieces = Artpiece.objects.bulk_create([
+            Artpiece(owner=users[i % user_count], title=f'bench {prefix} {i}')
+            for i in range(artpiece_count)
+        ], batch_size=1000)
+
+        # Let created_on be spread over 60 days instead of set to now
+        created_on = Like._meta.get_field('created_on')
+        created_on.auto_now_add = False
+        now = timezone.now()
+        try:
+            batch = []
+            for i in range(like_count):
+                batch.append(Like(
+                    owner=users[i % user_count],
+                    liked_piece=artpieces[i // user_count],
+                    created_on=now - timedelta(
+                        seconds=random.randint(0, 60 * 24 * 3600)),
+                ))
+                if len(batch) == 10000:
+                    Like.objects.bulk_create(batch)
+                    batch = []
+            Like.objects.bulk_create(batch)
+        finally:
+            created_on.auto_now_add = True
+        self.stdout.write(
+            f'Generated {user_count} users, {artpiece_count} artpieces and '
+            f'{like_count} likes.')
+
+    def _legacy_trending(self):
+        """ The trending queries run on every request before the leaderboard.
+        """
+        trending = Like.top_trending_artpieces()
+        ids = {artpiece['liked_piece'] for artpiece in trending}
+        if len(ids) < 4:
+            additional = Artpiece.objects.annotate(
+                like_total=Count('likes')
+            ).exclude(id__in=ids).order_by('-like_total')[:4 - len(ids)]
+            ids.update(artpiece.id for artpiece in additional)
+        return list(Artpiece.objects.filter(id__in=ids).annotate(
+            like_total=Count('likes', distinct=True)).order_by('-like_total'))
+
+    def _leaderboard_trending(self):
+        """ The trending query run on every request with the leaderboard. """
+        return list(Artpiece.objects.filter(
+            trending__rank__lte=4).order_by('trending__rank'))
+
+    def _time(self, func, repeat):
+        """ Returns the durations in milliseconds of `repeat` calls. """
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - start) * 1000)
+        return durations
+
+    def _report(self, label, durations):
+        self.stdout.write(
+            f'{label}: median {statistics.median(durations):.2f} ms, '
+            f'min {min(durations):.2f} ms')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from artpieces.models import Artpiece
+from likes.models import Like
+
+
+class Command(BaseCommand):
+    """
+    Management command repairing drift in the denormalized
+    `Artpiece.likes_count` column.
+
+    Compares every artpiece's stored likes_count with the number of Like rows
+    pointing at it, and rewrites the ones that differ in a single UPDATE.
+
+    Usage:
+        python manage.py reconcile_like_counts [--dry-run]
+    """
+    help = 'Recalculates Artpiece.likes_count from the Like table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted artpieces without updating them.',
+        )
+
+    def handle(self, *args, **options):
+        counts = Like.objects.filter(
+            liked_piece=OuterRef('pk')
+        ).order_by().values('liked_piece').annotate(
+            count=Count('pk')).values('count')
+        actual_count = Coalesce(Subquery(counts), 0)
+
+        with transaction.atomic():
+            drifted = Artpiece.objects.annotate(
+                actual_count=actual_count
+            ).exclude(likes_count=F('actual_count'))
+            drifted_ids = list(drifted.values_list('pk', flat=True))
+
+            if drifted_ids and not options['dry_run']:
+                Artpiece.objects.filter(pk__in=drifted_ids).update(
+                    likes_count=actual_count)
+
+        action = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {len(drifted_ids)} artpiece(s) with a drifted '
+            'likes_count.'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from likes.trending import (
+    LEADERBOARD_SIZE, TRENDING_WINDOW_DAYS, refresh_trending_leaderboard)
+
+
+class Command(BaseCommand):
+    """
+    Management command rebuilding the trending leaderboard read by the
+    `api/artpieces/trending/` endpoint. Meant to be run on a schedule (e.g.
+    every few minutes with Heroku Scheduler) and on release.
+
+    Usage:
+        python manage.py refresh_trending [--size 20] [--days 30]
+        [--half-life DAYS]
+    """
+    help = 'Rebuilds the trending artpieces leaderboard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=LEADERBOARD_SIZE,
+            help='Number of artpieces stored on the leaderboard.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=TRENDING_WINDOW_DAYS,
+            help='Length of the trending window in days.',
+        )
+        parser.add_argument(
+            '--half-life',
+            type=float,
+            default=None,
+            help='Half-life in days for time-decayed scoring. Every like in '
+                 'the window weighs the same when omitted.',
+        )
+
+    def handle(self, *args, **options):
+        leaderboard = refresh_trending_leaderboard(
+            size=options['size'],
+            days=options['days'],
+            half_life_days=options['half_life'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {len(leaderboard)} trending artpiece(s).'))
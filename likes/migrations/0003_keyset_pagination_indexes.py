@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('likes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['created_on', 'id'], name='like_created_on_idx'),
+        ),
+    ]
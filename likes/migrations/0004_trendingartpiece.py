@@ -0,0 +1,28 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artpieces', '0006_artpiece_search_document'),
+        ('likes', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingArtpiece',
+            fields=[
+                ('artpiece', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='artpieces.artpiece')),
+                ('rank', models.PositiveIntegerField(unique=True)),
+                ('score', models.FloatField(default=0)),
+                ('recent_likes', models.PositiveIntegerField(default=0)),
+                ('refreshed_on', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+    ]
@@ -22,12 +22,15 @@ class Like(models.Model):
         ordering (list): Specifies the default ordering of the Like objects.
         Ordered by creation date in descending order.
         unique_together: Constraint to avoid duplicate likes
+        indexes: Index on created_on (with id as tie-breaker) for keyset
+        pagination.
 
     Methods:
         __str__: Returns a string representation of the Like instance,
         including the owner and the liked art piece.
         top_trending_artpieces: classmethod, returns a queryset with
-        the most liked artpieces in the last 30 days
+        the most liked artpieces in the last 30 days. Superseded on the
+        trending endpoint by the TrendingArtpiece leaderboard.
     """
     owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     liked_piece = models.ForeignKey(
@@ -37,6 +40,11 @@ class Like(models.Model):
     class Meta:
         ordering = ['-created_on']
         unique_together = ['owner', 'liked_piece']
+        indexes = [
+            models.Index(
+                fields=['created_on', 'id'],
+                name='like_created_on_idx'),
+        ]
 
     def __str__(self):
         return f'{self.owner} liked {self.liked_piece}'
@@ -53,3 +61,39 @@ class Like(models.Model):
                 .values('liked_piece')
                 .annotate(recent_likes=Count('liked_piece'))
                 .order_by('-recent_likes')[:4])
+
+
+class TrendingArtpiece(models.Model):
+    """
+    Represents an entry in the precomputed trending leaderboard, which is
+    rebuilt by the `refresh_trending` management command.
+
+    Attributes:
+        - artpiece (OneToOneField): The trending art piece. Also the primary
+            key.
+        - rank (PositiveIntegerField): The position on the leaderboard,
+            starting at 1. Unique, so the top N is an index range scan.
+        - score (FloatField): The trending score, the (optionally time-decayed)
+            number of likes received in the trending window.
+        - recent_likes (PositiveIntegerField): The number of likes received in
+            the trending window.
+        - refreshed_on (DateTimeField): When the leaderboard was last rebuilt.
+
+    Meta:
+        ordering (list): Ordered by rank in ascending order.
+    """
+    artpiece = models.OneToOneField(
+        Artpiece,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending')
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField(default=0)
+    recent_likes = models.PositiveIntegerField(default=0)
+    refreshed_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f'#{self.rank} {self.artpiece}'
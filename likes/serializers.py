@@ -1,5 +1,8 @@
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from rest_framework import serializers
+from artpieces.models import Artpiece
+from profiles.models import adjust_profile_stats
 from .models import Like
 
 
@@ -22,7 +25,9 @@ class LikeSerializer(serializers.ModelSerializer):
     Methods:
         - validate(self, data): validates the user is not liking their own
         artpiece.
-        - create(self, validated_data): ensures no duplicate likes are created.
+        - create(self, validated_data): ensures no duplicate likes are created,
+        and increments the artpiece's likes_count and its owner's
+        likes_received.
     """
     owner = serializers.ReadOnlyField(source='owner.id')
     name = serializers.ReadOnlyField(source='owner.profile.name')
@@ -41,9 +46,18 @@ class LikeSerializer(serializers.ModelSerializer):
         """
         Creates a new Like instance, ensuring no duplicates by catching
         IntegrityError and raising a ValidationError with a custom message.
+
+        Increments the liked artpiece's likes_count, and the likes received
+        by its owner, in the same transaction.
         """
         try:
-            return super().create(validated_data)
+            with transaction.atomic():
+                like = super().create(validated_data)
+                Artpiece.objects.filter(pk=like.liked_piece_id).update(
+                    likes_count=F('likes_count') + 1)
+                adjust_profile_stats(
+                    like.liked_piece.owner_id, likes_received=1)
+            return like
         except IntegrityError:
             raise serializers.ValidationError({
                 'detail': 'possible duplicate'
@@ -1,9 +1,14 @@
+from datetime import timedelta
+from io import StringIO
 from rest_framework import status
 from rest_framework.test import APITestCase
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils import timezone
 from users.models import CustomUser
 from artpieces.models import Artpiece
-from .models import Like
+from .models import Like, TrendingArtpiece
+from .trending import refresh_trending_leaderboard
 
 
 class LikeListTests(APITestCase):
@@ -60,6 +65,26 @@ class LikeListTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Like.objects.count(), 1)
 
+    def test_create_like_increments_likes_count(self):
+        """
+        Test creating a like increments the artpiece's likes_count, and that
+        a duplicate like does not.
+
+        Asserts:
+        - The likes_count is 1 after the first like.
+        - The duplicate like returns a 400 status code.
+        - The likes_count is still 1 after the duplicate like.
+        """
+        data = {'liked_piece': self.artpiece.id}
+        self.client.post(self.url_list, data)
+        self.artpiece.refresh_from_db()
+        self.assertEqual(self.artpiece.likes_count, 1)
+
+        response = self.client.post(self.url_list, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.artpiece.refresh_from_db()
+        self.assertEqual(self.artpiece.likes_count, 1)
+
     def test_cannot_like_own_artpiece(self):
         """
         Test that a user cannot like their own art piece.
@@ -144,6 +169,19 @@ class LikeDetailTests(APITestCase):
         with self.assertRaises(Like.DoesNotExist):
             Like.objects.get(id=self.like.id)
 
+    def test_delete_like_decrements_likes_count(self):
+        """
+        Test that deleting a like decrements the artpiece's likes_count.
+
+        Asserts:
+        - The likes_count goes from 1 to 0 after the like is deleted.
+        """
+        self.artpiece.likes_count = 1
+        self.artpiece.save()
+        self.client.delete(self.url_detail)
+        self.artpiece.refresh_from_db()
+        self.assertEqual(self.artpiece.likes_count, 0)
+
     def test_non_owner_cannot_delete_like(self):
         """
         Test that a non-owner cannot delete a like.
@@ -160,3 +198,163 @@ class LikeDetailTests(APITestCase):
         response = self.client.delete(self.url_detail)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertTrue(Like.objects.filter(id=self.like.id).exists())
+
+
+class ReconcileLikeCountsTests(APITestCase):
+    """
+    Test suite for the reconcile_like_counts management command.
+    """
+    def setUp(self):
+        """
+        Set up two users and an artpiece with one like, whose likes_count
+        has drifted.
+        """
+        self.user = CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass'
+        )
+        self.other_user = CustomUser.objects.create_user(
+            email='other@test.com',
+            password='otherpass'
+        )
+        self.artpiece = Artpiece.objects.create(
+            owner=self.other_user,
+            title='Test Artpiece'
+        )
+        Like.objects.create(owner=self.user, liked_piece=self.artpiece)
+        Artpiece.objects.filter(pk=self.artpiece.pk).update(likes_count=5)
+
+    def test_dry_run_does_not_repair(self):
+        """
+        Test the command only reports drift when run with --dry-run.
+
+        Asserts:
+        - The output reports one drifted artpiece.
+        - The likes_count is unchanged.
+        """
+        out = StringIO()
+        call_command('reconcile_like_counts', '--dry-run', stdout=out)
+        self.assertIn('Found 1 artpiece(s)', out.getvalue())
+        self.artpiece.refresh_from_db()
+        self.assertEqual(self.artpiece.likes_count, 5)
+
+    def test_repairs_drifted_count(self):
+        """
+        Test the command rewrites a drifted likes_count.
+
+        Asserts:
+        - The likes_count matches the number of Like rows.
+        """
+        call_command('reconcile_like_counts', stdout=StringIO())
+        self.artpiece.refresh_from_db()
+        self.assertEqual(self.artpiece.likes_count, 1)
+
+
+class TrendingLeaderboardTests(APITestCase):
+    """
+    Test suite for the precomputed trending leaderboard and the trending
+    endpoint reading it.
+    """
+    def setUp(self):
+        """
+        Set up an artist with five artpieces, and five fans who like them so
+        that the artpieces have 4, 3, 2, 1 and 0 recent likes.
+        """
+        self.artist = CustomUser.objects.create_user(
+            email='artist@test.com',
+            password='testpass'
+        )
+        self.fans = [
+            CustomUser.objects.create_user(
+                email=f'fan{i}@test.com', password='testpass')
+            for i in range(5)
+        ]
+        self.artpieces = [
+            Artpiece.objects.create(owner=self.artist, title=f'Artpiece {i}')
+            for i in range(5)
+        ]
+        for i, artpiece in enumerate(self.artpieces):
+            for fan in self.fans[:4 - i]:
+                Like.objects.create(owner=fan, liked_piece=artpiece)
+        self.url = reverse('artpiece_trendlist')
+
+    def _age_likes(self, artpiece, days):
+        """ Moves the likes of an artpiece `days` days into the past. """
+        Like.objects.filter(liked_piece=artpiece).update(
+            created_on=timezone.now() - timedelta(days=days))
+
+    def test_endpoint_reads_leaderboard_in_rank_order(self):
+        """
+        Test the endpoint lists the top 4 of the leaderboard, most recent
+        likes first.
+
+        Asserts:
+        - The response lists the four most liked artpieces in order.
+        - The least liked artpiece is on the leaderboard but not listed.
+        """
+        refresh_trending_leaderboard()
+        response = self.client.get(self.url)
+        self.assertEqual(
+            [artpiece['id'] for artpiece in response.data['results']],
+            [artpiece.id for artpiece in self.artpieces[:4]])
+        self.assertEqual(TrendingArtpiece.objects.count(), 5)
+
+    def test_endpoint_skips_deleted_artpieces(self):
+        """
+        Test the endpoint still lists 4 artpieces once a ranked artpiece is
+        deleted, taking the next one on the leaderboard.
+        """
+        refresh_trending_leaderboard()
+        self.artpieces[0].delete()
+        response = self.client.get(self.url)
+        self.assertEqual(
+            [artpiece['id'] for artpiece in response.data['results']],
+            [artpiece.id for artpiece in self.artpieces[1:]])
+
+    def test_likes_outside_window_fall_back_to_all_time_likes(self):
+        """
+        Test likes older than 30 days do not count as trending, and the
+        leaderboard is topped up with the most liked artpieces of all time.
+
+        Asserts:
+        - The artpiece whose likes are old ranks after those liked recently.
+        """
+        Artpiece.objects.filter(pk=self.artpieces[0].pk).update(
+            likes_count=4)
+        self._age_likes(self.artpieces[0], days=40)
+        leaderboard = refresh_trending_leaderboard()
+        self.assertEqual(
+            [entry.artpiece_id for entry in leaderboard[:4]],
+            [artpiece.id for artpiece in self.artpieces[1:4]]
+            + [self.artpieces[0].id])
+        self.assertEqual(leaderboard[3].recent_likes, 0)
+
+    def test_time_decay_favours_recent_likes(self):
+        """
+        Test that with a half-life, fewer recent likes can outrank more
+        older likes.
+
+        Asserts:
+        - Without decay, the artpiece with 4 likes ranks first.
+        - With a 1 day half-life, the artpiece with 3 likes from today ranks
+        above the one with 4 likes from 10 days ago.
+        """
+        self._age_likes(self.artpieces[0], days=10)
+
+        leaderboard = refresh_trending_leaderboard()
+        self.assertEqual(leaderboard[0].artpiece_id, self.artpieces[0].id)
+
+        leaderboard = refresh_trending_leaderboard(half_life_days=1)
+        self.assertEqual(leaderboard[0].artpiece_id, self.artpieces[1].id)
+
+    def test_refresh_trending_command(self):
+        """
+        Test the refresh_trending command rebuilds the leaderboard.
+
+        Asserts:
+        - The leaderboard holds the requested number of entries.
+        """
+        call_command('refresh_trending', '--size', '3', stdout=StringIO())
+        self.assertEqual(
+            list(TrendingArtpiece.objects.values_list('rank', flat=True)),
+            [1, 2, 3])
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from artpieces.models import Artpiece
+from .models import Like, TrendingArtpiece
+
+TRENDING_WINDOW_DAYS = 30
+LEADERBOARD_SIZE = 20
+
+
+def compute_trending_scores(days=TRENDING_WINDOW_DAYS, half_life_days=None,
+                            now=None):
+    """
+    Computes the trending score of every artpiece liked in the window.
+
+    Without a half-life every like in the window weighs 1, and the scores
+    come from a single aggregate query over the Like table. With a
+    half-life, a like's weight halves every `half_life_days` days, so recent
+    likes count more. Likes are then counted per day of age, with one
+    aggregate query per day over the `created_on` index.
+
+    Args:
+        days: The length of the trending window in days.
+        half_life_days: Optional half-life for time-decayed scoring.
+        now: The time to score at, defaults to now.
+
+    Returns:
+        dict: Maps artpiece ids to (score, recent_likes) tuples.
+    """
+    now = now or timezone.now()
+    if half_life_days:
+        buckets = [
+            (now - timedelta(days=age + 1), now - timedelta(days=age),
+             0.5 ** (age / half_life_days))
+            for age in range(days)
+        ]
+    else:
+        buckets = [(now - timedelta(days=days), now, 1.0)]
+
+    scores = {}
+    for start, end, weight in buckets:
+        likes_per_artpiece = (
+            Like.objects.filter(created_on__gte=start, created_on__lt=end)
+            .order_by()
+            .values_list('liked_piece')
+            .annotate(likes=Count('pk'))
+        )
+        for artpiece_id, likes in likes_per_artpiece:
+            score, recent_likes = scores.get(artpiece_id, (0.0, 0))
+            scores[artpiece_id] = (
+                score + likes * weight, recent_likes + likes)
+    return scores
+
+
+def refresh_trending_leaderboard(size=LEADERBOARD_SIZE,
+                                 days=TRENDING_WINDOW_DAYS,
+                                 half_life_days=None, now=None):
+    """
+    Rebuilds the TrendingArtpiece leaderboard.
+
+    Ranks artpieces by trending score (ties broken by all-time likes, then
+    newest first). If fewer than `size` artpieces were liked in the window,
+    the leaderboard is topped up with the most liked artpieces of all time.
+    The leaderboard is replaced in a single transaction, so readers never
+    see a partial leaderboard.
+
+    Args:
+        size: The number of leaderboard entries to store.
+        days: The length of the trending window in days.
+        half_life_days: Optional half-life for time-decayed scoring.
+        now: The time to score at, defaults to now.
+
+    Returns:
+        list: The new TrendingArtpiece instances, in rank order.
+    """
+    scores = compute_trending_scores(days, half_life_days, now)
+    likes_counts = dict(
+        Artpiece.objects.filter(pk__in=scores).values_list(
+            'pk', 'likes_count'))
+    ranked_ids = sorted(
+        likes_counts,
+        key=lambda pk: (-scores[pk][0], -likes_counts[pk], -pk),
+    )[:size]
+
+    if len(ranked_ids) < size:
+        ranked_ids += list(
+            Artpiece.objects.exclude(pk__in=ranked_ids)
+            .order_by('-likes_count', '-pk')
+            .values_list('pk', flat=True)[:size - len(ranked_ids)]
+        )
+
+    leaderboard = [
+        TrendingArtpiece(
+            artpiece_id=pk,
+            rank=rank,
+            score=scores.get(pk, (0.0, 0))[0],
+            recent_likes=scores.get(pk, (0.0, 0))[1],
+        )
+        for rank, pk in enumerate(ranked_ids, start=1)
+    ]
+    with transaction.atomic():
+        TrendingArtpiece.objects.all().delete()
+        TrendingArtpiece.objects.bulk_create(leaderboard)
+    return leaderboard
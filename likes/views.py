@@ -1,5 +1,9 @@
+from django.db import transaction
+from django.db.models import F
 from rest_framework import generics, permissions
 from viridian_api.permissions import IsOwnerOrReadOnly
+from artpieces.models import Artpiece
+from profiles.models import adjust_profile_stats
 from .models import Like
 from .serializers import LikeSerializer
 
@@ -55,7 +59,28 @@ class LikeDetail(generics.RetrieveDestroyAPIView):
         serializer_class (LikeSerializer): Handles serialization.
         permission_classes (list): Defines access permissions.
         queryset (QuerySet): Base queryset for retrieving likes.
+
+    Methods:
+        perform_destroy(self, instance):
+            Deletes the like and decrements the artpiece's likes_count, and
+            its owner's likes_received, in the same transaction.
     """
     permission_classes = [IsOwnerOrReadOnly]
     serializer_class = LikeSerializer
-    queryset = Like.objects.all()
+    queryset = Like.objects.select_related('liked_piece')
+
+    def perform_destroy(self, instance):
+        """
+        Deletes the like and decrements the artpiece's likes_count, and the
+        likes received by its owner, in the same transaction. The counts are
+        only decremented if the like row was actually deleted, so concurrent
+        deletes cannot double count.
+        """
+        with transaction.atomic():
+            deleted, _ = instance.delete()
+            if deleted:
+                Artpiece.objects.filter(
+                    pk=instance.liked_piece_id, likes_count__gt=0
+                ).update(likes_count=F('likes_count') - 1)
+                adjust_profile_stats(
+                    instance.liked_piece.owner_id, likes_received=-1)
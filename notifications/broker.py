@@ -0,0 +1,265 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+# Number of missed events sent to a reconnecting client
+REPLAY_LIMIT = 100
+# Number of delivered event ids remembered per client to skip duplicates
+SEEN_LIMIT = 1000
+# How long after being recorded an event committed out of id order is
+# still found by polling
+POLL_WINDOW = timedelta(seconds=30)
+
+_broker = None
+
+
+def get_broker():
+    """
+    Returns the process-wide instance of the `NOTIFICATIONS_BROKER`
+    setting, creating it if needed.
+    """
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.NOTIFICATIONS_BROKER)()
+    return _broker
+
+
+def fetch_events(user_ids, after_id, limit=None, since=None):
+    """
+    Returns the events of the given users recorded after the event
+    `after_id`, or on or after the date `since` if given, oldest first.
+    """
+    condition = Q(pk__gt=after_id)
+    if since is not None:
+        condition |= Q(created_on__gte=since)
+    events = Event.objects.filter(
+        condition, recipient_id__in=user_ids).order_by('pk')
+    if limit is not None:
+        events = events[:limit]
+    return list(events)
+
+
+def get_last_event_id():
+    """ Returns the id of the last recorded event, or 0. """
+    return Event.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+
+
+def get_recent_event_ids(since):
+    """
+    Returns the ids and creation dates of the events recorded on or after
+    the date `since`.
+    """
+    return dict(Event.objects.filter(
+        created_on__gte=since).values_list('pk', 'created_on'))
+
+
+class Subscription:
+    """
+    The events waiting to be sent to one connected client.
+
+    Events can be delivered more than once (e.g. published locally and
+    polled from the database); the ids of the events already returned are
+    remembered so each event is sent once. Events recorded before the client
+    subscribed are skipped, unless they follow the last event the client
+    received.
+
+    Methods:
+        put: Queues events for the client.
+        get: Waits for the next queued events.
+    """
+    def __init__(self, user_id, last_event_id=None):
+        self.user_id = user_id
+        self._after_id = last_event_id
+        self._since = timezone.now()
+        self._queue = asyncio.Queue()
+        self._seen = set()
+
+    def put(self, events):
+        """ Queues events for the client. Must run on the event loop. """
+        for event in events:
+            if self._after_id is not None:
+                if event.pk <= self._after_id:
+                    continue
+            elif event.created_on < self._since:
+                continue
+            self._queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """
+        Waits up to `timeout` seconds for events.
+
+        Returns:
+            list: The events not sent yet, oldest first, possibly empty.
+        """
+        try:
+            events = [await asyncio.wait_for(self._queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self._queue.empty():
+            events.append(self._queue.get_nowait())
+
+        new_events = []
+        for event in sorted(events, key=lambda event: event.pk):
+            if event.pk not in self._seen:
+                self._seen.add(event.pk)
+                new_events.append(event)
+        if len(self._seen) > SEEN_LIMIT:
+            self._seen = set(sorted(self._seen)[-SEEN_LIMIT // 2:])
+        return new_events
+
+
+class LocalBroker:
+    """
+    In-process broker, delivering the events published by this process to
+    the clients connected to this process.
+
+    Each connected client is a `Subscription` waiting on the event loop, so
+    it costs one idle task. Events are published from request threads once
+    their transaction commits, and handed over to the event loop. Suited to
+    a single web process.
+
+    Methods:
+        subscribe: Context manager subscribing a client to a user's events.
+        publish: Delivers events to the subscribed clients. Thread-safe.
+    """
+    def __init__(self):
+        self._subscriptions = {}
+        self._loop = None
+
+    @asynccontextmanager
+    async def subscribe(self, user_id, last_event_id=None):
+        """
+        Subscribes a client to the events of a user, for the duration of the
+        `async with` block.
+
+        Args:
+            user_id: The id of the user.
+            last_event_id: The id of the last event the client received, if
+            reconnecting. The events recorded since are queued first.
+
+        Yields:
+            Subscription: The client's subscription.
+        """
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, last_event_id)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        try:
+            self._subscribed()
+            if last_event_id is not None:
+                subscription.put(await sync_to_async(fetch_events)(
+                    [user_id], last_event_id, REPLAY_LIMIT))
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions.get(user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(user_id, None)
+
+    def publish(self, events):
+        """
+        Delivers events to the clients subscribed to their recipients. Can
+        be called from any thread.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, list(events))
+
+    def _subscribed(self):
+        """ Hook called on the event loop when a client subscribes. """
+
+    def _dispatch(self, events):
+        """ Queues events for the subscribed clients, on the event loop. """
+        for event in events:
+            for subscription in self._subscriptions.get(
+                    event.recipient_id, ()):
+                subscription.put([event])
+
+
+class DatabaseBroker(LocalBroker):
+    """
+    Broker polling the Event table, so clients receive the events recorded
+    by any process (other web workers, management commands), without an
+    outside message broker.
+
+    While clients are connected, a single task per process reads the new
+    events of all connected users every `NOTIFICATIONS_POLL_INTERVAL`
+    seconds with one indexed query. Events published by this process are
+    also delivered right away, as with `LocalBroker`.
+
+    Ids are allocated when events are inserted, not when their transaction
+    commits, so an event can become visible after events with higher ids
+    were polled. Each poll therefore also re-reads the events recorded in
+    the last `POLL_WINDOW`, and skips the ones already delivered.
+    """
+    def __init__(self, interval=None):
+        super().__init__()
+        if interval is None:
+            interval = settings.NOTIFICATIONS_POLL_INTERVAL
+        self.interval = interval
+        self._cursor = None
+        self._delivered = {}
+        self._poller = None
+
+    def _subscribed(self):
+        """ Starts the polling task if it is not running. """
+        loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done() or (
+                self._poller.get_loop() is not loop):
+            self._poller = loop.create_task(self._poll())
+
+    async def _poll(self):
+        """
+        Reads the events recorded since the task started for the connected
+        users, until no client is connected. Failed polls are logged and
+        retried.
+        """
+        read = sync_to_async(self._read, thread_sensitive=False)
+        # The events visible at startup are not delivered; the ones of the
+        # window not committed yet are
+        self._cursor = await read(get_last_event_id)
+        self._delivered = await read(
+            get_recent_event_ids, timezone.now() - POLL_WINDOW)
+        while self._subscriptions:
+            await asyncio.sleep(self.interval)
+            since = timezone.now() - POLL_WINDOW
+            try:
+                events = await read(
+                    fetch_events, list(self._subscriptions), self._cursor,
+                    None, since)
+            except Exception:
+                logger.exception('Polling notification events failed')
+                continue
+            events = [
+                event for event in events if event.pk not in self._delivered]
+            if events:
+                self._cursor = max(self._cursor, events[-1].pk)
+                self._delivered.update(
+                    (event.pk, event.created_on) for event in events)
+                self._dispatch(events)
+            self._delivered = {
+                pk: created_on
+                for pk, created_on in self._delivered.items()
+                if created_on >= since}
+
+    @staticmethod
+    def _read(func, *args):
+        """
+        Runs a query on a worker thread, then closes the thread's database
+        connection if it is obsolete.
+        """
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
@@ -0,0 +1,30 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from notifications.models import Event
+
+
+class Command(BaseCommand):
+    """
+    Management command deleting old notification events, which reconnecting
+    clients no longer need, with a single DELETE.
+
+    Usage:
+        python manage.py prune_events [--days 7]
+    """
+    help = 'Deletes notification events older than the retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.NOTIFICATIONS_RETENTION_DAYS,
+            help='Number of days of events to keep.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = Event.objects.filter(created_on__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} event(s).'))
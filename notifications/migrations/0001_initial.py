@@ -0,0 +1,31 @@
+# Generated by Django 4.2.13 on 2026-10-18 08:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('enquiry_created', 'Enquiry created'), ('enquiry_updated', 'Enquiry updated'), ('enquiry_answered', 'Enquiry answered'), ('like_received', 'Like received')], max_length=30)),
+                ('data', models.JSONField(default=dict)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['recipient', 'id'], name='event_recipient_idx'), models.Index(fields=['created_on'], name='event_created_on_idx')],
+            },
+        ),
+    ]
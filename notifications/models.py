@@ -0,0 +1,118 @@
+from django.db import models, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from users.models import CustomUser
+
+
+class Event(models.Model):
+    """
+    Represents a notification for a user, pushed to their connected clients
+    by the event stream, see `notifications.broker`.
+
+    Events are recorded in the same transaction as the change they describe,
+    so a rolled back change is never notified, and are kept for a while so
+    that reconnecting clients can catch up on the events they missed.
+
+    Attributes:
+        - recipient (ForeignKey): The user notified.
+        - kind (CharField): The kind of event, chosen from predefined
+        choices.
+        - data (JSONField): The ids of the objects concerned, for the client
+        to refresh.
+        - created_on (DateTimeField): The date and time when the event was
+        recorded. Automatically set on creation.
+
+    Choices:
+        KIND_CHOICES: Defines the kind of event.
+            'enquiry_created' - An enquiry was made about the user's artpiece
+            'enquiry_updated' - The artist edited their response to an enquiry
+            'enquiry_answered' - The artist accepted or declined an enquiry
+            'like_received' - The user's artpiece was liked
+
+    Meta:
+        ordering (list): Specifies the default ordering of the Event objects.
+        Ordered by id in ascending order, the order they were recorded in.
+        indexes (list): Index on recipient and id for reading the events of
+        the connected users after the last one sent, and on created_on for
+        pruning old events.
+
+    Methods:
+        __str__: Returns the kind and recipient of the event.
+    """
+    ENQUIRY_CREATED = 'enquiry_created'
+    ENQUIRY_UPDATED = 'enquiry_updated'
+    ENQUIRY_ANSWERED = 'enquiry_answered'
+    LIKE_RECEIVED = 'like_received'
+    KIND_CHOICES = [
+        (ENQUIRY_CREATED, 'Enquiry created'),
+        (ENQUIRY_UPDATED, 'Enquiry updated'),
+        (ENQUIRY_ANSWERED, 'Enquiry answered'),
+        (LIKE_RECEIVED, 'Like received'),
+    ]
+    recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    data = models.JSONField(default=dict)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['recipient', 'id'],
+                name='event_recipient_idx'),
+            models.Index(
+                fields=['created_on'],
+                name='event_created_on_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} for {self.recipient_id}'
+
+
+def notify(recipient_id, kind, **data):
+    """
+    Records an event for a user, and publishes it to the user's connected
+    clients once the current transaction commits.
+
+    Args:
+        recipient_id: The id of the user notified, skipped if None.
+        kind: The kind of event, see `Event.KIND_CHOICES`.
+        **data: The ids of the objects concerned.
+
+    Returns:
+        Event: The recorded event, or None.
+    """
+    from .broker import get_broker
+
+    if recipient_id is None:
+        return None
+    event = Event.objects.create(
+        recipient_id=recipient_id, kind=kind, data=data)
+    transaction.on_commit(lambda: get_broker().publish([event]))
+    return event
+
+
+@receiver(post_save, sender='enquiries.Enquiry')
+def notify_enquiry(sender, instance, created, **kwargs):
+    """
+    Signal receiver notifying the artist of a new enquiry, and the buyer of
+    a response to their enquiry. The previous status and response are known
+    from the tracked field values.
+    """
+    data = {'enquiry': instance.pk, 'artpiece': instance.artpiece_id}
+    if created:
+        notify(instance.artist_id, Event.ENQUIRY_CREATED, **data)
+    elif instance.has_changed('status'):
+        notify(instance.buyer_id, Event.ENQUIRY_ANSWERED,
+               status=instance.status, **data)
+    elif instance.has_changed('response_message'):
+        notify(instance.buyer_id, Event.ENQUIRY_UPDATED, **data)
+
+
+@receiver(post_save, sender='likes.Like')
+def notify_like(sender, instance, created, **kwargs):
+    """ Signal receiver notifying the owner of a liked artpiece. """
+    if created:
+        notify(instance.liked_piece.owner_id, Event.LIKE_RECEIVED,
+               like=instance.pk, artpiece=instance.liked_piece_id,
+               owner=instance.owner_id)
@@ -0,0 +1,154 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from users.models import CustomUser
+from artpieces.models import Artpiece
+from notifications import broker
+from .broker import DatabaseBroker, get_last_event_id
+from .models import Event
+
+
+class EventTests(APITestCase):
+    """
+    Test suite for the events recorded on enquiries and likes.
+    """
+
+    def setUp(self):
+        """
+        Sets up a buyer, and an artist with an artpiece for sale.
+        """
+        self.buyer = CustomUser.objects.create_user(
+            email='buyer@test.com', password='pass')
+        self.artist = CustomUser.objects.create_user(
+            email='artist@test.com', password='pass')
+        self.artpiece = Artpiece.objects.create(
+            title='Art', owner=self.artist, for_sale=1)
+
+    def _kinds(self, user):
+        """ Returns the kinds of the events recorded for a user. """
+        return list(Event.objects.filter(
+            recipient=user).values_list('kind', flat=True))
+
+    def test_enquiry_events(self):
+        """
+        Asserts the artist is notified of a new enquiry, the buyer of the
+        response, and that reading an enquiry notifies nobody.
+        """
+        self.client.login(email='buyer@test.com', password='pass')
+        response = self.client.post(reverse('enquiry-list'), {
+            'artpiece': self.artpiece.id,
+            'initial_message': 'enquiry message',
+        })
+        enquiry_id = response.data['id']
+        self.assertEqual(self._kinds(self.artist), [Event.ENQUIRY_CREATED])
+        self.assertEqual(
+            Event.objects.get().data,
+            {'enquiry': enquiry_id, 'artpiece': self.artpiece.id})
+
+        self.client.login(email='artist@test.com', password='pass')
+        url = reverse('enquiry-detail', args=[enquiry_id])
+        self.client.get(url)
+        self.client.put(
+            url, {'response_message': 'yes', 'status': 1}, format='json')
+        self.assertEqual(self._kinds(self.buyer), [Event.ENQUIRY_ANSWERED])
+        self.assertEqual(Event.objects.count(), 2)
+
+    def test_like_event(self):
+        """ Asserts the artist is notified when their artpiece is liked. """
+        self.client.login(email='buyer@test.com', password='pass')
+        self.client.post('/api/likes/', {'liked_piece': self.artpiece.id})
+        self.assertEqual(self._kinds(self.artist), [Event.LIKE_RECEIVED])
+        self.assertEqual(self._kinds(self.buyer), [])
+
+
+class EventStreamTests(TransactionTestCase):
+    """
+    Test suite for the server-sent events stream, with the database broker
+    polling every 50ms.
+    """
+
+    def setUp(self):
+        """
+        Sets up a polling broker and a user.
+        """
+        broker._broker = DatabaseBroker(interval=0.05)
+        self.addCleanup(setattr, broker, '_broker', None)
+        self.user = CustomUser.objects.create_user(
+            email='user@test.com', password='pass')
+
+    async def _next_event(self, stream):
+        """ Returns the next event of a stream, skipping other lines. """
+        while True:
+            chunk = await asyncio.wait_for(anext(stream), 5)
+            chunk = chunk.decode()
+            if chunk.startswith('id:'):
+                return chunk
+
+    async def test_anonymous_user_cannot_connect(self):
+        """ Asserts anonymous users cannot connect to the stream. """
+        response = await self.async_client.get(reverse('notification-stream'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_stream_replays_missed_events_then_polls(self):
+        """
+        Asserts a reconnecting client first receives the events recorded
+        after the last one it received, then the events recorded by other
+        processes, found by polling.
+        """
+        create_event = sync_to_async(Event.objects.create)
+        seen = await create_event(
+            recipient=self.user, kind=Event.LIKE_RECEIVED)
+        missed = await create_event(
+            recipient=self.user, kind=Event.LIKE_RECEIVED, data={'like': 1})
+        await sync_to_async(self.async_client.force_login)(self.user)
+
+        response = await self.async_client.get(
+            reverse('notification-stream'),
+            headers={'Last-Event-ID': str(seen.pk)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        try:
+            chunk = await self._next_event(stream)
+            self.assertTrue(chunk.startswith(
+                f'id: {missed.pk}\nevent: like_received\n'))
+            self.assertIn('"like": 1', chunk)
+
+            # Give the poller time to read its starting point
+            await asyncio.sleep(0.2)
+            answered = await create_event(
+                recipient=self.user, kind=Event.ENQUIRY_ANSWERED)
+            chunk = await self._next_event(stream)
+            self.assertTrue(chunk.startswith(f'id: {answered.pk}\n'))
+        finally:
+            await stream.aclose()
+
+    async def test_events_committed_out_of_order_are_polled(self):
+        """
+        Asserts an event committed after an event with a higher id was
+        polled is still delivered.
+        """
+        last_id = await sync_to_async(get_last_event_id)()
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(
+            reverse('notification-stream'))
+        stream = response.streaming_content
+        try:
+            # The client subscribes once the stream is read
+            next_event = asyncio.ensure_future(self._next_event(stream))
+            await asyncio.sleep(0.2)
+            create_event = sync_to_async(Event.objects.create)
+            await create_event(
+                pk=last_id + 2, recipient=self.user, kind=Event.LIKE_RECEIVED)
+            chunk = await next_event
+            self.assertTrue(chunk.startswith(f'id: {last_id + 2}\n'))
+
+            # The event with the lower id commits last
+            await create_event(
+                pk=last_id + 1, recipient=self.user, kind=Event.LIKE_RECEIVED)
+            chunk = await self._next_event(stream)
+            self.assertTrue(chunk.startswith(f'id: {last_id + 1}\n'))
+        finally:
+            await stream.aclose()
@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import EventStream
+
+urlpatterns = [
+    path(
+        'notifications/stream/',
+        EventStream.as_view(),
+        name='notification-stream'
+        ),
+]
@@ -0,0 +1,107 @@
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .broker import get_broker
+
+# Delay before the browser reconnects after the stream ends, in ms
+RETRY_DELAY = 1000
+
+
+def authenticate(request):
+    """
+    Authenticates a request with the API's authentication classes (session
+    or JWT cookie), as the API views do.
+
+    Returns:
+        The authenticated user, or None.
+    """
+    request = Request(request, authenticators=[
+        authentication() for authentication
+        in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+def format_event(event):
+    """ Returns an event in the server-sent events format. """
+    data = json.dumps({
+        'id': event.pk,
+        'kind': event.kind,
+        'created_on': event.created_on.isoformat(),
+        **event.data,
+    })
+    return f'id: {event.pk}\nevent: {event.kind}\ndata: {data}\n\n'
+
+
+async def stream_events(user_id, last_event_id):
+    """
+    Yields the events of a user as they are published, with a comment line
+    every `NOTIFICATIONS_HEARTBEAT` seconds to keep the connection open.
+
+    The stream ends after `NOTIFICATIONS_STREAM_TIMEOUT` seconds. The
+    browser then reconnects, sending the id of the last event received, so
+    no event is lost, and the subscriptions of clients that left without the
+    server noticing are released.
+    """
+    yield f'retry: {RETRY_DELAY}\n\n'
+    deadline = time.monotonic() + settings.NOTIFICATIONS_STREAM_TIMEOUT
+    async with get_broker().subscribe(user_id, last_event_id) as events:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            new_events = await events.get(
+                min(remaining, settings.NOTIFICATIONS_HEARTBEAT))
+            if not new_events:
+                yield ': keep-alive\n\n'
+            for event in new_events:
+                yield format_event(event)
+
+
+class EventStream(View):
+    """
+    Asynchronous view streaming the notifications of the requesting user as
+    server-sent events, see `notifications.broker`.
+
+    Must be served by the ASGI application. Each connected client is a task
+    waiting on the event loop, instead of a worker thread or repeated
+    requests.
+
+    Clients connect with an `EventSource`. Each event has the id of the
+    Event as its id, the kind of the Event as its type, and a JSON object of
+    the Event as its data. A reconnecting client sends the id of the last
+    event it received as the `Last-Event-ID` header (or `last_event_id`
+    query parameter), and the events it missed are sent first.
+
+    Permissions:
+    - Only authenticated users can connect.
+    """
+    async def get(self, request, *args, **kwargs):
+        """
+        Streams the events of the requesting user. Responds with 403 if the
+        user is not authenticated.
+        """
+        user = await sync_to_async(authenticate)(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=403)
+
+        last_event_id = request.headers.get(
+            'Last-Event-ID', request.GET.get('last_event_id'))
+        try:
+            last_event_id = int(last_event_id)
+        except (TypeError, ValueError):
+            last_event_id = None
+
+        response = StreamingHttpResponse(
+            stream_events(user.pk, last_event_id),
+            content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
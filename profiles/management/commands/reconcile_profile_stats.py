@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from art_collections.models import ArtCollection
+from artpieces.models import Artpiece
+from likes.models import Like
+from profiles.models import Profile, ProfileStats
+
+
+def _count(queryset, owner='owner'):
+    """
+    Returns a subquery counting the rows of a queryset owned by the owner of
+    the profile stats being annotated or updated, through the `owner` path.
+    """
+    counts = queryset.filter(**{
+        f'{owner}__profile': OuterRef('pk')
+    }).order_by().values(owner).annotate(
+        count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    """
+    Management command repairing drift in the `ProfileStats` counter table.
+
+    Creates the missing stats rows, then compares every profile's stored
+    counts with the number of artpieces, collections and artpieces for sale
+    of its owner and the likes of these artpieces, and rewrites the ones
+    that differ in a single UPDATE.
+
+    Usage:
+        python manage.py reconcile_profile_stats [--dry-run]
+    """
+    help = 'Recalculates the profile stats counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted profiles without updating them.',
+        )
+
+    def handle(self, *args, **options):
+        actual_counts = {
+            'artpiece_count': _count(Artpiece.objects.all()),
+            'collection_count': _count(ArtCollection.objects.all()),
+            'for_sale_count': _count(Artpiece.objects.filter(for_sale=1)),
+            'likes_received': _count(
+                Like.objects.all(), owner='liked_piece__owner'),
+        }
+
+        with transaction.atomic():
+            missing_ids = list(Profile.objects.filter(
+                stats__isnull=True).values_list('pk', flat=True))
+            if missing_ids and not options['dry_run']:
+                ProfileStats.objects.bulk_create(
+                    [ProfileStats(profile_id=pk) for pk in missing_ids],
+                    ignore_conflicts=True)
+
+            drifted = ProfileStats.objects.annotate(**{
+                f'actual_{name}': count
+                for name, count in actual_counts.items()
+            }).filter(Q(*[
+                ~Q(**{name: F(f'actual_{name}')}) for name in actual_counts
+            ], _connector=Q.OR))
+            drifted_ids = list(drifted.values_list('pk', flat=True))
+
+            if drifted_ids and not options['dry_run']:
+                ProfileStats.objects.filter(pk__in=drifted_ids).update(
+                    **actual_counts)
+
+        action = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {len(missing_ids)} missing and {len(drifted_ids)} '
+            'drifted profile stats.'))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0008_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='image_color',
+            field=models.CharField(blank=True, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='image_placeholder',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.13 on 2026-10-18 08:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_profile_stats(apps, schema_editor):
+    """
+    Creates the stats of existing profiles, counted from the Artpiece and
+    ArtCollection tables.
+    """
+    Profile = apps.get_model('profiles', 'Profile')
+    ProfileStats = apps.get_model('profiles', 'ProfileStats')
+    Artpiece = apps.get_model('artpieces', 'Artpiece')
+    ArtCollection = apps.get_model('art_collections', 'ArtCollection')
+
+    def count(queryset):
+        return Coalesce(Subquery(queryset.filter(
+            owner__profile=OuterRef('pk')
+        ).order_by().values('owner').annotate(
+            count=Count('pk')).values('count')), 0)
+
+    ProfileStats.objects.bulk_create(
+        [ProfileStats(profile_id=pk)
+         for pk in Profile.objects.values_list('pk', flat=True)],
+        batch_size=1000)
+    ProfileStats.objects.update(
+        artpiece_count=count(Artpiece.objects.all()),
+        collection_count=count(ArtCollection.objects.all()),
+        for_sale_count=count(Artpiece.objects.filter(for_sale=1)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0009_image_placeholder'),
+        ('artpieces', '0010_collection_artpieces_index'),
+        ('art_collections', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileStats',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='profiles.profile')),
+                ('artpiece_count', models.PositiveIntegerField(default=0)),
+                ('collection_count', models.PositiveIntegerField(default=0)),
+                ('for_sale_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'profile stats',
+                'indexes': [models.Index(fields=['artpiece_count', 'profile'], name='profile_stats_artpieces_idx'), models.Index(fields=['collection_count', 'profile'], name='profile_stats_collections_idx'), models.Index(fields=['for_sale_count', 'profile'], name='profile_stats_for_sale_idx')],
+            },
+        ),
+        migrations.RunPython(
+            populate_profile_stats, migrations.RunPython.noop),
+    ]
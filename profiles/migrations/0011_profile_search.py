@@ -0,0 +1,55 @@
+# Generated by Django 4.2.13 on 2026-10-18 08:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.functions.text
+from profiles.search import create_name_search_index, drop_name_search_index
+
+
+def populate_likes_received(apps, schema_editor):
+    """ Sets likes_received on existing profile stats from the Like table. """
+    ProfileStats = apps.get_model('profiles', 'ProfileStats')
+    Like = apps.get_model('likes', 'Like')
+    counts = Like.objects.filter(
+        liked_piece__owner__profile=OuterRef('pk')
+    ).order_by().values('liked_piece__owner').annotate(
+        count=Count('pk')).values('count')
+    ProfileStats.objects.update(likes_received=Coalesce(Subquery(counts), 0))
+
+
+def create_search_index(apps, schema_editor):
+    """ Creates the trigram index on profile names, where available. """
+    create_name_search_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    """ Drops the trigram index on profile names. """
+    drop_name_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0010_profile_stats'),
+        ('likes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilestats',
+            name='likes_received',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(django.db.models.functions.text.Lower('location'), name='profile_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profilestats',
+            index=models.Index(fields=['likes_received', 'profile'], name='profile_stats_likes_idx'),
+        ),
+        migrations.RunPython(
+            populate_likes_received, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
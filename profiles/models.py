@@ -1,14 +1,18 @@
-import re
 import uuid
-from django.db import IntegrityError, models
-from django.db.models.signals import post_save
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Lower
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from users.models import CustomUser
+from images.models import IMAGE_STATUS_CHOICES
+from images.metadata import clear_image_metadata
+from images.outbox import schedule_image_deletion
+from viridian_api.tracking import FieldTrackerMixin
 from cloudinary.models import CloudinaryField
-from cloudinary.uploader import destroy
 
 
-class Profile(models.Model):
+class Profile(FieldTrackerMixin, models.Model):
     """
     Model representing a user profile.
 
@@ -23,8 +27,24 @@ class Profile(models.Model):
         description (CharField): A short description, can be blank.
         feature_image (CloudinaryField): The profile image, stored using
         Cloudinary.
+        image_status (CharField): Whether the profile image is ready, still
+        being uploaded to image storage, or failed to upload.
+        image_public_id (CharField): The Cloudinary public id of the profile
+        image.
+        image_width (PositiveIntegerField): The width of the image in px.
+        image_height (PositiveIntegerField): The height of the image in px.
+        image_format (CharField): The file format of the image.
+        image_placeholder (TextField): A tiny blurred version of the profile
+        image, as a data URI, shown while the image loads.
+        image_color (CharField): The dominant color of the profile image, as
+        a hex string.
         location (CharField): The location of the profile owner, can be blank.
+        Indexed case-insensitively for filtering profiles by location.
+        tracked_fields (tuple): Fields whose database values are remembered,
+        see FieldTrackerMixin.
     """
+    tracked_fields = ('name', 'profile_image', 'image_public_id')
+
     owner = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -37,32 +57,49 @@ class Profile(models.Model):
     profile_image = CloudinaryField(
         'image',
         default='default_t6trzy')
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        default='ready')
+    image_public_id = models.CharField(max_length=255, blank=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_format = models.CharField(max_length=10, blank=True)
+    image_placeholder = models.TextField(blank=True)
+    image_color = models.CharField(max_length=7, blank=True)
     location = models.CharField(max_length=50, blank=True)
 
     def save(self, *args, **kwargs):
         """
         Overrides the save method to ensure a unique name is generated
         if not provided. Checks if a new image has been uploaded. If so,
-        deletes the old image from Cloudinary, unless the old image was the
-        default image.
+        records the old image for deletion from Cloudinary, unless the old
+        image was the default image. The old image is known from the tracked
+        field values, so no query is made. A new image assigned without its
+        metadata clears the metadata of the old one.
         """
         if not self.name:
             self._generate_unique_name()
 
         old_image = None
-        if self.pk:
-            old_image = Profile.objects.get(pk=self.pk).profile_image
-
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if self.pk and (
+                update_fields is None or 'profile_image' in update_fields) \
+                and self.has_changed('profile_image'):
+            old_image = self.get_original_value('profile_image')
+            old_public_id = self.get_original_value('image_public_id')
+            if not self.has_changed('image_public_id'):
+                kwargs['update_fields'] = clear_image_metadata(
+                    self, update_fields)
 
-        if old_image and old_image != self.profile_image:
-            # Check if the old image is not the default image
-            default_image_public_id = 'default_t6trzy'
-            match = re.search(r'/([^/]+)$', old_image.url)
-            if match:
-                public_id = match.group(1).split('.')[0]
-                if public_id != default_image_public_id:
-                    destroy(public_id)
+        # The old image is recorded for deletion only if the save commits
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_image:
+                # Keeps the default image
+                schedule_image_deletion(
+                    old_image, keep=['default_t6trzy'],
+                    public_id=old_public_id)
 
     def _generate_unique_name(self):
         """
@@ -79,27 +116,107 @@ class Profile(models.Model):
 
     def delete(self, *args, **kwargs):
         """
-        Deletes the profile's associated image from Cloudinary before
-        deleting the profile instance, unless it's the default image.
+        Records the profile's associated image for deletion from Cloudinary,
+        unless it's the default image, and deletes the profile instance, in
+        one transaction.
         """
-        default_image_public_id = 'default_profile_shke8m'
-        # Regular expression to extract public_id from image url
-        match = re.search(r'/([^/]+)$', self.profile_image.url)
-        if match:
-            public_id = match.group(1).split('.')[0]
-            if public_id != default_image_public_id:
-                destroy(public_id)
+        with transaction.atomic():
+            schedule_image_deletion(
+                self.profile_image,
+                keep=['default_t6trzy', 'default_profile_shke8m'],
+                public_id=self.image_public_id)
 
-        # Delete the Profile instance
-        super().delete(*args, **kwargs)
+            # Delete the Profile instance
+            return super().delete(*args, **kwargs)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'],
+                name='profile_created_at_idx'),
+            models.Index(Lower('location'), name='profile_location_idx'),
+        ]
 
     def __str__(self):
         return f"{self.owner.email}'s profile"
 
 
+class ProfileStats(models.Model):
+    """
+    Counters of a profile's artpieces, collections and likes received (a
+    counter table).
+
+    The counters are kept up to date by the signal receivers below, with
+    relative UPDATEs, so listing profiles reads one row per profile instead
+    of counting the owner's artpieces and collections. Writes that bypass
+    the signals adjust the counters with `adjust_profile_stats`, and drift
+    is repaired by the `reconcile_profile_stats` management command.
+
+    Attributes:
+        profile (OneToOneField): The profile, also the primary key.
+        artpiece_count (PositiveIntegerField): Number of art pieces owned by
+        the profile owner.
+        collection_count (PositiveIntegerField): Number of collections owned
+        by the profile owner.
+        for_sale_count (PositiveIntegerField): Number of art pieces marked
+        for sale owned by the profile owner.
+        likes_received (PositiveIntegerField): Number of likes of the art
+        pieces owned by the profile owner.
+
+    Meta:
+        indexes (list): Indexes on each counter (with the profile as
+        tie-breaker) for ordering profiles by their stats.
+    """
+    profile = models.OneToOneField(
+        Profile,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats')
+    artpiece_count = models.PositiveIntegerField(default=0)
+    collection_count = models.PositiveIntegerField(default=0)
+    for_sale_count = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'profile stats'
+        indexes = [
+            models.Index(
+                fields=['artpiece_count', 'profile'],
+                name='profile_stats_artpieces_idx'),
+            models.Index(
+                fields=['collection_count', 'profile'],
+                name='profile_stats_collections_idx'),
+            models.Index(
+                fields=['for_sale_count', 'profile'],
+                name='profile_stats_for_sale_idx'),
+            models.Index(
+                fields=['likes_received', 'profile'],
+                name='profile_stats_likes_idx'),
+        ]
+
+    def __str__(self):
+        return f'Stats of profile {self.profile_id}'
+
+
+def adjust_profile_stats(owner_id, **deltas):
+    """
+    Adds to the counters of a user's profile stats with a single relative
+    UPDATE. Counters never go below zero.
+
+    Args:
+        owner_id: The id of the profile owner.
+        **deltas: The amount to add to each counter, e.g.
+        `artpiece_count=1`.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    ProfileStats.objects.filter(profile__owner_id=owner_id).update(**{
+        name: F(name) + delta if delta > 0 else Greatest(F(name) + delta, 0)
+        for name, delta in deltas.items()})
+
+
 @receiver(post_save, sender=CustomUser)
 def create_profile(sender, instance, created, **kwargs):
     """
@@ -117,3 +234,59 @@ def create_profile(sender, instance, created, **kwargs):
 
 
 post_save.connect(create_profile, sender=CustomUser)
+
+
+@receiver(post_save, sender=Profile)
+def create_profile_stats(sender, instance, created, **kwargs):
+    """ Signal receiver creating the stats of a new profile. """
+    if created:
+        ProfileStats.objects.create(profile=instance)
+
+
+@receiver(post_save, sender='artpieces.Artpiece')
+def count_saved_artpiece(sender, instance, created, update_fields,
+                         **kwargs):
+    """
+    Signal receiver counting a new artpiece, and an artpiece put up for or
+    withdrawn from sale, in its owner's profile stats. The previous sale
+    status is known from the tracked field values.
+    """
+    for_sale = instance.for_sale == 1
+    if created:
+        adjust_profile_stats(
+            instance.owner_id, artpiece_count=1, for_sale_count=int(for_sale))
+    elif update_fields is None or 'for_sale' in update_fields:
+        was_for_sale = instance.get_original_value('for_sale') == 1
+        adjust_profile_stats(
+            instance.owner_id, for_sale_count=for_sale - was_for_sale)
+
+
+@receiver(post_delete, sender='artpieces.Artpiece')
+def uncount_deleted_artpiece(sender, instance, **kwargs):
+    """
+    Signal receiver removing a deleted artpiece, and the likes deleted with
+    it, from its owner's profile stats.
+    """
+    adjust_profile_stats(
+        instance.owner_id,
+        artpiece_count=-1,
+        for_sale_count=-int(instance.for_sale == 1),
+        likes_received=-instance.likes_count)
+
+
+@receiver(post_save, sender='art_collections.ArtCollection')
+def count_saved_collection(sender, instance, created, **kwargs):
+    """
+    Signal receiver counting a new collection in its owner's profile stats.
+    """
+    if created:
+        adjust_profile_stats(instance.owner_id, collection_count=1)
+
+
+@receiver(post_delete, sender='art_collections.ArtCollection')
+def uncount_deleted_collection(sender, instance, **kwargs):
+    """
+    Signal receiver removing a deleted collection from its owner's profile
+    stats.
+    """
+    adjust_profile_stats(instance.owner_id, collection_count=-1)
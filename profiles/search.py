@@ -0,0 +1,80 @@
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from artpieces.search import RankedSearchFilter
+
+NAME_TRIGRAM_INDEX = 'profile_name_trgm_idx'
+NAME_COLUMN = '"profiles_profile"."name"'
+
+
+def create_name_search_index(schema_editor):
+    """
+    Creates a trigram index on profile names on PostgreSQL, which serves
+    both substring (`ILIKE`) and similarity (`%`) searches. Other databases
+    search with plain lookups.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX {NAME_TRIGRAM_INDEX} ON profiles_profile '
+        'USING GIN (name gin_trgm_ops)')
+
+
+def drop_name_search_index(schema_editor):
+    """ Drops the trigram index on profile names, if any. """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {NAME_TRIGRAM_INDEX}')
+
+
+def search_profiles(queryset, terms):
+    """
+    Filters a queryset to the profiles whose name contains every term, and
+    annotates a `search_rank` (higher is better) ranking names starting
+    with the first term first.
+
+    On PostgreSQL the terms are matched through the trigram index, names
+    similar to the search (e.g. misspelled) also match, and results are
+    ranked by similarity. The terms are escaped in the `ILIKE` patterns, as
+    they can contain the `_` wildcard, a word character.
+
+    Args:
+        queryset: A queryset of Profile instances.
+        terms: The search terms, see `artpieces.search.get_search_terms`.
+    """
+    text = ' '.join(terms)
+    if connection.vendor == 'postgresql':
+        patterns = [connection.ops.prep_for_like_query(term) for term in terms]
+        contains = ' AND '.join([f'{NAME_COLUMN} ILIKE %s'] * len(terms))
+        return queryset.filter(RawSQL(
+            f'(({contains}) OR {NAME_COLUMN} %% %s)',
+            [f'%{pattern}%' for pattern in patterns] + [text],
+            output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f'(({NAME_COLUMN} ILIKE %s)::int + similarity({NAME_COLUMN}, %s))',
+            [f'{patterns[0]}%', text],
+            output_field=FloatField(),
+        ))
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term)
+    return queryset.filter(condition).annotate(search_rank=Case(
+        When(name__istartswith=terms[0], then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    ))
+
+
+class ProfileSearchFilter(RankedSearchFilter):
+    """
+    Search filter for profiles by name, backed by a trigram index on
+    PostgreSQL instead of `icontains` lookups.
+
+    Matches profiles whose name contains every search term, ordered by
+    relevance (names starting with the search first) unless the request
+    specifies an ordering.
+    """
+    def search(self, queryset, terms):
+        return search_profiles(queryset, terms)
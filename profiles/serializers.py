@@ -1,6 +1,11 @@
 from rest_framework import serializers
+from images.metadata import set_image_metadata
+from images.pipeline import enqueue_image_upload
+from images.placeholders import schedule_image_placeholder
+from images.signed_uploads import SignedUploadField
+from images.uploads import ImageUploadField
+from images.variants import get_image_variants
 from .models import Profile
-import cloudinary.uploader
 
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -12,7 +17,22 @@ class ProfileSerializer(serializers.ModelSerializer):
         is_owner (SerializerMethodField): Indicates if the request user is the
         profile owner.
         profile_image_url (SerializerMethodField): URL of the profile image.
-        profile_image (ImageField): Image data for profile image, write-only.
+        image_variants (SerializerMethodField): URLs of the thumb, card and
+        full size variants of the profile image, see `images.variants`.
+        profile_image (ImageUploadField): Image data for profile image,
+        write-only. Size and dimensions are validated by the field.
+        profile_image_upload (SignedUploadField): Result of a direct upload to
+        Cloudinary, used instead of profile_image, write-only.
+        image_status (ReadOnlyField): Whether the profile image is ready, still
+        being uploaded, or failed to upload.
+        image_width (ReadOnlyField): Width of the profile image in px, if
+        known.
+        image_height (ReadOnlyField): Height of the profile image in px, if
+        known.
+        image_placeholder (ReadOnlyField): Tiny blurred version of the profile
+        image as a data URI, if computed.
+        image_color (ReadOnlyField): Dominant color of the profile image, if
+        computed.
         name (CharField): Name of the profile, optional and allow blank.
         artpiece_count (ReadOnlyField): Number of art pieces associated with
         the profile.
@@ -20,6 +40,8 @@ class ProfileSerializer(serializers.ModelSerializer):
         the profile.
         for_sale_count (ReadOnlyField): Number of art pieces marked for sale
         associated with the profile.
+        likes_received (ReadOnlyField): Number of likes of the art pieces
+        associated with the profile.
 
     Methods:
         validate_name(value): Validates uniqueness and length constraints for
@@ -28,9 +50,8 @@ class ProfileSerializer(serializers.ModelSerializer):
         description field.
         validate_location(value): Validates length constraints for the location
         field.
-        validate_profile_image(data): Validates size and dimensions of the
-        profile image.
         get_profile_image_url(obj): Retrieves the URL of the profile image.
+        get_image_variants(obj): Retrieves the URLs of the image variants.
         get_is_owner(obj): Determines if the request user is the owner of the
         profile.
         create: Handles creation of Profile instances
@@ -39,11 +60,19 @@ class ProfileSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.id')
     is_owner = serializers.SerializerMethodField()
     profile_image_url = serializers.SerializerMethodField()
-    profile_image = serializers.ImageField(write_only=True, required=False)
+    image_variants = serializers.SerializerMethodField()
+    profile_image = ImageUploadField(write_only=True, required=False)
+    profile_image_upload = SignedUploadField(write_only=True, required=False)
+    image_status = serializers.ReadOnlyField()
+    image_width = serializers.ReadOnlyField()
+    image_height = serializers.ReadOnlyField()
+    image_placeholder = serializers.ReadOnlyField()
+    image_color = serializers.ReadOnlyField()
     name = serializers.CharField(required=False, allow_blank=True)
     artpiece_count = serializers.ReadOnlyField()
     collection_count = serializers.ReadOnlyField()
     for_sale_count = serializers.ReadOnlyField()
+    likes_received = serializers.ReadOnlyField()
 
     def validate_name(self, value):
         """
@@ -78,35 +107,6 @@ class ProfileSerializer(serializers.ModelSerializer):
                 ('Location cannot be longer than 50 characters.'))
         return value
 
-    def validate_profile_image(self, data):
-        """
-        Validates the image field - Checks that the size does not exceed 2MB
-        and dimensions are within 2000x2000px.
-
-        Args:
-            data: The image data to be validated.
-
-        Returns:
-            The validated image data.
-
-        Raises:
-            serializers.ValidationError: If the image size or dimensions exceed
-            the specified limits.
-        """
-        if not data:  # No image provided
-            return data  # Keep existing image
-
-        if data.size > 2 * 1024 * 1024:
-            raise serializers.ValidationError('Image size larger than 2MB!')
-        if data.image.height > 2000:
-            raise serializers.ValidationError(
-                'Image height larger than 2000px!')
-        if data.image.width > 2000:
-            raise serializers.ValidationError(
-                'Image width larger than 2000px!')
-
-        return data
-
     def get_profile_image_url(self, obj):
         """
         Returns the URL of the profile image.
@@ -121,6 +121,13 @@ class ProfileSerializer(serializers.ModelSerializer):
             return obj.profile_image
         return obj.profile_image.url
 
+    def get_image_variants(self, obj):
+        """
+        Returns the URLs of the thumb, card and full size variants of the
+        profile image, built without calling Cloudinary.
+        """
+        return get_image_variants(obj.profile_image, obj.image_public_id)
+
     def get_is_owner(self, obj):
         """
         Returns whether the request user is the owner of the profile.
@@ -136,37 +143,60 @@ class ProfileSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """
-        Handles creation of a new Profile instance.
+        Handles creation of a new Profile instance. Uses the image uploaded
+        directly to Cloudinary, or queues the uploaded image file, if any, see
+        `images.pipeline`.
         """
         profile_image = validated_data.pop('profile_image', None)
-
-        if profile_image:
-            upload_data = cloudinary.uploader.upload(profile_image, secure=True)
-            validated_data['profile_image'] = upload_data['secure_url']
-
-        profile = Profile.objects.create(**validated_data)
+        signed_upload = validated_data.pop('profile_image_upload', None)
+
+        if profile_image and not signed_upload:
+            validated_data['image_status'] = 'processing'
+
+        profile = Profile(**validated_data)
+        if signed_upload:
+            profile.profile_image = signed_upload['url']
+            set_image_metadata(profile, signed_upload)
+        profile.save()
+        if profile_image and not signed_upload:
+            enqueue_image_upload(profile, 'profile_image', profile_image)
+        elif signed_upload:
+            schedule_image_placeholder(profile, 'profile_image')
         return profile
 
     def update(self, instance, validated_data):
         """
-        Handles updating an existing Profile instance.
+        Handles updating an existing Profile instance. Uses the image uploaded
+        directly to Cloudinary, or queues the uploaded image file, if any; in
+        the latter case the current image is kept until the new one has been
+        stored.
         """
         profile_image = validated_data.pop('profile_image', None)
+        signed_upload = validated_data.pop('profile_image_upload', None)
 
-        if profile_image:
-            upload_data = cloudinary.uploader.upload(profile_image, secure=True)
-            instance.profile_image = upload_data['secure_url']
+        if signed_upload:
+            instance.profile_image = signed_upload['url']
+            set_image_metadata(instance, signed_upload)
+        elif profile_image:
+            instance.image_status = 'processing'
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
         instance.save()
+        if profile_image and not signed_upload:
+            enqueue_image_upload(instance, 'profile_image', profile_image)
+        elif signed_upload:
+            schedule_image_placeholder(instance, 'profile_image')
         return instance
 
     class Meta:
         model = Profile
         fields = [
             'id', 'owner', 'is_owner', 'created_at', 'updated_at', 'name',
-            'description', 'profile_image', 'profile_image_url', 'location',
-            'artpiece_count', 'collection_count', 'for_sale_count'
+            'description', 'profile_image', 'profile_image_upload',
+            'profile_image_url', 'image_variants', 'image_status',
+            'image_width', 'image_height', 'image_placeholder', 'image_color',
+            'location', 'artpiece_count', 'collection_count', 'for_sale_count',
+            'likes_received'
         ]
@@ -0,0 +1,196 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from users.models import CustomUser
+from art_collections.models import ArtCollection
+from artpieces.models import Artpiece
+from likes.models import Like
+from .models import Profile, ProfileStats
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class ProfileStatsTests(APITestCase):
+    """
+    Test suite for the profile stats counter table and the profile list
+    counts read from it.
+    """
+
+    def setUp(self):
+        """
+        Set up two test users.
+        """
+        self.user = CustomUser.objects.create_user(
+            email='test@test.com',
+            password='testpass')
+        self.other_user = CustomUser.objects.create_user(
+            email='other@test.com',
+            password='otherpass')
+
+    def _stats(self, user):
+        """ Returns the stats of a user's profile, read from the database. """
+        return ProfileStats.objects.get(profile__owner=user)
+
+    def test_stats_follow_artpieces_and_collections(self):
+        """
+        Asserts the counts are updated when artpieces and collections are
+        created, put up for sale, withdrawn from sale and deleted.
+        """
+        artpiece = Artpiece.objects.create(
+            owner=self.user, title='first', for_sale=1)
+        Artpiece.objects.create(owner=self.user, title='second')
+        collection = ArtCollection.objects.create(
+            owner=self.user, title='collection')
+        stats = self._stats(self.user)
+        self.assertEqual(
+            (stats.artpiece_count, stats.collection_count,
+             stats.for_sale_count),
+            (2, 1, 1))
+
+        artpiece.for_sale = 2
+        artpiece.save()
+        self.assertEqual(self._stats(self.user).for_sale_count, 0)
+        artpiece.for_sale = 1
+        artpiece.save()
+        self.assertEqual(self._stats(self.user).for_sale_count, 1)
+
+        artpiece.delete()
+        collection.delete()
+        stats = self._stats(self.user)
+        self.assertEqual(
+            (stats.artpiece_count, stats.collection_count,
+             stats.for_sale_count),
+            (1, 0, 0))
+
+    def test_list_reads_counts_without_counting(self):
+        """
+        Asserts the profile list returns the counts, and that its number of
+        queries does not grow with the number of artpieces.
+        """
+        Artpiece.objects.create(owner=self.user, title='first', for_sale=1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/profiles/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        query_count = len(queries)
+        profiles = {
+            profile['owner']: profile for profile in response.data['results']}
+        self.assertEqual(profiles[self.user.pk]['artpiece_count'], 1)
+        self.assertEqual(profiles[self.user.pk]['for_sale_count'], 1)
+
+        for index in range(5):
+            Artpiece.objects.create(owner=self.user, title=f'title {index}')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/profiles/')
+        self.assertEqual(len(queries), query_count)
+
+    def test_list_can_be_ordered_by_count(self):
+        """
+        Asserts profiles can be ordered by their number of artpieces.
+        """
+        Artpiece.objects.create(owner=self.other_user, title='first')
+        response = self.client.get('/api/profiles/?ordering=-artpiece_count')
+        owners = [profile['owner'] for profile in response.data['results']]
+        self.assertEqual(owners, [self.other_user.pk, self.user.pk])
+
+        response = self.client.get('/api/profiles/?ordering=artpiece_count')
+        owners = [profile['owner'] for profile in response.data['results']]
+        self.assertEqual(owners, [self.user.pk, self.other_user.pk])
+
+    def test_reconcile_command_repairs_drift(self):
+        """
+        Asserts the reconcile_profile_stats command recreates missing stats
+        and rewrites drifted counts, and only reports them with --dry-run.
+        """
+        Artpiece.objects.create(owner=self.user, title='first', for_sale=1)
+        ProfileStats.objects.filter(profile__owner=self.user).update(
+            artpiece_count=7, for_sale_count=0)
+        ProfileStats.objects.filter(profile__owner=self.other_user).delete()
+
+        out = StringIO()
+        call_command('reconcile_profile_stats', '--dry-run', stdout=out)
+        self.assertIn('Found 1 missing and 1 drifted', out.getvalue())
+        self.assertEqual(self._stats(self.user).artpiece_count, 7)
+
+        call_command('reconcile_profile_stats', stdout=StringIO())
+        stats = self._stats(self.user)
+        self.assertEqual((stats.artpiece_count, stats.for_sale_count), (1, 1))
+        self.assertEqual(self._stats(self.other_user).artpiece_count, 0)
+
+    def test_likes_received_follow_likes(self):
+        """
+        Asserts likes_received counts the likes created and deleted through
+        the API, and the likes deleted with an artpiece, and that profiles
+        can be ordered by it.
+        """
+        artpiece = Artpiece.objects.create(owner=self.other_user, title='art')
+        self.client.login(email='test@test.com', password='testpass')
+        response = self.client.post(
+            '/api/likes/', {'liked_piece': artpiece.pk})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._stats(self.other_user).likes_received, 1)
+
+        response = self.client.get('/api/profiles/?ordering=-likes_received')
+        self.assertEqual(
+            response.data['results'][0]['owner'], self.other_user.pk)
+        self.assertEqual(response.data['results'][0]['likes_received'], 1)
+
+        self.client.delete(f"/api/likes/{Like.objects.get().pk}/")
+        self.assertEqual(self._stats(self.other_user).likes_received, 0)
+
+        Like.objects.create(owner=self.user, liked_piece=artpiece)
+        Artpiece.objects.filter(pk=artpiece.pk).update(likes_count=1)
+        ProfileStats.objects.filter(profile__owner=self.other_user).update(
+            likes_received=1)
+        Artpiece.objects.get(pk=artpiece.pk).delete()
+        stats = self._stats(self.other_user)
+        self.assertEqual((stats.artpiece_count, stats.likes_received), (0, 0))
+
+
+class ProfileSearchTests(APITestCase):
+    """
+    Test suite for searching and filtering the profile list.
+    """
+
+    def setUp(self):
+        """
+        Set up three users with named and located profiles.
+        """
+        for name, location in [
+                ('anna', 'London'), ('joanna', 'london'), ('bob', 'Paris')]:
+            user = CustomUser.objects.create_user(
+                email=f'{name}@test.com',
+                password='testpass')
+            Profile.objects.filter(owner=user).update(
+                name=name, location=location)
+
+    def _names(self, query):
+        """ Returns the names of the profiles listed for a query. """
+        response = self.client.get(f'/api/profiles/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [profile['name'] for profile in response.data['results']]
+
+    def test_search_by_name_ranks_prefix_matches_first(self):
+        """
+        Asserts the search matches names containing the search, with names
+        starting with it first.
+        """
+        self.assertEqual(self._names('search=ANN'), ['anna', 'joanna'])
+        self.assertEqual(self._names('search=bo'), ['bob'])
+
+    def test_search_matches_wildcards_literally(self):
+        """
+        Asserts `_` in the search matches only itself, not any character.
+        """
+        user = CustomUser.objects.create_user(
+            email='under@test.com', password='testpass')
+        Profile.objects.filter(owner=user).update(name='jo_anna')
+        self.assertEqual(self._names('search=o_a'), ['jo_anna'])
+
+    def test_filter_by_location_ignores_case(self):
+        """
+        Asserts profiles can be filtered by location, ignoring case.
+        """
+        self.assertEqual(
+            sorted(self._names('location=LONDON')), ['anna', 'joanna'])
+        self.assertEqual(self._names('location=paris&search=b'), ['bob'])
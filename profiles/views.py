@@ -1,10 +1,47 @@
-from django.db.models import Count, Case, When, IntegerField
-from rest_framework import generics
+from django.db.models import F, Value
+from django.db.models.functions import Lower
+from django_filters import rest_framework as django_filters
+from rest_framework import filters, generics
 from viridian_api.permissions import IsOwnerOrReadOnly
 from .models import Profile
+from .search import ProfileSearchFilter
 from .serializers import ProfileSerializer
 
 
+def annotate_profile_stats(queryset):
+    """
+    Annotates profiles with their art piece, collection, for sale and likes
+    received counts, read from the profile stats counter table with a single
+    join, see `ProfileStats`.
+    """
+    return queryset.select_related('stats').annotate(
+        artpiece_count=F('stats__artpiece_count'),
+        collection_count=F('stats__collection_count'),
+        for_sale_count=F('stats__for_sale_count'),
+        likes_received=F('stats__likes_received'),
+    )
+
+
+class ProfileFilter(django_filters.FilterSet):
+    """
+    Filters for the profile list.
+
+    Filters:
+    - location: Profiles whose location matches the value, ignoring case.
+    Compares lowercased values, so the lookup uses the expression index on
+    the location.
+    """
+    location = django_filters.CharFilter(method='filter_location')
+
+    class Meta:
+        model = Profile
+        fields = ['location']
+
+    def filter_location(self, queryset, name, value):
+        return queryset.alias(location_lower=Lower('location')).filter(
+            location_lower=Lower(Value(value)))
+
+
 class ProfileList(generics.ListAPIView):
     """
     API view for listing profiles.
@@ -19,20 +56,37 @@ class ProfileList(generics.ListAPIView):
     - collection_count: Number of collections associated with each profile.
     - for_sale_count: Number of art pieces marked for sale associated with each
     profile.
+    - likes_received: Number of likes of the art pieces associated with each
+    profile.
+
+    Filters:
+    - DjangoFilterBackend: Allows filtering of profiles by location, see
+    `ProfileFilter`.
+    - ProfileSearchFilter: Enables searching for profiles by name, through a
+    trigram index where available. Results are ordered by relevance unless
+    an ordering is requested.
+    - OrderingFilter: Profiles can be ordered by artpiece_count,
+    collection_count, for_sale_count, likes_received or created_at, e.g.
+    `?ordering=-artpiece_count`. The counts are indexed columns of the
+    profile stats table.
 
     """
-    queryset = Profile.objects.annotate(
-        artpiece_count=Count('owner__artpiece', distinct=True),
-        collection_count=Count('owner__artcollection', distinct=True),
-        for_sale_count=Count(
-            Case(
-                When(owner__artpiece__for_sale=1, then='owner__artpiece__id'),
-                output_field=IntegerField()
-            ),
-            distinct=True
-        )
-    )
+    queryset = annotate_profile_stats(Profile.objects.all())
     serializer_class = ProfileSerializer
+    filter_backends = [
+        django_filters.DjangoFilterBackend,
+        ProfileSearchFilter,
+        filters.OrderingFilter,
+    ]
+    filterset_class = ProfileFilter
+    search_fields = ['name']
+    ordering_fields = [
+        'artpiece_count',
+        'collection_count',
+        'for_sale_count',
+        'likes_received',
+        'created_at',
+    ]
 
 
 class ProfileDetail(generics.RetrieveUpdateAPIView):
@@ -50,18 +104,10 @@ class ProfileDetail(generics.RetrieveUpdateAPIView):
     - collection_count: Number of collections associated with the profile.
     - for_sale_count: Number of art pieces marked for sale associated with
     the profile.
+    - likes_received: Number of likes of the art pieces associated with the
+    profile.
 
     """
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Profile.objects.annotate(
-        artpiece_count=Count('owner__artpiece', distinct=True),
-        collection_count=Count('owner__artcollection', distinct=True),
-        for_sale_count=Count(
-            Case(
-                When(owner__artpiece__for_sale=1, then='owner__artpiece__id'),
-                output_field=IntegerField()
-            ),
-            distinct=True
-        )
-    )
+    queryset = annotate_profile_stats(Profile.objects.all())
     serializer_class = ProfileSerializer
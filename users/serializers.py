@@ -2,6 +2,7 @@ from rest_framework import serializers
 from dj_rest_auth.registration.serializers import RegisterSerializer
 from dj_rest_auth.serializers import UserDetailsSerializer
 from users.models import CustomUser
+from images.variants import get_thumbnail_url
 
 
 class CustomRegisterSerializer(RegisterSerializer):
@@ -103,12 +104,17 @@ class CurrentUserSerializer(UserDetailsSerializer):
     Fields:
         profile_id (ReadOnlyField): The ID of the user's profile.
         profile_name (ReadOnlyField): The name of the user's profile.
-        profile_image (ReadOnlyField): The URL of the user's profile image.
+        profile_image (SerializerMethodField): The URL of the user's profile
+        image thumbnail.
     """
     profile_id = serializers.ReadOnlyField(source='profile.id')
     profile_name = serializers.ReadOnlyField(source='profile.name')
-    profile_image = serializers.ReadOnlyField(
-        source='profile.profile_image.url')
+    profile_image = serializers.SerializerMethodField()
+
+    def get_profile_image(self, obj):
+        """ Returns the url of the user's profile image thumbnail. """
+        return get_thumbnail_url(
+            obj.profile.profile_image, obj.profile.image_public_id)
 
     class Meta(UserDetailsSerializer.Meta):
         model = CustomUser
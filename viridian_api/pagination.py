@@ -0,0 +1,257 @@
+import json
+from datetime import date, datetime
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on every column of the queryset's ordering.
+
+    Unlike DRF's `CursorPagination`, which filters on the first ordering
+    field and skips ties with an OFFSET, the cursor stores the values of all
+    ordering fields of the boundary row, and a unique `pk` tie-breaker is
+    appended to the ordering. Each page is then a single index range scan of
+    `page_size + 1` rows, no COUNT query is issued, and deep pages cost the
+    same as the first one. Ties on non unique fields such as `likes_count`
+    are paged through without offsets.
+
+    The ordering is taken from the queryset, so the ordering requested
+    through `OrderingFilter` (or the view's default ordering) is respected.
+    Ordering fields must not be nullable.
+
+    Union querysets are paginated by applying the cursor to each part of the
+    union, and, where the database allows it, ordering and limiting each
+    part to a page, so each part is its own index range scan.
+
+    Methods:
+        paginate_queryset: Returns the page following (or preceding) the
+        cursor.
+        get_next_link / get_previous_link: Returns links encoding the last or
+        first row of the page.
+        get_ordering: Returns the queryset's ordering with a pk tie-breaker.
+    """
+    ordering = ('-pk',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Returns the page of results following the cursor in the request, or
+        the first page if no cursor was given.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self._decode_position(self.cursor)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = _reverse_ordering(ordering)
+        keyset_filter = Q()
+        if position is not None:
+            keyset_filter = self._keyset_filter(position, reverse)
+        try:
+            if queryset.query.combinator:
+                queryset = _filter_union(
+                    queryset, keyset_filter, ordering, self.page_size + 1)
+            else:
+                queryset = queryset.filter(keyset_filter)
+        except (ValidationError, TypeError, ValueError):
+            # A position value the ordering field cannot convert
+            raise NotFound(self.invalid_cursor_message)
+        queryset = queryset.order_by(*ordering)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        """ Returns a link to the page after the last row of this page. """
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(
+            self.page[-1], self.ordering)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        """ Returns a link to the page before the first row of this page. """
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(
+            self.page[0], self.ordering)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position))
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Returns the ordering already applied to the queryset (by
+        `OrderingFilter` or the view), falling back to the model's default
+        ordering, with a `pk` tie-breaker appended so that the ordering is
+        unique.
+        """
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering or [])
+        if not all(isinstance(field, str) for field in ordering):
+            ordering = []
+        ordering = ordering or list(self.ordering)
+
+        pk_names = {'pk', queryset.model._meta.pk.name}
+        if not any(field.lstrip('-') in pk_names for field in ordering):
+            prefix = '-' if ordering[0].startswith('-') else ''
+            ordering.append(f'{prefix}pk')
+        return tuple(ordering)
+
+    def _keyset_filter(self, position, reverse):
+        """
+        Builds the row comparison `(a, b, c) > (x, y, z)` as a Q object,
+        honouring the direction of each ordering field.
+        """
+        keyset_filter = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            clause = Q(**{
+                f"{field.lstrip('-')}__{lookup}": position[index]})
+            for previous, value in zip(self.ordering[:index], position):
+                clause &= Q(**{previous.lstrip('-'): value})
+            keyset_filter |= clause
+        return keyset_filter
+
+    def _decode_position(self, cursor):
+        """
+        Decodes the list of ordering values stored in the cursor. Ordering
+        fields are not nullable, so each value must be a string or a number.
+        """
+        if cursor is None or cursor.position is None:
+            return None
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            position = None
+        if not isinstance(position, list) or (
+                len(position) != len(self.ordering)) or not all(
+                    isinstance(value, (str, int, float))
+                    for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def _get_position_from_instance(self, instance, ordering):
+        """
+        Returns the JSON encoded values of all ordering fields of a row.
+        """
+        values = []
+        for field in ordering:
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                if isinstance(value, dict):
+                    value = value[attr]
+                else:
+                    value = getattr(value, attr)
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            values.append(value)
+        return json.dumps(values, default=str)
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    The project's default pagination class.
+
+    Behaves like `PageNumberPagination` unless the client opts in to keyset
+    pagination, either by passing `?pagination=cursor` for the first page or
+    by following a `next` link containing a `cursor` parameter. Keyset pages
+    keep the `next`/`previous`/`results` response shape but skip the COUNT
+    query and the OFFSET scan (see `KeysetPagination`).
+
+    Methods:
+        use_cursor: Returns True if the request opts in to keyset pagination.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    keyset_pagination_class = KeysetPagination
+
+    def use_cursor(self, request):
+        """ Returns True if the request opts in to keyset pagination. """
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == self.cursor_mode
+            or self.keyset_pagination_class.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Delegates to `KeysetPagination` when the request opts in to it, and
+        to page number pagination otherwise.
+        """
+        self.keyset = None
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = self.keyset_pagination_class()
+        self.keyset.page_size = self.page_size
+        page = self.keyset.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.keyset.display_page_controls
+        return page
+
+    def get_paginated_response(self, data):
+        """ Returns the response of whichever paginator was used. """
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        """ Renders the browsable API page controls. """
+        if self.keyset is not None:
+            return self.keyset.to_html()
+        return super().to_html()
+
+
+def _filter_union(queryset, condition, ordering, limit):
+    """
+    Filters each part of a union queryset, which cannot be filtered as a
+    whole, and unites the parts again. Where the database supports it, each
+    part is also ordered and limited to `limit` rows.
+    """
+    features = connections[queryset.db].features
+    parts = []
+    for query in queryset.query.combined_queries:
+        part = queryset.model._default_manager.using(queryset.db).all()
+        part.query = query.chain()
+        part = part.filter(condition)
+        if features.supports_slicing_ordering_in_compound:
+            part = part.order_by(*ordering)[:limit]
+        parts.append(part)
+    first, *others = parts
+    return first.union(*others, all=queryset.query.combinator_all)
+
+
+def _reverse_ordering(ordering):
+    """ Returns the ordering with the direction of every field flipped. """
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    )
@@ -1,6 +1,7 @@
 """ Django settings for viridian_api project. """
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 import cloudinary
 
@@ -22,6 +23,30 @@ MEDIA_URL = '/media/'
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Image upload pipeline, see images/pipeline.py
+IMAGE_STORAGE_BACKEND = os.environ.get(
+    'IMAGE_STORAGE_BACKEND', 'images.storage.CloudinaryImageStorage')
+IMAGE_SPOOL_DIR = os.environ.get(
+    'IMAGE_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'viridian-spool'))
+IMAGE_LOCAL_STORAGE_DIR = BASE_DIR / 'media'
+IMAGE_UPLOAD_WORKERS = int(os.environ.get('IMAGE_UPLOAD_WORKERS', 8))
+FILE_UPLOAD_HANDLERS = [
+    'images.uploads.ImageSizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Notifications event stream, see notifications/broker.py
+NOTIFICATIONS_BROKER = os.environ.get(
+    'NOTIFICATIONS_BROKER', 'notifications.broker.DatabaseBroker')
+NOTIFICATIONS_POLL_INTERVAL = float(
+    os.environ.get('NOTIFICATIONS_POLL_INTERVAL', 2))
+NOTIFICATIONS_HEARTBEAT = 15
+# Django 4.2 does not notice clients leaving a stream, so each stream ends
+# after this many seconds to release the subscriptions of departed clients
+NOTIFICATIONS_STREAM_TIMEOUT = 60
+NOTIFICATIONS_RETENTION_DAYS = 7
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [(
         'rest_framework.authentication.SessionAuthentication'
@@ -29,7 +54,7 @@ REST_FRAMEWORK = {
         else 'dj_rest_auth.jwt_auth.JWTCookieAuthentication'
     )],
     'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.PageNumberPagination',
+        'viridian_api.pagination.OptionalCursorPagination',
     'PAGE_SIZE': 8,
     'DATETIME_FORMAT': '%d %b %Y %H:%M',
 }
@@ -90,7 +115,9 @@ INSTALLED_APPS = [
     'art_collections',
     'artpieces',
     'enquiries',
+    'images',
     'likes',
+    'notifications',
     'profiles',
     'users',
 ]
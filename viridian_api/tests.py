@@ -0,0 +1,176 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+from urllib.parse import urlsplit
+from asgiref.testing import ApplicationCommunicator
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.test.client import encode_multipart
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import CustomUser
+from enquiries.views import EnquirySummary
+from images.validators import MAX_IMAGE_SIZE, SIZE_ERROR
+from .asgi import application
+
+CSRF_TOKEN = 'a' * 32
+
+
+async def asgi_request(method, url, body=b'', headers=None, cookies=None):
+    """
+    Sends a request to the ASGI application, as uvicorn does.
+
+    Args:
+        method: The HTTP method.
+        url: The path and query string.
+        body: The request body.
+        headers: A dict of request headers.
+        cookies: A dict of cookies.
+
+    Returns:
+        tuple: The status code, the response headers as a dict, and the
+        response body.
+    """
+    url = urlsplit(url)
+    headers = {'host': 'testserver', **(headers or {})}
+    if cookies:
+        headers['cookie'] = '; '.join(
+            f'{name}={value}' for name, value in cookies.items())
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': url.path,
+        'raw_path': url.path.encode(),
+        'query_string': url.query.encode(),
+        'root_path': '',
+        'headers': [
+            (name.lower().encode(), str(value).encode())
+            for name, value in headers.items()],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+    communicator = ApplicationCommunicator(application, scope)
+    await communicator.send_input({
+        'type': 'http.request', 'body': body, 'more_body': False})
+    start = await communicator.receive_output(10)
+    response_headers = {
+        name.decode().lower(): value.decode()
+        for name, value in start['headers']}
+    content = b''
+    while True:
+        message = await communicator.receive_output(10)
+        content += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    await communicator.wait()
+    return start['status'], response_headers, content
+
+
+class ASGIApplicationTests(TransactionTestCase):
+    """
+    Smoke tests of the synchronous API served by the ASGI application, as
+    it is in production (see the Procfile): static files, session and JWT
+    cookie authentication, CSRF and the upload handlers.
+    """
+
+    def setUp(self):
+        """ Sets up a test user and a logged in session. """
+        self.user = CustomUser.objects.create_user(
+            email='test@test.com', password='testpass')
+        self.client.login(email='test@test.com', password='testpass')
+        self.cookies = {
+            settings.SESSION_COOKIE_NAME:
+                self.client.cookies[settings.SESSION_COOKIE_NAME].value,
+            settings.CSRF_COOKIE_NAME: CSRF_TOKEN,
+        }
+
+    async def test_api_and_static_files_are_served(self):
+        """
+        Asserts API views and the static files served by WhiteNoise respond
+        through the ASGI application.
+        """
+        status, headers, content = await asgi_request(
+            'GET', '/api/artpieces/')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['content-type'], 'application/json')
+        self.assertIn(b'"results"', content)
+
+        status, headers, content = await asgi_request(
+            'GET', '/static/admin/css/base.css')
+        self.assertEqual(status, 200)
+        self.assertTrue(headers['content-type'].startswith('text/css'))
+        self.assertTrue(content)
+
+    async def test_session_and_jwt_cookie_authentication(self):
+        """
+        Asserts requests are authenticated with the session cookie, and
+        with the JWT cookie used in production.
+        """
+        url = '/api/enquiries/summary/'
+        status, _, _ = await asgi_request('GET', url)
+        self.assertEqual(status, 403)
+        status, _, _ = await asgi_request('GET', url, cookies=self.cookies)
+        self.assertEqual(status, 200)
+
+        token = str(AccessToken.for_user(self.user))
+        with patch.object(EnquirySummary, 'authentication_classes',
+                          [JWTCookieAuthentication]):
+            status, _, _ = await asgi_request(
+                'GET', url,
+                cookies={settings.REST_AUTH['JWT_AUTH_COOKIE']: token})
+        self.assertEqual(status, 200)
+
+    async def test_multipart_uploads(self):
+        """
+        Asserts multipart uploads go through the upload handlers, creating
+        an artpiece, and rejecting an oversize image, with CSRF checked.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        buffer = BytesIO()
+        Image.new('RGB', (20, 20), 'green').save(buffer, format='JPEG')
+        images = {
+            201: SimpleUploadedFile(
+                'image.jpg', buffer.getvalue(), content_type='image/jpeg'),
+            400: SimpleUploadedFile(
+                'large.jpg', os.urandom(MAX_IMAGE_SIZE + 1),
+                content_type='image/jpeg'),
+        }
+
+        for expected_status, image in images.items():
+            body = encode_multipart(
+                'BoUnDaRy', {'title': f'title {expected_status}',
+                             'image': image})
+            headers = {
+                'content-type': 'multipart/form-data; boundary=BoUnDaRy',
+                'content-length': len(body),
+                'x-csrftoken': CSRF_TOKEN,
+            }
+            with override_settings(
+                    IMAGE_STORAGE_BACKEND='images.storage.LocalImageStorage',
+                    IMAGE_SPOOL_DIR=os.path.join(tmp_dir, 'spool'),
+                    IMAGE_LOCAL_STORAGE_DIR=os.path.join(tmp_dir, 'media'),
+                    IMAGE_UPLOAD_WORKERS=0):
+                status, _, content = await asgi_request(
+                    'POST', '/api/artpieces/', body, headers, self.cookies)
+            self.assertEqual(status, expected_status, content)
+        self.assertIn(SIZE_ERROR.encode(), content)
+
+        del headers['x-csrftoken']
+        status, _, content = await asgi_request(
+            'POST', '/api/artpieces/', body, headers, self.cookies)
+        self.assertEqual(status, 403)
+        self.assertIn(b'CSRF', content)
+
+    async def test_notification_stream_requires_login(self):
+        """ Asserts the event stream is served by the ASGI application. """
+        status, _, _ = await asgi_request(
+            'GET', '/api/notifications/stream/')
+        self.assertEqual(status, 403)
@@ -0,0 +1,79 @@
+class FieldTrackerMixin:
+    """
+    Model mixin remembering the database values of a few fields, so that a
+    save can tell whether they changed without reading the row again.
+
+    The values of the fields listed in `tracked_fields` are snapshotted when
+    an instance is loaded from the database, refreshed, or saved. Deferred
+    fields are not loaded to take the snapshot; if a field's database value
+    is unknown, it is read on demand with a single-column query.
+
+    Values are compared with `!=`, so a value that does not define equality
+    (such as a `CloudinaryResource`) counts as changed only when a new value
+    has been assigned.
+
+    Attributes:
+        tracked_fields (tuple): The names of the tracked fields.
+
+    Methods:
+        from_db: Snapshots the tracked fields of a loaded instance.
+        refresh_from_db: Snapshots the tracked fields that were reloaded.
+        save: Snapshots the tracked fields that were saved.
+        get_original_value: Returns the database value of a tracked field.
+        has_changed: Returns True if a tracked field has a new value.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_tracked_fields(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
+    def get_original_value(self, field_name):
+        """
+        Returns the value of a tracked field as it was last loaded from or
+        saved to the database, or None for an unsaved instance.
+        """
+        tracked_values = self.__dict__.setdefault('_tracked_values', {})
+        if field_name not in tracked_values:
+            if self.pk is None:
+                return None
+            tracked_values[field_name] = type(self)._base_manager.filter(
+                pk=self.pk).values_list(field_name, flat=True).first()
+        return tracked_values[field_name]
+
+    def has_changed(self, field_name):
+        """
+        Returns True if a tracked field has been assigned a value different
+        from its database value. Always True for an unsaved instance.
+        """
+        if self.pk is None:
+            return True
+        attname = self._meta.get_field(field_name).attname
+        if attname not in self.__dict__:
+            return False
+        return self.__dict__[attname] != self.get_original_value(field_name)
+
+    def _snapshot_tracked_fields(self, field_names=None):
+        """
+        Stores the current values of the tracked fields, limited to
+        `field_names` if given. Deferred fields are skipped.
+        """
+        tracked_values = self.__dict__.setdefault('_tracked_values', {})
+        for field_name in self.tracked_fields:
+            if field_names is not None and field_name not in field_names:
+                continue
+            attname = self._meta.get_field(field_name).attname
+            if attname in self.__dict__:
+                tracked_values[field_name] = self.__dict__[attname]
+            else:
+                tracked_values.pop(field_name, None)
@@ -33,6 +33,8 @@ urlpatterns = [
     path('api/', include('likes.urls')),
     path('api/', include('users.urls')),
     path('api/', include('enquiries.urls')),
+    path('api/', include('images.urls')),
+    path('api/', include('notifications.urls')),
 ]
 
 handler404 = TemplateView.as_view(template_name='index.html')